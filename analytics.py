@@ -0,0 +1,211 @@
+"""
+Training analytics over strength history: estimated one-rep max, tonnage,
+and weekly or monthly volume and intensity per exercise.
+
+Everything works on whole columns of the frame db.get_workouts returns
+(Date, Exercise, Weight, Sets, Target Reps, Achieved Reps, ...), never row
+by row. daily_totals collapses workouts to one row per exercise per day;
+period_summary rolls those up to weeks or months. DailyTotalsCache keeps
+each user's daily totals and recomputes only the weeks that new workouts
+land in, so long histories aren't re-aggregated on every write.
+"""
+import datetime
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+E1RM_FORMULAS = ["epley", "brzycki"]
+
+# Brzycki's denominator reaches zero at 37 reps; past ~12 both formulas
+# are rough, but Brzycki stops being defined at all.
+BRZYCKI_MAX_REPS = 36
+
+PERIODS = {"weekly": "W", "monthly": "M"}
+
+
+def epley(weight, reps):
+    """Epley e1RM, weight x (1 + reps / 30). A single is its own 1RM; zero reps is NaN."""
+    weight = np.asarray(weight, dtype="float64")
+    reps = np.asarray(reps, dtype="float64")
+    e1rm = np.where(reps == 1, weight, weight * (1 + reps / 30))
+    return np.where(reps > 0, e1rm, np.nan)
+
+
+def brzycki(weight, reps):
+    """Brzycki e1RM, weight x 36 / (37 - reps). NaN for zero reps or over BRZYCKI_MAX_REPS."""
+    weight = np.asarray(weight, dtype="float64")
+    reps = np.asarray(reps, dtype="float64")
+    valid = (reps > 0) & (reps <= BRZYCKI_MAX_REPS)
+    return np.where(valid, weight * 36 / np.where(valid, 37 - reps, 1), np.nan)
+
+
+def workout_metrics(workouts):
+    """
+    workouts with e1RM (both formulas, from the achieved reps) and tonnage
+    (weight x sets x achieved reps) added per row.
+    """
+    df = workouts.copy()
+    weight = df["Weight"].to_numpy(dtype="float64")
+    reps = df["Achieved Reps"].to_numpy(dtype="float64")
+    df["e1RM (Epley)"] = epley(weight, reps)
+    df["e1RM (Brzycki)"] = brzycki(weight, reps)
+    df["Tonnage"] = weight * df["Sets"].to_numpy(dtype="float64") * reps
+    return df
+
+
+DAILY_COLUMNS = ["Date", "Exercise", "workouts", "sets", "reps", "tonnage",
+                 "top_weight", "e1rm_epley", "e1rm_brzycki"]
+
+
+def daily_totals(workouts):
+    """One row per (Exercise, Date): DAILY_COLUMNS, with Date as datetime64."""
+    if workouts.empty:
+        return pd.DataFrame({c: pd.Series(dtype="float64") for c in DAILY_COLUMNS}).astype(
+            {"Date": "datetime64[ns]", "Exercise": "object"})
+    df = workout_metrics(workouts)
+    df["Date"] = pd.to_datetime(df["Date"])
+    df["reps"] = df["Sets"] * df["Achieved Reps"]
+    daily = df.groupby(["Exercise", "Date"], sort=False).agg(
+        workouts=("Weight", "size"),
+        sets=("Sets", "sum"),
+        reps=("reps", "sum"),
+        tonnage=("Tonnage", "sum"),
+        top_weight=("Weight", "max"),
+        e1rm_epley=("e1RM (Epley)", "max"),
+        e1rm_brzycki=("e1RM (Brzycki)", "max"),
+    ).reset_index()
+    return daily[DAILY_COLUMNS].sort_values(["Date", "Exercise"], ignore_index=True)
+
+
+def combine_daily(*dailies):
+    """daily_totals frames for overlapping workouts folded into one, as if aggregated together."""
+    df = pd.concat(dailies, ignore_index=True)
+    combined = df.groupby(["Exercise", "Date"], sort=False).agg(
+        workouts=("workouts", "sum"),
+        sets=("sets", "sum"),
+        reps=("reps", "sum"),
+        tonnage=("tonnage", "sum"),
+        top_weight=("top_weight", "max"),
+        e1rm_epley=("e1rm_epley", "max"),
+        e1rm_brzycki=("e1rm_brzycki", "max"),
+    ).reset_index()
+    return combined[DAILY_COLUMNS].sort_values(["Date", "Exercise"], ignore_index=True)
+
+
+def week_start(dates):
+    """The Monday starting each date's week, as datetime64."""
+    dates = pd.to_datetime(pd.Series(dates))
+    return (dates - pd.to_timedelta(dates.dt.weekday, unit="D")).dt.normalize()
+
+
+def period_summary(daily, period="weekly"):
+    """
+    Volume and intensity per exercise per week or month (PERIODS) from
+    daily_totals. avg_load is tonnage / reps, the rep-weighted mean weight;
+    intensity is avg_load as a share of the best Epley e1RM reached so far.
+    """
+    if period not in PERIODS:
+        raise ValueError(f"Unknown period {period!r}; expected one of {list(PERIODS)}")
+    df = daily.assign(period=daily["Date"].dt.to_period(PERIODS[period]).dt.start_time)
+    summary = df.groupby(["Exercise", "period"]).agg(
+        days=("Date", "nunique"),
+        workouts=("workouts", "sum"),
+        sets=("sets", "sum"),
+        reps=("reps", "sum"),
+        tonnage=("tonnage", "sum"),
+        top_weight=("top_weight", "max"),
+        e1rm=("e1rm_epley", "max"),
+    ).reset_index()
+    summary["avg_load"] = summary["tonnage"] / summary["reps"].where(summary["reps"] > 0)
+    best_so_far = summary.groupby("Exercise")["e1rm"].cummax()
+    summary["intensity"] = summary["avg_load"] / best_so_far
+    return summary
+
+
+class DailyTotalsCache:
+    """
+    Per-user daily_totals, kept current week by week.
+
+    mark_dirty(user, dates) records the weeks a write touched; the next
+    get() reloads and re-aggregates only those weeks and splices them in.
+    Entries are rebuilt from scratch after ttl seconds, which bounds how
+    stale they get when history changes some other way. A build or refresh
+    that a write (or invalidate) overlapped is returned but not kept, since
+    it may have been read from before the write; the marks it missed stay
+    for the next get().
+    """
+
+    def __init__(self, maxsize=256, ttl=3600):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = {}
+        self._generations = {}
+        self._epoch = 0
+        self._lock = threading.Lock()
+
+    def get(self, user_id, load):
+        """
+        The user's daily totals. load(start_date, end_date) returns their
+        workouts between two dates inclusive, or all of them for (None, None).
+        """
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry["expires"] < time.monotonic():
+                entry = None
+            dirty = set(entry["dirty"]) if entry else set()
+            generation = self._generation(user_id)
+
+        if entry is None:
+            daily = daily_totals(load(None, None))
+            expires = time.monotonic() + self.ttl
+        elif dirty:
+            weeks = sorted(dirty)
+            fresh = load(weeks[0], weeks[-1] + datetime.timedelta(days=6))
+            fresh_daily = daily_totals(fresh)
+            dirty_weeks = pd.to_datetime(weeks)
+            kept = entry["daily"][~week_start(entry["daily"]["Date"]).isin(dirty_weeks).to_numpy()]
+            fresh_daily = fresh_daily[week_start(fresh_daily["Date"]).isin(dirty_weeks).to_numpy()]
+            daily = pd.concat([kept, fresh_daily], ignore_index=True).sort_values(
+                ["Date", "Exercise"], ignore_index=True)
+            expires = entry["expires"]
+        else:
+            return entry["daily"].copy()
+
+        with self._lock:
+            if self._generation(user_id) != generation:
+                return daily.copy()
+            self._entries.pop(user_id, None)
+            self._entries[user_id] = {"daily": daily, "dirty": set(), "expires": expires}
+            while len(self._entries) > self.maxsize:
+                self._entries.pop(next(iter(self._entries)))
+        return daily.copy()
+
+    def mark_dirty(self, user_id, dates):
+        """Recompute the weeks containing dates on the user's next get()."""
+        weeks = {d - datetime.timedelta(days=d.weekday()) for d in dates}
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                entry["dirty"] |= weeks
+            # A build may be under way; don't let it keep what it read.
+            self._bump(user_id)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+            self._bump(user_id)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._generations.clear()
+            self._epoch += 1
+
+    # Called with the lock held.
+    def _generation(self, user_id):
+        return self._epoch, self._generations.get(user_id, 0)
+
+    def _bump(self, user_id):
+        self._generations[user_id] = self._generations.get(user_id, 0) + 1
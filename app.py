@@ -1,7 +1,6 @@
 import streamlit as st
 import pathlib
-from supabase import create_client, Client
-import datetime
+import auth
 from streamlit_cookies_manager import EncryptedCookieManager
 
 # --- Serve static files via query params ---
@@ -34,34 +33,27 @@ Rebrand of app and tidy up of UI to take into account new features.
 For any further feedback, please reach out at: **Jordan.kennedy.leeds@googlemail.com**
 """)
 
-# --- Initialise Supabase client ---
-supabase: Client = create_client(
-    st.secrets["SUPABASE_URL"],
-    st.secrets["SUPABASE_KEY"]
-)
-
 # --- Initialise cookie manager ---
 cookies = EncryptedCookieManager(prefix="supabase", password="a-long-random-secret")
 if not cookies.ready():
     st.stop()
 
-# --- Ensure session state keys exist ---
-for key in ["access_token", "refresh_token", "user_email", "user_id"]:
-    if key not in st.session_state:
-        st.session_state[key] = None
+auth.ensure_session_keys()
+
+def sync_cookie():
+    """Save the refresh token to the cookie, only when it has changed."""
+    token = st.session_state["refresh_token"] or ""
+    if cookies.get("refresh_token", "") != token:
+        cookies["refresh_token"] = token
+        cookies.save()
 
 # --- Try to restore from cookie ---
 if not st.session_state["refresh_token"]:
     token = cookies.get("refresh_token")
     if token:
         try:
-            refreshed = supabase.auth.refresh_session(token)  # pass string, not dict
-            if refreshed.session:
-                st.session_state["access_token"] = refreshed.session.access_token
-                st.session_state["refresh_token"] = refreshed.session.refresh_token
-                st.session_state["user_email"] = refreshed.user.email
-                st.session_state["user_id"] = refreshed.user.id   # ✅ added
-                st.write("Session restored from cookie")
+            auth.restore(token)
+            st.write("Session restored from cookie")
         except Exception as e:
             st.error(f"Failed to restore session: {e}")
 
@@ -72,22 +64,12 @@ try:
 except ImportError:
     st.warning("streamlit-autorefresh not installed. Background refresh disabled.")
 
-# --- Refresh session if needed ---
-def refresh_session():
-    if st.session_state["refresh_token"]:
-        try:
-            refreshed = supabase.auth.refresh_session(st.session_state["refresh_token"])
-            if refreshed.session:
-                st.session_state["access_token"] = refreshed.session.access_token
-                st.session_state["refresh_token"] = refreshed.session.refresh_token
-                st.session_state["user_email"] = refreshed.user.email
-                st.session_state["user_id"] = refreshed.user.id   # ✅ added
-                cookies["refresh_token"] = refreshed.session.refresh_token
-                cookies.save()
-        except Exception as e:
-            st.error(f"Session refresh failed: {e}")
-
-refresh_session()
+# --- Refresh session if it is about to expire ---
+try:
+    auth.ensure_fresh_session()
+except Exception as e:
+    st.error(f"Session refresh failed: {e}")
+sync_cookie()
 
 # --- Authentication logic ---
 if not st.session_state["user_email"]:
@@ -100,15 +82,10 @@ if not st.session_state["user_email"]:
         password = st.text_input("Password", type="password", key="login_password")
         if st.button("Log in"):
             try:
-                res = supabase.auth.sign_in_with_password({"email": email, "password": password})
-                if res.user:
-                    st.session_state["access_token"] = res.session.access_token
-                    st.session_state["refresh_token"] = res.session.refresh_token
-                    st.session_state["user_email"] = res.user.email
-                    st.session_state["user_id"] = res.user.id   # ✅ added
-                    cookies["refresh_token"] = res.session.refresh_token
-                    cookies.save()
-                    st.success(f"Logged in as {res.user.email}")
+                user = auth.sign_in(email, password)
+                if user:
+                    sync_cookie()
+                    st.success(f"Logged in as {user.email}")
                     st.rerun()
                 else:
                     st.error("Invalid login credentials.")
@@ -120,8 +97,7 @@ if not st.session_state["user_email"]:
         new_password = st.text_input("Password", type="password", key="signup_password")
         if st.button("Sign up"):
             try:
-                res = supabase.auth.sign_up({"email": new_email, "password": new_password})
-                if res.user:
+                if auth.sign_up(new_email, new_password):
                     st.success("Account created! Please check your email to confirm.")
                 else:
                     st.error("Sign-up failed.")
@@ -131,10 +107,8 @@ if not st.session_state["user_email"]:
 else:
     st.success(f"Welcome {st.session_state['user_email']}")
     if st.button("Log out"):
-        for key in ["access_token", "refresh_token", "user_email", "user_id"]:
-            st.session_state[key] = None
-        cookies["refresh_token"] = ""
-        cookies.save()
+        auth.clear_session()
+        sync_cookie()
         st.rerun()
 
 # --- Debug info (optional) ---
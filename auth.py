@@ -0,0 +1,158 @@
+"""
+Supabase sign-in state, shared by every page.
+
+One Supabase client serves the whole process. The access token's expiry
+is read from the JWT itself, so a rerun only calls Supabase when the token
+is within AUTH_REFRESH_WINDOW seconds of expiring (or already has); the
+rest of the time ensure_fresh_session() is a dictionary lookup. Refreshes
+of the same refresh token are single-flight: Supabase rotates refresh
+tokens on use, so a second call with the old token would fail, and two
+tabs or a quick double rerun would otherwise race each other.
+"""
+import base64
+import json
+import threading
+import time
+from concurrent.futures import Future
+
+import streamlit as st
+from supabase import ClientOptions, create_client
+
+from cache import TTLCache
+from config import get_setting
+
+SESSION_KEYS = ["access_token", "refresh_token", "expires_at", "user_email", "user_id"]
+
+# Refresh once the access token has less than this many seconds left.
+REFRESH_WINDOW = int(get_setting("AUTH_REFRESH_WINDOW", 300))
+
+# A refresh's result is handed to anyone presenting the same (now rotated)
+# refresh token for this long after it completes.
+_REFRESH_REUSE_SECONDS = 60
+
+
+@st.cache_resource
+def get_client():
+    """The process-wide Supabase client."""
+    # Sessions live in each user's session_state, not in the shared client,
+    # so it must not keep (or auto-refresh) whichever user signed in last.
+    options = ClientOptions(auto_refresh_token=False, persist_session=False)
+    return create_client(get_setting("SUPABASE_URL"), get_setting("SUPABASE_KEY"), options)
+
+
+def token_expiry(access_token):
+    """The exp claim (Unix seconds) of a JWT, or None if it can't be read. The signature is not checked."""
+    try:
+        payload = access_token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        return int(json.loads(base64.urlsafe_b64decode(payload))["exp"])
+    except (AttributeError, IndexError, KeyError, TypeError, ValueError):
+        return None
+
+
+def needs_refresh(expires_at, now=None):
+    """True if a token expiring at expires_at is inside the refresh window (or has no known expiry)."""
+    if expires_at is None:
+        return True
+    return expires_at - (time.time() if now is None else now) <= REFRESH_WINDOW
+
+
+def ensure_session_keys():
+    for key in SESSION_KEYS:
+        if key not in st.session_state:
+            st.session_state[key] = None
+
+
+def clear_session():
+    for key in SESSION_KEYS:
+        st.session_state[key] = None
+
+
+def _store(session, user):
+    st.session_state["access_token"] = session.access_token
+    st.session_state["refresh_token"] = session.refresh_token
+    st.session_state["expires_at"] = token_expiry(session.access_token) or session.expires_at
+    st.session_state["user_email"] = user.email
+    st.session_state["user_id"] = user.id
+
+
+# --- Single-flight refresh ---
+_inflight = {}
+_inflight_lock = threading.Lock()
+_recent = TTLCache(maxsize=1024, ttl=_REFRESH_REUSE_SECONDS)
+
+
+def _refresh(refresh_token):
+    """(session, user) for refresh_token, making at most one Supabase call however many threads ask."""
+    recent = _recent.get((refresh_token,))
+    if recent is not None:
+        return recent
+    with _inflight_lock:
+        # Checked again under the lock: a leader that finished since the
+        # check above has already dropped its future, and its result is here.
+        recent = _recent.get((refresh_token,))
+        if recent is not None:
+            return recent
+        future = _inflight.get(refresh_token)
+        leader = future is None
+        if leader:
+            future = _inflight[refresh_token] = Future()
+    if not leader:
+        return future.result()
+
+    try:
+        res = get_client().auth.refresh_session(refresh_token)
+        if not res.session:
+            raise RuntimeError("Supabase returned no session")
+        result = (res.session, res.user)
+        _recent.set((refresh_token,), result)
+        future.set_result(result)
+        return result
+    except Exception as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with _inflight_lock:
+            _inflight.pop(refresh_token, None)
+
+
+# --- Entry points ---
+
+def sign_in(email, password):
+    """Sign in with email and password; returns the user, or None for bad credentials."""
+    res = get_client().auth.sign_in_with_password({"email": email, "password": password})
+    if not res.user:
+        return None
+    _store(res.session, res.user)
+    return res.user
+
+
+def sign_up(email, password):
+    res = get_client().auth.sign_up({"email": email, "password": password})
+    return res.user
+
+
+def restore(refresh_token):
+    """Start a session from a saved refresh token (e.g. a cookie)."""
+    session, user = _refresh(refresh_token)
+    _store(session, user)
+
+
+def ensure_fresh_session():
+    """
+    Refresh the signed-in session if its access token is about to expire.
+    Does nothing (and makes no network call) otherwise, or when signed out.
+    If the refresh fails once the token has already expired, the session
+    is cleared before the error is raised.
+    """
+    refresh_token = st.session_state.get("refresh_token")
+    if not refresh_token or not needs_refresh(st.session_state.get("expires_at")):
+        return
+    try:
+        session, user = _refresh(refresh_token)
+    except Exception:
+        expires_at = st.session_state.get("expires_at")
+        if expires_at is None or expires_at <= time.time():
+            clear_session()
+        raise
+    _store(session, user)
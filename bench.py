@@ -0,0 +1,207 @@
+"""
+Time every public db.py function at several data volumes, and compare
+with a stored baseline.
+
+Point the configured backend at a throwaway database (it is truncated and
+reseeded for every scale) and run, e.g.:
+
+    DATABASE_URL=postgresql://localhost/lifting_bench python bench.py \\
+        --scale 1000 --scale 100000 --out bench.json --baseline bench_baseline.json
+
+or, fully offline against the embedded backend:
+
+    STORAGE_BACKEND=sqlite SQLITE_PATH=/tmp/bench.db python bench.py --scale 100000
+
+A scale is the number of workout rows; users, cardio sessions and Pips
+scores are sized from it (see scale_params). Each call runs with the read
+caches cleared, so the timings are database round trips. Results are
+written as JSON; with --baseline, calls whose median got slower than
+--threshold times the baseline are reported and the exit status is 1.
+Use --save-baseline to record the current run as the new baseline.
+"""
+import argparse
+import datetime
+import json
+import logging
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import warnings
+
+import streamlit as st
+
+import db
+import seed
+from storage import get_backend
+from check_explain import calls
+
+DEFAULT_SCALES = [1_000, 10_000, 100_000, 1_000_000, 10_000_000]
+
+
+def scale_params(scale):
+    """seed() arguments for a scale: ~1000 workouts per user, 10..10,000 users."""
+    users = min(max(scale // 1000, 10), 10_000)
+    return {
+        "users": users,
+        "workouts": scale,
+        "cardio": scale // 5,
+        # Three Pips scores per user per day, roughly as many rows as workouts.
+        "puzzle_days": max(scale // (users * 3), 1),
+    }
+
+
+def maintenance_calls():
+    """Bulk rebuilds: slow at scale, so they are timed once per scale."""
+    return [
+        ("recompute_progression", db.recompute_progression, (), {}),
+        ("rebuild_game_points", db.rebuild_game_points, (), {}),
+        ("rebuild_personal_records", db.rebuild_personal_records, (), {}),
+    ]
+
+
+def call_key(label, args, kwargs):
+    """
+    A name for a call that is stable from run to run, so results line up
+    with the baseline: string arguments are shown, anything else (dates,
+    cursors, sessions) only by type or keyword.
+    """
+    shown = [repr(a) if isinstance(a, str) else type(a).__name__ for a in args]
+    shown += sorted(kwargs)
+    return f"{label}({', '.join(shown)})"
+
+
+def _time(func, args, kwargs, repeat):
+    samples = []
+    for _ in range(repeat):
+        db._history_cache.clear()
+        db._game_daily_cache.clear()
+        start = time.perf_counter()
+        func(*args, **kwargs)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def _summary(samples):
+    ordered = sorted(samples)
+    return {
+        "runs": len(samples),
+        "min_ms": round(ordered[0], 3),
+        "median_ms": round(statistics.median(ordered), 3),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))], 3),
+        "max_ms": round(ordered[-1], 3),
+    }
+
+
+def run_scale(scale, repeat, log=print):
+    seed.truncate()
+    params = scale_params(scale)
+    log(f"Seeding scale {scale}: {params}")
+    start = time.perf_counter()
+    seed.seed(log=lambda msg: None, **params)
+    log(f"Seeded in {time.perf_counter() - start:.1f}s")
+
+    st.session_state["user_id"] = seed.seed_user_id(1)
+    today = datetime.date.today()
+    results = {}
+    for label, func, args, kwargs in calls(today):
+        name = call_key(label, args, kwargs)
+        _time(func, args, kwargs, 1)  # warm up the pool and the buffer cache
+        results[name] = _summary(_time(func, args, kwargs, repeat))
+        log(f"  {name}: {results[name]['median_ms']:.2f} ms")
+    for label, func, args, kwargs in maintenance_calls():
+        name = call_key(label, args, kwargs)
+        results[name] = _summary(_time(func, args, kwargs, 1))
+        log(f"  {name}: {results[name]['median_ms']:.2f} ms")
+    return {"params": params, "calls": results}
+
+
+def _metadata():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"],
+                                capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    backend = get_backend()
+    return {
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "backend": backend.name,
+        "database": backend.version(),
+    }
+
+
+def compare(results, baseline, threshold, min_delta_ms=1.0):
+    """
+    Return (scale, call, baseline ms, current ms, ratio) for every call
+    whose median is over threshold x the baseline and at least min_delta_ms
+    slower, so sub-millisecond jitter is not reported.
+    """
+    regressions = []
+    for scale, current in results["scales"].items():
+        before = baseline.get("scales", {}).get(scale)
+        if not before:
+            continue
+        for name, stats in current["calls"].items():
+            old = before["calls"].get(name)
+            if not old or not old["median_ms"]:
+                continue
+            ratio = stats["median_ms"] / old["median_ms"]
+            if ratio > threshold and stats["median_ms"] - old["median_ms"] >= min_delta_ms:
+                regressions.append((scale, name, old["median_ms"], stats["median_ms"], ratio))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scale", type=int, action="append",
+                        help=f"workout rows to seed; repeatable (default: {DEFAULT_SCALES})")
+    parser.add_argument("--repeat", type=int, default=20, help="timed runs per call")
+    parser.add_argument("--out", default="bench.json", help="where to write the results")
+    parser.add_argument("--baseline", help="results file to compare against")
+    parser.add_argument("--threshold", type=float, default=1.25,
+                        help="report calls whose median exceeds baseline x this")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0,
+                        help="ignore slowdowns smaller than this many ms")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="also write the results to --baseline")
+    args = parser.parse_args()
+
+    # pandas warns on every read_sql_query with a psycopg connection.
+    warnings.filterwarnings("ignore", message="pandas only supports SQLAlchemy")
+    # The slow-query log would repeat what the benchmark already reports.
+    logging.getLogger("db.slow_queries").setLevel(logging.ERROR)
+    db.migrate(log=lambda msg: None)
+    # Time the writes themselves, not an append to the local write queue.
+    db.WRITE_BEHIND = False
+    results = {"meta": _metadata(), "repeat": args.repeat, "scales": {}}
+    for scale in args.scale or DEFAULT_SCALES:
+        # JSON object keys are strings, so store scales that way throughout.
+        results["scales"][str(scale)] = run_scale(scale, args.repeat)
+
+    with open(args.out, "w") as out:
+        json.dump(results, out, indent=2)
+    print(f"Wrote {args.out}")
+
+    if not args.baseline:
+        return
+    if args.save_baseline:
+        with open(args.baseline, "w") as out:
+            json.dump(results, out, indent=2)
+        print(f"Saved baseline {args.baseline}")
+        return
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.threshold, args.min_delta_ms)
+    for scale, name, old, new, ratio in regressions:
+        print(f"❌ scale {scale} {name}: {old:.2f} -> {new:.2f} ms ({ratio:.2f}x)")
+    if regressions:
+        sys.exit(1)
+    print(f"No call slower than {args.threshold}x the baseline.")
+
+
+if __name__ == "__main__":
+    main()
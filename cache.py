@@ -0,0 +1,82 @@
+import threading
+import time
+from collections import OrderedDict
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    Small thread-safe LRU cache with a per-entry time-to-live.
+
+    Keys are tuples whose first element is a tag (e.g. a user_id), so every
+    entry belonging to one tag can be dropped at once with invalidate(tag).
+
+    A value computed while its tag is invalidated would be stale as soon as
+    it is stored. Take generation(tag) before computing it and pass it to
+    set(), which then drops the value if the tag was invalidated (or the
+    cache cleared) in between.
+    """
+
+    def __init__(self, maxsize=256, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._tags = {}
+        self._generations = {}
+        self._epoch = 0
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is _MISSING:
+                return default
+            expires, value = item
+            if expires < time.monotonic():
+                self._discard(key)
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def generation(self, tag):
+        """Token for set(): changes whenever tag is invalidated or the cache is cleared."""
+        with self._lock:
+            return self._epoch, self._generations.get(tag, 0)
+
+    def set(self, key, value, generation=None):
+        with self._lock:
+            if generation is not None and generation != (self._epoch, self._generations.get(key[0], 0)):
+                return
+            if key in self._data:
+                self._discard(key)
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._tags.setdefault(key[0], set()).add(key)
+            while len(self._data) > self.maxsize:
+                oldest = next(iter(self._data))
+                self._discard(oldest)
+
+    def invalidate(self, tag):
+        """Drop every entry whose key starts with tag."""
+        with self._lock:
+            self._generations[tag] = self._generations.get(tag, 0) + 1
+            for key in list(self._tags.get(tag, ())):
+                self._discard(key)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._tags.clear()
+            self._generations.clear()
+            self._epoch += 1
+
+    def __len__(self):
+        return len(self._data)
+
+    def _discard(self, key):
+        self._data.pop(key, None)
+        keys = self._tags.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._tags[key[0]]
@@ -0,0 +1,86 @@
+"""
+Chart data that stays small however much history a user has.
+
+Series arrive already bucketed by day, week or month (db.get_strength_series
+/ db.get_cardio_series); downsample() then keeps at most a fixed budget of
+points per line with Largest-Triangle-Three-Buckets, which preserves peaks
+and troughs where plain decimation would drop them. Only what survives is
+handed to st.line_chart.
+"""
+import numpy as np
+import pandas as pd
+
+from config import get_setting
+
+# Most points sent to the browser for one chart, across all its lines.
+POINT_BUDGET = int(get_setting("CHART_POINT_BUDGET", 500))
+
+
+def lttb(x, y, threshold):
+    """
+    Indices of the threshold points of (x, y) that Largest-Triangle-Three-
+    Buckets keeps. x must be increasing; the first and last points always
+    survive. Returns every index if there are threshold points or fewer.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype="float64")
+    y = np.asarray(y, dtype="float64")
+
+    # Points 1..n-2 split into threshold-2 buckets of (nearly) equal size.
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    keep = np.empty(threshold, dtype=int)
+    keep[0] = 0
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        # The third corner is the mean of the next bucket (the last point for the last bucket).
+        if i + 2 < len(edges):
+            next_start, next_end = edges[i + 1], edges[i + 2]
+            cx, cy = x[next_start:next_end].mean(), y[next_start:next_end].mean()
+        else:
+            cx, cy = x[-1], y[-1]
+        area = np.abs((x[a] - cx) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (cy - y[a]))
+        a = start + int(area.argmax())
+        keep[i + 1] = a
+    keep[-1] = n - 1
+    return keep
+
+
+def downsample(df, x, y, budget=None, by=None):
+    """
+    At most budget rows of df per chart, chosen by LTTB on (x, y), with the
+    budget split evenly across the groups in column by (one line each).
+    Rows where y is missing are dropped first. x may be datetimes.
+    """
+    budget = budget or POINT_BUDGET
+    df = df[df[y].notna()]
+    if by is None:
+        groups = [df]
+    else:
+        groups = [group for _, group in df.groupby(by, sort=False)]
+    per_line = max(budget // max(len(groups), 1), 3)
+    kept = []
+    for group in groups:
+        group = group.sort_values(x)
+        xs = group[x]
+        if pd.api.types.is_datetime64_any_dtype(xs):
+            xs = xs.astype("int64")
+        kept.append(group.iloc[lttb(xs.to_numpy(), group[y].to_numpy(), per_line)])
+    if not kept:
+        return df
+    return pd.concat(kept, ignore_index=True)
+
+
+def with_pace_and_speed(series):
+    """
+    Add Pace (min/km) and Speed (km/h) to a cardio series, from the bucket's
+    total time and distance so each is weighted by distance, not by session.
+    """
+    distance = series["Distance (km)"].where(series["Distance (km)"] > 0)
+    minutes = series["Time (min)"].where(series["Time (min)"] > 0)
+    return series.assign(**{
+        "Pace (min/km)": minutes / distance,
+        "Speed (km/h)": distance / (minutes / 60),
+    })
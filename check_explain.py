@@ -0,0 +1,206 @@
+"""
+EXPLAIN every query db.py runs and fail if any plans a sequential scan.
+
+Point DATABASE_URL at a throwaway local Postgres and run:
+
+    DATABASE_URL=postgresql://localhost/lifting_check python check_explain.py
+
+Postgres only: the checker reads Postgres' JSON plans. The database is
+migrated, seeded with synthetic data if it has no users
+yet (see seed.py), and then each public db.py function is called as one
+of the seeded users. Every statement is EXPLAINed on the same connection
+just before it runs. A Seq Scan on any table with more than --min-rows
+rows is reported and the script exits with status 1.
+"""
+import argparse
+import datetime
+import sys
+from contextlib import contextmanager
+
+import psycopg
+import streamlit as st
+
+import db
+import seed
+from storage import get_backend
+
+# Queries that aggregate a whole (small, precomputed) table on purpose.
+ALLOWED_SEQ_SCANS = {
+    # Loads every user's name at once; cached, so not a per-request read.
+    "get_name_directory": {"users", "family_members"},
+}
+
+_plans = []
+_label = None
+
+
+def _explain(conn, query, params):
+    text = query if isinstance(query, str) else query.as_string(conn)
+    if not text.lstrip().upper().startswith(("SELECT", "WITH", "INSERT", "UPDATE", "DELETE")):
+        return
+    with psycopg.Cursor(conn) as cur:
+        cur.execute("EXPLAIN (FORMAT JSON) " + text, params)
+        _plans.append((_label, text, cur.fetchone()[0][0]["Plan"]))
+
+
+class ExplainingCursor(psycopg.Cursor):
+    def execute(self, query, params=None, **kwargs):
+        _explain(self.connection, query, params)
+        return super().execute(query, params, **kwargs)
+
+    def executemany(self, query, params_seq, **kwargs):
+        params_seq = list(params_seq)
+        if params_seq:
+            _explain(self.connection, query, params_seq[0])
+        return super().executemany(query, params_seq, **kwargs)
+
+
+class ExplainingServerCursor(psycopg.ServerCursor):
+    def execute(self, query, params=None, **kwargs):
+        _explain(self.connection, query, params)
+        return super().execute(query, params, **kwargs)
+
+
+@contextmanager
+def _explaining_connection():
+    with get_backend().pool.connection() as conn:
+        conn.cursor_factory = ExplainingCursor
+        conn.server_cursor_factory = ExplainingServerCursor
+        try:
+            yield conn
+        finally:
+            conn.cursor_factory = psycopg.Cursor
+            conn.server_cursor_factory = psycopg.ServerCursor
+
+
+def _seq_scans(plan):
+    if plan.get("Node Type") == "Seq Scan":
+        yield plan["Relation Name"]
+    for child in plan.get("Plans", []):
+        yield from _seq_scans(child)
+
+
+def _table_sizes():
+    with get_backend().connection() as conn:
+        rows = conn.execute("""
+            SELECT c.relname, c.reltuples::bigint
+            FROM pg_class c
+            JOIN pg_namespace n ON c.relnamespace = n.oid
+            WHERE c.relkind = 'r' AND n.nspname IN ('public', 'auth')
+        """).fetchall()
+    return dict(rows)
+
+
+def describe(label, args, kwargs):
+    shown = [repr(a) for a in args] + [f"{k}={v!r}" for k, v in kwargs.items()]
+    return f"{label}({', '.join(shown)})"[:100]
+
+
+def calls(today):
+    """(label, function, args, kwargs) for every public db.py function."""
+    session = [
+        {"exercise_name": name, "weight": 60.0, "sets": 3, "target_reps": 10,
+         "achieved_reps": 10, "success": True, "scheme": "3 x 10", "workout_date": today}
+        for name in ("Lift 1", "Lift 2")
+    ]
+    _, next_cursor = db.get_workouts_page(limit=5)
+    _, next_cardio_cursor = db.get_cardio_workouts_page(limit=5)
+    month_ago = today - datetime.timedelta(days=30)
+    return [
+        ("add_exercise", db.add_exercise, ("Lift 1",), {}),
+        ("get_exercises", db.get_exercises, (), {}),
+        ("log_workout", db.log_workout, ("Lift 1", 62.5, 3, 10, 10, True, "3 x 10", today), {}),
+        ("log_workouts", db.log_workouts, (session,), {}),
+        ("get_workouts", db.get_workouts, (), {}),
+        ("get_workouts", db.get_workouts, (), {"exercise_name": "Lift 1"}),
+        ("get_workouts", db.get_workouts, (), {"start_date": month_ago, "end_date": today}),
+        ("get_workouts_page", db.get_workouts_page, (), {}),
+        ("get_workouts_page", db.get_workouts_page, (), {"cursor": next_cursor}),
+        ("get_workouts_page", db.get_workouts_page, (), {"exercise_name": "Lift 1", "cursor": next_cursor}),
+        ("get_previous_workout", db.get_previous_workout, ("Lift 1",), {}),
+        ("get_latest_workouts", db.get_latest_workouts, (), {}),
+        ("suggest_next_workout", db.suggest_next_workout, ("Lift 1",), {}),
+        ("suggest_all", db.suggest_all, (), {}),
+        ("get_personal_records", db.get_personal_records, ("Lift 1",), {}),
+        ("get_strength_series", db.get_strength_series, ("Lift 1",), {"bucket": "day"}),
+        ("add_cardio_exercise", db.add_cardio_exercise, ("Run",), {}),
+        ("get_cardio_exercises", db.get_cardio_exercises, (), {}),
+        ("log_cardio", db.log_cardio, ("Run", 30, 5.0, "5/10", today), {}),
+        ("get_cardio_workouts", db.get_cardio_workouts, (), {}),
+        ("get_cardio_workouts", db.get_cardio_workouts, (), {"workout_type": "Run"}),
+        ("get_cardio_workouts_page", db.get_cardio_workouts_page, (), {"cursor": next_cardio_cursor}),
+        ("get_last_cardio", db.get_last_cardio, ("Run",), {}),
+        ("get_cardio_records", db.get_cardio_records, ("Run",), {}),
+        ("get_cardio_series", db.get_cardio_series, (), {}),
+        ("get_cardio_series", db.get_cardio_series, ("Run",), {"bucket": "month"}),
+        ("log_pips_score", db.log_pips_score, ("easy", 95, today), {}),
+        ("log_nyt_score", db.log_nyt_score, ("Wordle", 3, today), {}),
+        ("set_display_name", db.set_display_name, ("Lifter 1",), {}),
+        # Reloaded here, so the leaderboards below are named from the cache.
+        ("get_name_directory", db.get_name_directory, (), {"refresh": True}),
+        ("get_daily_leaderboards", db.get_daily_leaderboards, (today,), {}),
+        ("get_points_leaderboards", db.get_points_leaderboards, ("weekly",), {}),
+        ("get_points_leaderboards", db.get_points_leaderboards, ("monthly",), {}),
+        ("get_points_leaderboards", db.get_points_leaderboards, ("all",), {}),
+    ]
+
+
+def main():
+    global _label
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--min-rows", type=int, default=10_000,
+                        help="ignore sequential scans of tables smaller than this")
+    parser.add_argument("--users", type=int, default=200, help="users to seed into an empty database")
+    parser.add_argument("--workouts", type=int, default=200_000, help="workouts to seed")
+    args = parser.parse_args()
+
+    backend = get_backend()
+    if backend.name != "postgres":
+        sys.exit("check_explain.py needs STORAGE_BACKEND=postgres")
+    db.migrate()
+    # The log_* calls have to reach the database here, not the write queue.
+    db.WRITE_BEHIND = False
+    with backend.connection() as conn:
+        seeded = conn.execute("SELECT EXISTS (SELECT 1 FROM auth.users)").fetchone()[0]
+    if not seeded:
+        seed.seed(users=args.users, workouts=args.workouts, cardio=args.workouts // 4)
+
+    st.session_state["user_id"] = seed.seed_user_id(1)
+    sizes = _table_sizes()
+    checks = calls(datetime.date.today())
+
+    # Every backend method checks connections out through this attribute.
+    backend.connection = _explaining_connection
+    failures = 0
+    for label, func, call_args, kwargs in checks:
+        # Caches would hide the queries, so every call goes to the database.
+        db._history_cache.clear()
+        db._game_daily_cache.clear()
+        db._points_cache.clear()
+        _label = label
+        del _plans[:]
+        func(*call_args, **kwargs)
+
+        bad = []
+        for _, query, plan in _plans:
+            for table in _seq_scans(plan):
+                if sizes.get(table, 0) >= args.min_rows and table not in ALLOWED_SEQ_SCANS.get(label, ()):
+                    bad.append((table, query))
+        name = describe(label, call_args, kwargs)
+        if bad:
+            failures += 1
+            print(f"❌ {name}")
+            for table, query in bad:
+                print(f"   Seq Scan on {table} ({sizes[table]} rows) in:")
+                print("   " + " ".join(query.split())[:300])
+        else:
+            print(f"✅ {name}: {len(_plans)} queries")
+
+    if failures:
+        print(f"\n{failures} call(s) fell back to a sequential scan.")
+        sys.exit(1)
+    print("\nNo sequential scans on hot-path queries.")
+
+
+if __name__ == "__main__":
+    main()
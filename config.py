@@ -0,0 +1,26 @@
+import os
+import streamlit as st
+
+_MISSING = object()
+
+# Streamlit copies root-level secrets into os.environ the first time
+# st.secrets is read, overwriting anything set on the command line, so keep
+# the environment as it was before that.
+_ENVIRON = dict(os.environ)
+
+
+def get_setting(name, default=_MISSING):
+    """
+    Read a setting from the environment, falling back to Streamlit secrets.
+    Environment variables win, so command-line tools can point at a local
+    Postgres without a secrets.toml.
+    """
+    if name in _ENVIRON:
+        return _ENVIRON[name]
+    try:
+        return st.secrets[name]
+    except (KeyError, FileNotFoundError):
+        # FileNotFoundError: no secrets.toml at all.
+        if default is _MISSING:
+            raise KeyError(f"Setting {name} not found in the environment or Streamlit secrets") from None
+        return default
@@ -1,21 +1,30 @@
+import asyncio
+import copy
+import datetime
+import functools
+import inspect
 import streamlit as st
-import psycopg
 import pandas as pd
-from supabase import create_client
-
-# --- Secrets ---
-DATABASE_URL = st.secrets["DATABASE_URL"]
-SUPABASE_URL = st.secrets["SUPABASE_URL"]
-SUPABASE_KEY = st.secrets["SUPABASE_KEY"]
-
-# --- Cached connections ---
-@st.cache_resource
-def get_connection():
-    return psycopg.connect(DATABASE_URL)
-
-@st.cache_resource
-def get_supabase():
-    return create_client(SUPABASE_URL, SUPABASE_KEY)
+import analytics
+import charts
+import event_loop
+import frames
+import games
+from cache import TTLCache
+from config import get_setting
+from metrics import timed_query
+from storage import DuplicateWrite, get_backend
+from storage.base import (
+    CHART_BUCKETS, PREVIOUS_COLUMNS, SCORE_TYPES, WORKOUT_HISTORY_TYPES, latest_per_exercise, period_bounds,
+    progress_from_row,
+)
+from write_queue import WriteQueue
+import progression
+
+# --- Storage ---
+# Every query lives in a storage backend (storage/postgres.py or
+# storage/sqlite.py, chosen by STORAGE_BACKEND); this module adds the
+# session's user, caching and instrumentation on top.
 
 def current_user_id():
     uid = st.session_state.get("user_id")
@@ -23,162 +32,581 @@ def current_user_id():
         raise RuntimeError("No user_id in session.")
     return uid
 
+# --- Per-user read cache ---
+# Shared by every session in the process. Entries are keyed by user_id and
+# dropped as soon as that user writes, so reads never go stale for the
+# writer; the TTL bounds staleness for anything written elsewhere.
+_history_cache = TTLCache(
+    maxsize=int(get_setting("HISTORY_CACHE_SIZE", 512)),
+    ttl=float(get_setting("HISTORY_CACHE_TTL", 300)),
+)
+_MISSING = object()
+
+# Rows per page for the paginated history readers.
+HISTORY_PAGE_SIZE = 50
+
+def cached_per_user(func):
+    """Serve a per-user read from the history cache until that user writes."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        key = (current_user_id(), func.__name__, args, tuple(sorted(kwargs.items())))
+        value = _history_cache.get(key, _MISSING)
+        if value is _MISSING:
+            # A write flushed mid-read invalidates the user; don't cache what
+            # was read from before it.
+            generation = _history_cache.generation(key[0])
+            value = func(*args, **kwargs)
+            _history_cache.set(key, value, generation)
+        return _copy_result(value)
+    return wrapper
+
+def _copy_result(value):
+    # Callers filter and mutate results, so never hand out the cached object.
+    if isinstance(value, tuple):
+        return tuple(copy.copy(v) for v in value)
+    return copy.copy(value)
+
+def invalidate_user_cache(uid):
+    _history_cache.invalidate(uid)
+
+# --- Write-behind queue ---
+# With WRITE_BEHIND on, the log_* functions put writes on a durable local
+# queue (write_queue.py) and return as soon as they are on disk; its thread
+# applies them to the database in order. Reads merge in the user's queued
+# writes (see with_pending), so whoever logged something sees it at once.
+# Records beaten, and writes that couldn't be saved, come back through
+# take_write_notices() instead of the log call's return value. The SQLite
+# backend's writes are already local, so it always writes straight through.
+WRITE_BEHIND = str(get_setting("WRITE_BEHIND", "true")).lower() in ("1", "true", "yes", "on")
+
+def write_behind():
+    return WRITE_BEHIND and get_backend().name != "sqlite"
+
+@st.cache_resource
+def get_write_queue():
+    """
+    The process's write queue and its flushing thread. Several processes
+    may share one WRITE_QUEUE_PATH: the idempotency keys stop a write two
+    of them pick up from being applied twice.
+    """
+    backend = get_backend()
+    return WriteQueue(
+        get_setting("WRITE_QUEUE_PATH", "write_queue.db"),
+        apply=functools.partial(_apply_writes, backend),
+        after=_after_writes,
+        # Back-to-back sessions from one user go in as one transaction.
+        mergeable={"workouts"},
+        transient_errors=backend.transient_errors,
+    )
+
+def _apply_writes(backend, user_id, op, writes):
+    """WriteQueue.apply: one transaction per call; returns descriptions of the records beaten."""
+    keys = [key for key, _ in writes]
+    payloads = [payload for _, payload in writes]
+    try:
+        if op == "workouts":
+            records = backend.log_workouts(user_id, [e for p in payloads for e in p["entries"]], keys=keys)
+        elif op == "cardio":
+            records = backend.log_cardio(user_id, **payloads[0], keys=keys)
+        elif op == "pips":
+            records = backend.log_pips_score(user_id, **payloads[0], keys=keys)
+        elif op == "nyt":
+            records = backend.log_nyt_score(user_id, **payloads[0], keys=keys)
+        else:
+            raise ValueError(f"Unknown write op {op!r}")
+    except DuplicateWrite:
+        if len(writes) > 1:
+            raise  # the queue retries them one at a time
+        return []  # applied before, e.g. just before a crash
+    return [r["description"] for r in new_records(records or [])]
+
+def _after_writes(user_id, op, payloads):
+    """WriteQueue.after: drop what the flushed writes made stale."""
+    invalidate_user_cache(user_id)
+    if op == "workouts":
+        _training_days.mark_dirty(user_id, [e["workout_date"] for p in payloads for e in p["entries"]])
+    elif op == "pips":
+        for p in payloads:
+            _game_daily_cache.invalidate(("Pips", p["puzzle_date"]))
+    elif op == "nyt":
+        for p in payloads:
+            _game_daily_cache.invalidate((p["game"], p["puzzle_date"]))
+    if op in ("pips", "nyt"):
+        _points_cache.clear()
+
+def _pending(op):
+    """The signed-in user's queued payloads of op, oldest first."""
+    if not write_behind():
+        return []
+    return get_write_queue().pending(current_user_id(), op)
+
+def with_pending(op, merge):
+    """
+    Merge the user's queued writes of op into a read's result, as
+    merge(result, payloads, *args, **kwargs). Goes outside the caching
+    decorators, so the caches only ever hold what the database returned;
+    also wraps async twins, whose coroutine is merged once awaited. The
+    queue is read first: a write flushed in between then shows up twice
+    for a moment rather than not at all.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            payloads = _pending(op)
+            result = func(*args, **kwargs)
+            if not payloads:
+                return result
+            if inspect.isawaitable(result):
+                return _merge_async(result, merge, payloads, args, kwargs)
+            return merge(result, payloads, *args, **kwargs)
+        return wrapper
+    return decorator
+
+async def _merge_async(result, merge, payloads, args, kwargs):
+    return merge(await result, payloads, *args, **kwargs)
+
+def take_write_notices():
+    """
+    [(kind, message)] from the user's writes flushed since the last call:
+    "record" for a personal record beaten, "error" for a write that
+    couldn't be saved.
+    """
+    if not write_behind() or not st.session_state.get("user_id"):
+        return []
+    return get_write_queue().take_notices(current_user_id())
+
+# --- Instrumentation ---
+# Every function below that talks to the database is wrapped in @timed_query
+# (see metrics.py). It sits inside @cached_per_user, so cache hits are not
+# counted as queries.
+
+def migrate(log=print):
+    """Bring the configured backend's schema up to date. Returns the versions applied."""
+    return get_backend().migrate(log)
+
 # ----------------- Exercises -----------------
+@timed_query
 def add_exercise(exercise_name: str):
     uid = current_user_id()
-    conn = get_connection()
-    with conn.cursor() as cur:
-        cur.execute("""
-            INSERT INTO exercises (user_id, name)
-            VALUES (%s, %s)
-            ON CONFLICT (user_id, name) DO NOTHING
-        """, (uid, exercise_name))
-        conn.commit()
+    get_backend().add_exercise(uid, exercise_name)
+    invalidate_user_cache(uid)
 
+@cached_per_user
+@timed_query
 def get_exercises():
-    uid = current_user_id()
-    conn = get_connection()
-    with conn.cursor() as cur:
-        cur.execute("SELECT name FROM exercises WHERE user_id = %s ORDER BY name", (uid,))
-        return [r[0] for r in cur.fetchall()]
+    return get_backend().get_exercises(current_user_id())
 
 # ----------------- Workouts -----------------
 def log_workout(exercise_name, weight, sets, target_reps, achieved_reps, success, scheme, workout_date):
+    """Log one exercise; returns the personal records it beat, like log_workouts."""
+    return log_workouts([{
+        "exercise_name": exercise_name,
+        "weight": weight,
+        "sets": sets,
+        "target_reps": target_reps,
+        "achieved_reps": achieved_reps,
+        "success": success,
+        "scheme": scheme,
+        "workout_date": workout_date,
+    }])
+
+@timed_query
+def log_workouts(entries):
+    """
+    Log a whole session in one transaction.
+    entries is a list of dicts with the same keys as log_workout's arguments.
+    The last entry per exercise also becomes its progression state.
+    Returns the personal records the session beat (see new_records); when
+    the session is queued, they arrive through take_write_notices instead.
+    """
+    if not entries:
+        return []
     uid = current_user_id()
-    conn = get_connection()
-    with conn.cursor() as cur:
-        # Look up exercise_id
-        cur.execute("SELECT id FROM exercises WHERE user_id = %s AND name = %s", (uid, exercise_name))
-        row = cur.fetchone()
-        if not row:
-            raise RuntimeError(f"Exercise '{exercise_name}' not found for user {uid}")
-        exercise_id = row[0]
-
-        cur.execute("""
-            INSERT INTO workouts (user_id, exercise_id, workout_date, weight, sets, target_reps, achieved_reps, success, scheme)
-            VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s)
-        """, (uid, exercise_id, workout_date, weight, sets, target_reps, achieved_reps, success, scheme))
-        conn.commit()
-
-def get_workouts():
-    uid = current_user_id()
-    conn = get_connection()
-    return pd.read_sql_query("""
-        SELECT w.workout_date AS "Date",
-               e.name AS "Exercise",
-               w.weight AS "Weight",
-               w.sets AS "Sets",
-               w.target_reps AS "Target Reps",
-               w.achieved_reps AS "Achieved Reps",
-               w.success AS "Success",
-               w.scheme AS "Scheme"
-        FROM workouts w
-        JOIN exercises e ON w.exercise_id = e.id
-        WHERE w.user_id = %s
-        ORDER BY w.workout_date DESC
-    """, conn, params=(uid,))
+    if write_behind():
+        # Fail now, not in the background, for an exercise that doesn't exist.
+        unknown = {e["exercise_name"] for e in entries} - set(get_exercises())
+        if unknown:
+            raise RuntimeError(f"Exercise '{sorted(unknown)[0]}' not found for user {uid}")
+        get_write_queue().enqueue(uid, "workouts", {"entries": entries})
+        _training_days.mark_dirty(uid, [e["workout_date"] for e in entries])
+        return []
+    records = get_backend().log_workouts(uid, entries)
+    invalidate_user_cache(uid)
+    _training_days.mark_dirty(uid, [e["workout_date"] for e in entries])
+    return new_records(records)
+
+def _split_page(df, limit):
+    """Trim a limit+1 fetch to one page and return (page, next_cursor)."""
+    next_cursor = None
+    if len(df) > limit:
+        df = df.iloc[:limit]
+        last = df.iloc[-1]
+        next_cursor = (last["Date"], int(last["id"]))
+    return df.drop(columns="id").reset_index(drop=True), next_cursor
+
+def _in_range(day, start_date, end_date):
+    return (start_date is None or day >= start_date) and (end_date is None or day <= end_date)
+
+def _with_rows(df, rows, limit=None):
+    """Queued rows merged into a newest-first history DataFrame."""
+    if not rows:
+        return df
+    merged = frames.concat([frames.typed_frame(df.columns, rows[::-1], frames.dtypes_of(df)), df])
+    merged = merged.sort_values("Date", ascending=False, kind="stable", ignore_index=True)
+    return merged if limit is None else merged.head(limit)
+
+def _pending_workout_rows(payloads, exercise_name, start_date, end_date):
+    return [
+        (e["workout_date"], e["exercise_name"], e["weight"], e["sets"], e["target_reps"],
+         e["achieved_reps"], e["success"], e["scheme"])
+        for p in payloads for e in p["entries"]
+        if exercise_name in (None, e["exercise_name"]) and _in_range(e["workout_date"], start_date, end_date)
+    ]
+
+def _merge_workouts(df, payloads, exercise_name=None, start_date=None, end_date=None, limit=None, cursor=None):
+    if cursor is not None:
+        return df  # queued workouts are newer than anything on later pages
+    return _with_rows(df, _pending_workout_rows(payloads, exercise_name, start_date, end_date), limit)
+
+def _merge_workouts_page(result, payloads, exercise_name=None, start_date=None, end_date=None,
+                         limit=HISTORY_PAGE_SIZE, cursor=None):
+    page, next_cursor = result
+    if cursor is not None:
+        return result
+    # The first page grows rather than pushing rows onto the next one, so
+    # the cursor stays valid.
+    return _with_rows(page, _pending_workout_rows(payloads, exercise_name, start_date, end_date)), next_cursor
+
+@with_pending("workouts", _merge_workouts)
+@cached_per_user
+@timed_query
+def get_workouts(exercise_name=None, start_date=None, end_date=None, limit=None, cursor=None):
+    """
+    Return the user's strength workouts, newest first, filtered in SQL.
+    Use get_workouts_page to walk long histories one page at a time.
+    """
+    df = get_backend().query_workouts(current_user_id(), exercise_name, start_date, end_date, limit, cursor)
+    return df.drop(columns="id")
+
+@with_pending("workouts", _merge_workouts_page)
+@cached_per_user
+@timed_query
+def get_workouts_page(exercise_name=None, start_date=None, end_date=None,
+                      limit=HISTORY_PAGE_SIZE, cursor=None):
+    """
+    Return (page, next_cursor). Pass next_cursor back in to get the next,
+    older page; it is None on the last page.
+    """
+    df = get_backend().query_workouts(current_user_id(), exercise_name, start_date, end_date, limit + 1, cursor)
+    return _split_page(df, limit)
+
+# ----------------- Progression state -----------------
+# One row per (user, exercise): the latest workout and the suggestion the
+# progression rule made from it, kept current by log_workouts so lookups
+# never have to scan workout history.
+@timed_query
+def recompute_progression(user_id=None, rule=progression.DEFAULT_RULE, chunk_size=5000):
+    """
+    Rebuild exercise_progress from workout history, for one user or everyone,
+    e.g. after the progression rules change. Returns the number of rows written.
+    """
+    total = get_backend().recompute_progression(user_id, rule, chunk_size)
+    # Called after bulk history changes (e.g. a legacy import), so the
+    # analytics are rebuilt too.
+    if user_id:
+        invalidate_user_cache(user_id)
+        _training_days.invalidate(user_id)
+    else:
+        _history_cache.clear()
+        _training_days.clear()
+    return total
+
+def _pending_progress(payloads):
+    """{name: (prev, rule, suggestion)} from the last queued entry per exercise."""
+    rule = progression.DEFAULT_RULE  # what log_workouts stores
+    progress = {}
+    for name, entry in latest_per_exercise([e for p in payloads for e in p["entries"]]):
+        prev = {column: entry[column] for column in PREVIOUS_COLUMNS}
+        progress[name] = (prev, rule, progression.suggest(prev, rule))
+    return progress
+
+def _newer(queued, stored):
+    # Like the upsert: a back-dated session doesn't replace a later one.
+    return stored is None or str(queued[0]["date"]) >= str(stored[0]["date"])
+
+def _merge_progress(progress, payloads, exercise_name):
+    queued = _pending_progress(payloads).get(exercise_name)
+    return (exercise_name, *queued) if queued and _newer(queued, progress and progress[1:]) else progress
+
+def _merge_all_progress(progress, payloads):
+    return {**progress, **{name: queued for name, queued in _pending_progress(payloads).items()
+                           if _newer(queued, progress.get(name))}}
+
+@with_pending("workouts", _merge_progress)
+@cached_per_user
+@timed_query
+def _get_progress(exercise_name):
+    row = get_backend().get_progress(current_user_id(), exercise_name)
+    return progress_from_row(row) if row else None
+
+@with_pending("workouts", _merge_all_progress)
+@cached_per_user
+@timed_query
+def _get_all_progress():
+    rows = get_backend().get_all_progress(current_user_id())
+    return {name: (prev, rule, suggestion)
+            for name, prev, rule, suggestion in map(progress_from_row, rows)}
 
 def get_previous_workout(exercise_name: str):
-    uid = current_user_id()
-    conn = get_connection()
-    with conn.cursor() as cur:
-        cur.execute("""
-            SELECT w.workout_date, w.weight, w.sets, w.target_reps,
-                   w.achieved_reps, w.success, w.scheme
-            FROM workouts w
-            JOIN exercises e ON w.exercise_id = e.id
-            WHERE w.user_id = %s AND e.name = %s
-            ORDER BY w.created_at DESC
-            LIMIT 1
-        """, (uid, exercise_name))
-        row = cur.fetchone()
-    if not row:
-        return None
-    return {
-        "date": row[0],
-        "weight": row[1],
-        "sets": row[2],
-        "target_reps": row[3],
-        "achieved_reps": row[4],
-        "success": row[5],
-        "scheme": row[6],
-    }
-
-def suggest_next_workout(exercise_name: str):
-    prev = get_previous_workout(exercise_name)
-
-    scheme_cycle = ["3 x 15", "3 x 10", "3 x 5"]
-
-    if not prev:
-        return {"weight": 20.0, "sets": 3, "target_reps": 15, "scheme": "3 x 15"}
+    progress = _get_progress(exercise_name)
+    return progress[1] if progress else None
+
+def get_latest_workouts():
+    """Return {exercise name: previous workout} for every exercise the user has logged."""
+    return {name: prev for name, (prev, _, _) in _get_all_progress().items()}
+
+def suggest_next_workout(exercise_name: str, rule=progression.DEFAULT_RULE):
+    progress = _get_progress(exercise_name)
+    if not progress:
+        return progression.suggest(None, rule)
+    _, prev, stored_rule, suggestion = progress
+    # Stored suggestions are only valid for the rule that made them.
+    return suggestion if stored_rule == rule else progression.suggest(prev, rule)
+
+def suggest_all(rule=progression.DEFAULT_RULE):
+    """
+    Suggest the next workout for every exercise at once from the stored
+    progression state, applying the rule only where it differs.
+    """
+    progress = _get_all_progress()
+    suggestions = {}
+    for name in get_exercises():
+        if name not in progress:
+            suggestions[name] = progression.suggest(None, rule)
+            continue
+        prev, stored_rule, suggestion = progress[name]
+        suggestions[name] = suggestion if stored_rule == rule else progression.suggest(prev, rule)
+    return suggestions
+
+# ----------------- Personal records -----------------
+# Best weight per rep count, best e1RM and biggest session volume per
+# exercise, and fastest pace / longest distance per cardio type. The
+# backends move them forward in the same transaction as each log, so these
+# reads are primary-key lookups however long the history is.
+RECORD_LABELS = {
+    "weight": "{reps}-rep max",
+    "e1rm": "Estimated 1RM",
+    "volume": "Session volume",
+    "pace": "Fastest pace",
+    "distance": "Longest distance",
+}
+RECORD_UNITS = {"weight": "kg", "e1rm": "kg", "volume": "kg", "pace": "min/km", "distance": "km"}
+
+def record_label(record, reps=0):
+    return RECORD_LABELS[record].format(reps=reps)
+
+def format_record_value(record, value):
+    if record == "pace":
+        minutes, seconds = divmod(round(value * 60), 60)
+        return f"{minutes}:{seconds:02d} {RECORD_UNITS[record]}"
+    return f"{value:,.1f} {RECORD_UNITS[record]}"
+
+def new_records(records):
+    """
+    The records a log beat, dropping first-ever entries (they only set a
+    baseline), each with a one-line description for the log pages.
+    """
+    beaten = [r for r in records if r["previous"] is not None]
+    for r in beaten:
+        r["description"] = (
+            f"{r['exercise']} — {record_label(r['record'], r['reps'])}: "
+            f"{format_record_value(r['record'], r['value'])} "
+            f"(was {format_record_value(r['record'], r['previous'])})"
+        )
+    return beaten
+
+@cached_per_user
+@timed_query
+def get_personal_records(exercise_name: str):
+    """DataFrame of Record, Best, Date for one exercise."""
+    rows = get_backend().get_personal_records(current_user_id(), exercise_name)
+    return pd.DataFrame(
+        [(record_label(record, reps), format_record_value(record, value), workout_date)
+         for record, reps, value, workout_date in rows],
+        columns=["Record", "Best", "Date"],
+    )
 
-    scheme_aliases = {
-        "3x15": "3 x 15", "3 x 15": "3 x 15", "3×15": "3 x 15",
-        "3x10": "3 x 10", "3 x 10": "3 x 10", "3×10": "3 x 10",
-        "3x5": "3 x 5", "3 x 5": "3 x 5", "3×5": "3 x 5",
-    }
-    
-    current_scheme = scheme_aliases.get(str(prev["scheme"]).strip(), "3 x 15")
-    idx = scheme_cycle.index(current_scheme)
+@cached_per_user
+@timed_query
+def get_cardio_records(workout_type: str):
+    """DataFrame of Record, Best, Date for one cardio workout type."""
+    rows = get_backend().get_cardio_records(current_user_id(), workout_type)
+    return pd.DataFrame(
+        [(record_label(record), format_record_value(record, value), workout_date)
+         for record, value, workout_date in rows],
+        columns=["Record", "Best", "Date"],
+    )
 
-    if prev["success"]:
-        inc = 2.5
-        next_scheme = current_scheme
+@timed_query
+def rebuild_personal_records(user_id=None):
+    """
+    Rebuild every personal record from history, for one user or everyone,
+    e.g. to backfill. Returns the number of rows written.
+    """
+    total = get_backend().rebuild_personal_records(user_id)
+    if user_id:
+        invalidate_user_cache(user_id)
     else:
-        inc = 0.0
-        next_scheme = scheme_cycle[(idx + 1) % len(scheme_cycle)]
-
-    scheme_defaults = {
-        "3 x 15": (3, 15),
-        "3 x 10": (3, 10),
-        "3 x 5": (3, 5),
-    }
-    sets, reps = scheme_defaults[next_scheme]
-
-    return {
-        "weight": float(prev["weight"]) + inc,
-        "sets": sets,
-        "target_reps": reps,
-        "scheme": next_scheme,
-    }
+        _history_cache.clear()
+    return total
+
+# ----------------- Training analytics -----------------
+# Daily e1RM / tonnage totals per exercise (see analytics.py), cached per
+# user. log_workouts marks the weeks it writes to, and only those weeks are
+# reloaded and re-aggregated on the next read. Workouts are loaded straight
+# from the backend, so full histories don't also sit in the history cache;
+# queued workouts are folded in on the way out.
+_training_days = analytics.DailyTotalsCache(
+    maxsize=int(get_setting("ANALYTICS_CACHE_SIZE", 256)),
+    ttl=float(get_setting("ANALYTICS_CACHE_TTL", 3600)),
+)
+
+def _merge_training_days(daily, payloads):
+    rows = _pending_workout_rows(payloads, None, None, None)
+    columns = [c for c in WORKOUT_HISTORY_TYPES if c != "id"]
+    queued = analytics.daily_totals(frames.typed_frame(columns, rows, WORKOUT_HISTORY_TYPES))
+    return analytics.combine_daily(daily, queued)
+
+@with_pending("workouts", _merge_training_days)
+def get_training_days():
+    """One row per exercise per training day: analytics.DAILY_COLUMNS."""
+    uid = current_user_id()
+    return _training_days.get(uid, functools.partial(_load_training_workouts, uid))
+
+@timed_query
+def _load_training_workouts(uid, start_date, end_date):
+    df = get_backend().query_workouts(uid, None, start_date, end_date, None, None)
+    return df.drop(columns="id")
+
+def get_training_volume(period="weekly"):
+    """Volume and intensity per exercise per week or month (analytics.period_summary)."""
+    return analytics.period_summary(get_training_days(), period)
+
+# ----------------- Chart series -----------------
+# Progress over time, bucketed in SQL (see charts.py for the downsampling
+# that bounds what reaches the browser).
+def _check_bucket(bucket):
+    if bucket not in CHART_BUCKETS:
+        raise ValueError(f"Unknown bucket {bucket!r}; expected one of {CHART_BUCKETS}")
+
+@cached_per_user
+@timed_query
+def get_strength_series(exercise_name: str, bucket="week"):
+    """One row per bucket: Date, Sets, Top weight (kg), e1RM (kg), Tonnage (kg)."""
+    _check_bucket(bucket)
+    df = get_backend().strength_series(current_user_id(), exercise_name, bucket)
+    return pd.DataFrame({
+        "Date": pd.to_datetime(df["bucket"]),
+        "Sets": df["sets_logged"],
+        "Top weight (kg)": df["top_weight"],
+        "e1RM (kg)": df["e1rm"],
+        "Tonnage (kg)": df["tonnage"],
+    })
+
+@cached_per_user
+@timed_query
+def get_cardio_series(workout_type=None, bucket="week"):
+    """
+    One row per bucket and workout type: Date, Workout Type, Sessions,
+    Distance (km), Time (min), Pace (min/km), Speed (km/h).
+    """
+    _check_bucket(bucket)
+    df = get_backend().cardio_series(current_user_id(), workout_type, bucket)
+    return charts.with_pace_and_speed(pd.DataFrame({
+        "Date": pd.to_datetime(df["bucket"]),
+        "Workout Type": df["workout_type"],
+        "Sessions": df["sessions"],
+        "Distance (km)": df["distance_km"],
+        "Time (min)": df["time_minutes"],
+    }))
 
 # ----------------- Cardio Workouts -----------------
+@timed_query
 def log_cardio(workout_type, time_minutes, distance_km, difficulty_level, workout_date):
+    """
+    Log one cardio session; returns the personal records it beat (see
+    new_records), or [] when it is queued (see take_write_notices).
+    """
     uid = current_user_id()
-    conn = get_connection()
-    with conn.cursor() as cur:
-        cur.execute("""
-            INSERT INTO cardio_workouts (user_id, workout_type, workout_date, time_minutes, distance_km, difficulty_level)
-            VALUES (%s, %s, %s, %s, %s, %s)
-        """, (uid, workout_type, workout_date, time_minutes, distance_km, difficulty_level))
-        conn.commit()
-
-def get_cardio_workouts():
-    uid = current_user_id()
-    conn = get_connection()
-    return pd.read_sql_query("""
-        SELECT workout_date AS "Date",
-               workout_type AS "Workout Type",
-               time_minutes AS "Time (min)",
-               distance_km AS "Distance (km)",
-               difficulty_level AS "Difficulty"
-        FROM cardio_workouts
-        WHERE user_id = %s
-        ORDER BY workout_date DESC
-    """, conn, params=(uid,))
+    if write_behind():
+        get_write_queue().enqueue(uid, "cardio", {
+            "workout_type": workout_type,
+            "time_minutes": time_minutes,
+            "distance_km": distance_km,
+            "difficulty_level": difficulty_level,
+            "workout_date": workout_date,
+        })
+        return []
+    records = get_backend().log_cardio(uid, workout_type, time_minutes, distance_km, difficulty_level, workout_date)
+    invalidate_user_cache(uid)
+    return new_records(records)
+
+def _pending_cardio_rows(payloads, workout_type, start_date, end_date):
+    return [
+        (p["workout_date"], p["workout_type"], p["time_minutes"], p["distance_km"], p["difficulty_level"])
+        for p in payloads
+        if workout_type in (None, p["workout_type"]) and _in_range(p["workout_date"], start_date, end_date)
+    ]
+
+def _merge_cardio(df, payloads, workout_type=None, start_date=None, end_date=None, limit=None, cursor=None):
+    if cursor is not None:
+        return df
+    return _with_rows(df, _pending_cardio_rows(payloads, workout_type, start_date, end_date), limit)
+
+def _merge_cardio_page(result, payloads, workout_type=None, start_date=None, end_date=None,
+                       limit=HISTORY_PAGE_SIZE, cursor=None):
+    page, next_cursor = result
+    if cursor is not None:
+        return result
+    return _with_rows(page, _pending_cardio_rows(payloads, workout_type, start_date, end_date)), next_cursor
+
+def _merge_last_cardio(last, payloads, workout_type):
+    queued = [p for p in payloads if p["workout_type"] == workout_type]
+    if not queued:
+        return last
+    p = queued[-1]
+    return {"date": p["workout_date"], "time": p["time_minutes"], "distance": p["distance_km"],
+            "difficulty": p["difficulty_level"]}
+
+@with_pending("cardio", _merge_cardio)
+@cached_per_user
+@timed_query
+def get_cardio_workouts(workout_type=None, start_date=None, end_date=None, limit=None, cursor=None):
+    """
+    Return the user's cardio workouts, newest first, filtered in SQL.
+    Use get_cardio_workouts_page to walk long histories one page at a time.
+    """
+    df = get_backend().query_cardio_workouts(current_user_id(), workout_type, start_date, end_date, limit, cursor)
+    return df.drop(columns="id")
+
+@with_pending("cardio", _merge_cardio_page)
+@cached_per_user
+@timed_query
+def get_cardio_workouts_page(workout_type=None, start_date=None, end_date=None,
+                             limit=HISTORY_PAGE_SIZE, cursor=None):
+    """
+    Return (page, next_cursor). Pass next_cursor back in to get the next,
+    older page; it is None on the last page.
+    """
+    df = get_backend().query_cardio_workouts(current_user_id(), workout_type, start_date, end_date,
+                                             limit + 1, cursor)
+    return _split_page(df, limit)
 
+@with_pending("cardio", _merge_last_cardio)
+@cached_per_user
+@timed_query
 def get_last_cardio(workout_type: str):
-    uid = current_user_id()
-    conn = get_connection()
-    with conn.cursor() as cur:
-        cur.execute("""
-            SELECT workout_date, time_minutes, distance_km, difficulty_level
-            FROM cardio_workouts
-            WHERE user_id = %s AND workout_type = %s
-            ORDER BY created_at DESC
-            LIMIT 1
-        """, (uid, workout_type))
-        row = cur.fetchone()
+    row = get_backend().get_last_cardio(current_user_id(), workout_type)
     if not row:
         return None
     return {
@@ -188,230 +616,357 @@ def get_last_cardio(workout_type: str):
         "difficulty": row[3],
     }
 
+@timed_query
 def add_cardio_exercise(name: str):
     uid = current_user_id()
-    conn = get_connection()
-    with conn.cursor() as cur:
-        cur.execute("""
-            INSERT INTO cardio_exercises (user_id, name)
-            VALUES (%s, %s)
-            ON CONFLICT (user_id, name) DO NOTHING
-        """, (uid, name))
-        conn.commit()
+    get_backend().add_cardio_exercise(uid, name)
+    invalidate_user_cache(uid)
 
+@cached_per_user
+@timed_query
 def get_cardio_exercises():
-    uid = current_user_id()
-    conn = get_connection()
-    with conn.cursor() as cur:
-        cur.execute("SELECT name FROM cardio_exercises WHERE user_id = %s ORDER BY name", (uid,))
-        return [r[0] for r in cur.fetchall()]
-
-# ----------------- Optional: family display names -----------------
-def get_family_display_name(email: str) -> str:
+    return get_backend().get_cardio_exercises(current_user_id())
+
+# ----------------- Display names -----------------
+# Leaderboards are ranked on user ids and named afterwards from this
+# directory: everyone's family_members display name, else their email,
+# loaded in one query and kept for NAME_DIRECTORY_TTL seconds. Changing a
+# name, or a first score from someone the directory hasn't seen, reloads it.
+_name_directory = TTLCache(maxsize=1, ttl=float(get_setting("NAME_DIRECTORY_TTL", 600)))
+
+@timed_query
+def _load_name_directory():
+    people = {str(user_id): (email, display_name) for user_id, email, display_name in get_backend().user_directory()}
+    names = {user_id: display_name or email or user_id for user_id, (email, display_name) in people.items()}
+    return names, people
+
+def get_name_directory(refresh=False):
     """
-    Map emails to friendly display names (e.g., 'Mum', 'Jordan').
-    Replace or extend this as needed, or wire to a table later.
+    (names, people): {user id: name shown on leaderboards} and {user id:
+    (email, display name)}, with user ids as strings.
     """
-    aliases = {
-        # "someone@example.com": "Mum",
-        # "jordan.kennedy.leeds@googlemail.com": "Jordan",
-    }
-    return aliases.get(email, email)
+    directory = None if refresh else _name_directory.get(("names",))
+    if directory is None:
+        directory = _load_name_directory()
+        _name_directory.set(("names",), directory)
+    return directory
+
+def _note_player(uid):
+    """Reload the directory on its next use if uid isn't in it yet."""
+    directory = _name_directory.get(("names",))
+    if directory is not None and str(uid) not in directory[0]:
+        _name_directory.clear()
+
+def _named(df, names):
+    """df with its user_id column replaced, in place, by the player's name (the id if unknown)."""
+    ids = df["user_id"].astype(str)
+    return df.assign(user_id=ids.map(names).fillna(ids)).rename(columns={"user_id": "name"})
+
+def get_display_name():
+    """The signed-in user's display name, or None if they haven't set one."""
+    return get_name_directory()[1].get(str(current_user_id()), (None, None))[1]
+
+def set_display_name(display_name):
+    """Set the name the signed-in user is shown by on leaderboards; blank goes back to their email."""
+    display_name = (display_name or "").strip() or None
+    get_backend().set_display_name(current_user_id(), display_name)
+    _name_directory.clear()
 
 # ----------------- Pips & NYT Games -----------------
+# Every game is defined in games.py; one ranking engine turns any set of
+# games' scores into leaderboards, so adding a game adds no queries.
 
+def _check_score(definition, score):
+    """Raise ValueError if score is outside the game's registered bounds."""
+    low, high = definition["min_score"], definition["max_score"]
+    if score < low or (high is not None and score > high):
+        bounds = f"between {low} and {high}" if high is not None else f"at least {low}"
+        raise ValueError(f"{definition['name']} {definition['score_label'].lower()} must be {bounds}")
+
+@timed_query
 def log_pips_score(difficulty: str, time_seconds: int, puzzle_date):
     """
     Log or update the current user's Pips score for a given difficulty and date.
     Stores raw seconds in the database.
     """
+    definition = games.get_game("Pips")
+    if difficulty not in definition["boards"]:
+        raise ValueError(f"Unknown Pips difficulty {difficulty!r}")
+    _check_score(definition, time_seconds)
     uid = current_user_id()
-    conn = get_connection()
-    with conn.cursor() as cur:
-        cur.execute("""
-            INSERT INTO pips_scores (user_id, puzzle_date, difficulty, time_seconds)
-            VALUES (%s, %s, %s, %s)
-            ON CONFLICT (user_id, puzzle_date, difficulty) DO UPDATE
-            SET time_seconds = EXCLUDED.time_seconds
-        """, (uid, puzzle_date, difficulty, time_seconds))
-        conn.commit()
-
-
+    backend = get_backend()
+    backend.remember_user(uid, st.session_state.get("user_email"))
+    _note_player(uid)
+    if write_behind():
+        get_write_queue().enqueue(uid, "pips", {
+            "difficulty": difficulty, "time_seconds": time_seconds, "puzzle_date": puzzle_date,
+        })
+        return
+    backend.log_pips_score(uid, difficulty, time_seconds, puzzle_date)
+    _game_daily_cache.invalidate(("Pips", puzzle_date))
+    _points_cache.clear()
+
+
+@timed_query
 def log_nyt_score(game: str, score: int, puzzle_date, notes: str = None):
     """
     Log or update the current user's score for a generic NYT game
     (Wordle, Connections, Spelling Bee).
     """
+    definition = games.get_game(game)
+    if definition["table"] != "nyt_scores":
+        raise ValueError(f"{game} scores are logged with their own function")
+    _check_score(definition, score)
     uid = current_user_id()
-    conn = get_connection()
-    with conn.cursor() as cur:
-        cur.execute("""
-            INSERT INTO nyt_scores (user_id, game, puzzle_date, score, notes)
-            VALUES (%s, %s, %s, %s, %s)
-            ON CONFLICT (user_id, game, puzzle_date) DO UPDATE
-            SET score = EXCLUDED.score,
-                notes = EXCLUDED.notes
-        """, (uid, game, puzzle_date, score, notes))
-        conn.commit()
-
-
-# --- Helper to format seconds into MM:SS ---
-def format_time(seconds: int) -> str:
-    if seconds is None:
-        return ""
-    minutes, secs = divmod(int(seconds), 60)
-    return f"{minutes}:{secs:02d}"
-
-
-def get_pips_daily_leaderboard(puzzle_date):
+    backend = get_backend()
+    backend.remember_user(uid, st.session_state.get("user_email"))
+    _note_player(uid)
+    if write_behind():
+        get_write_queue().enqueue(uid, "nyt", {
+            "game": game, "score": score, "puzzle_date": puzzle_date, "notes": notes,
+        })
+        return
+    backend.log_nyt_score(uid, game, score, puzzle_date, notes)
+    _game_daily_cache.invalidate((game, puzzle_date))
+    _points_cache.clear()
+
+
+# Daily leaderboards keyed by (game, puzzle_date), each entry the game's
+# scores and its ranked boards, by user id (players are named on the way
+# out); logging a score drops the entry for that game and date only. The
+# scores are kept so queued ones can be ranked in.
+_game_daily_cache = TTLCache(
+    maxsize=256,
+    ttl=float(get_setting("LEADERBOARD_CACHE_TTL", 300)),
+)
+
+def get_daily_leaderboards(puzzle_date, names=None):
     """
-    Return daily leaderboards for easy, medium, hard, and overall.
-    Each DataFrame has columns: Name, time (MM:SS), points.
+    Daily leaderboards for the named games (default: all of them), as
+    {game: {board: DataFrame}}. Each DataFrame has columns name, the game's
+    score label (e.g. Time, Guesses) and points. Games missing from the
+    cache are read together in one query and ranked in one pass; games the
+    user has queued scores for are re-ranked with them.
     """
-    conn = get_connection()
+    names = list(names or games.available_games())
+    queued = _pending_scores(puzzle_date, names)
+    entries = {name: _game_daily_cache.get(((name, puzzle_date), "daily")) for name in names}
+    missing = [name for name, entry in entries.items() if entry is None]
+    if missing:
+        entries.update(_cache_daily_leaderboards(puzzle_date, _query_daily_leaderboards(puzzle_date, missing)))
+    return _daily_results(entries, queued, get_name_directory()[0])
+
+@timed_query
+def _query_daily_leaderboards(puzzle_date, names):
+    return _daily_entries(get_backend().game_day_scores(puzzle_date, names), names)
+
+def _daily_entries(scores, names):
+    """{game: (its scores, its boards)}, the cache entry per game."""
+    boards = _split_daily(scores, names)
+    return {name: (scores[scores["game"] == name], boards[name]) for name in names}
+
+def _split_daily(scores, names):
+    """{game: {board: DataFrame}} from the backend's scores for the named games."""
+    ranked = games.daily_points(scores)
     results = {}
+    for name in names:
+        game = games.get_game(name)
+        rows = ranked[ranked["game"] == name]
+        label = game["score_label"]
+        rows = rows.assign(**{label: game["format_score"](rows["score"]) if len(rows) else rows["score"]})
+        results[name] = {
+            board: rows.loc[rows["board"] == board, ["user_id", label, "points"]].reset_index(drop=True)
+            for board in games.all_boards(game)
+        }
+    return results
 
-    # Per-difficulty leaderboards
-    for diff in ["easy", "medium", "hard"]:
-        query = """
-        WITH ranked AS (
-            SELECT s.user_id,
-                   COALESCE(f.display_name, u.email) AS name,
-                   s.time_seconds,
-                   RANK() OVER (ORDER BY s.time_seconds ASC) AS rnk
-            FROM pips_scores s
-            JOIN auth.users u ON s.user_id = u.id
-            LEFT JOIN family_members f ON u.id = f.user_id
-            WHERE s.puzzle_date = %s AND s.difficulty = %s
-        )
-        SELECT name,
-               time_seconds,
-               CASE rnk WHEN 1 THEN 3
-                        WHEN 2 THEN 2
-                        WHEN 3 THEN 1
-                        ELSE 0 END AS points
-        FROM ranked
-        ORDER BY rnk
-        """
-        df = pd.read_sql_query(query, conn, params=(puzzle_date, diff))
-        if not df.empty:
-            df["time"] = df["time_seconds"].apply(format_time)
-            df = df[["name", "time", "points"]]
-        results[diff] = df
-
-    # Overall leaderboard (sum across difficulties)
-    query = """
-    WITH totals AS (
-        SELECT s.user_id,
-               COALESCE(f.display_name, u.email) AS name,
-               SUM(s.time_seconds) AS total_time
-        FROM pips_scores s
-        JOIN auth.users u ON s.user_id = u.id
-        LEFT JOIN family_members f ON u.id = f.user_id
-        WHERE s.puzzle_date = %s
-        GROUP BY s.user_id, name
-    ),
-    ranked AS (
-        SELECT name,
-               total_time,
-               RANK() OVER (ORDER BY total_time ASC) AS rnk
-        FROM totals
-    )
-    SELECT name,
-           total_time,
-           CASE rnk WHEN 1 THEN 3
-                    WHEN 2 THEN 2
-                    WHEN 3 THEN 1
-                    ELSE 0 END AS points
-    FROM ranked
-    ORDER BY rnk
-    """
-    df = pd.read_sql_query(query, conn, params=(puzzle_date,))
-    if not df.empty:
-        df["time"] = df["total_time"].apply(format_time)
-        df = df[["name", "time", "points"]]
-    results["overall"] = df
-
+def _cache_daily_leaderboards(puzzle_date, entries):
+    for name, entry in entries.items():
+        _game_daily_cache.set(((name, puzzle_date), "daily"), entry)
+    return entries
+
+def _pending_scores(puzzle_date, names):
+    """The user's queued scores for puzzle_date as games.SCORE_COLUMNS, the last per board."""
+    if not write_behind():
+        return frames.typed_frame(games.SCORE_COLUMNS, [], SCORE_TYPES)
+    uid = str(current_user_id())
+    rows = []
+    if "Pips" in names:
+        rows += [("Pips", p["difficulty"], p["time_seconds"])
+                 for p in _pending("pips") if p["puzzle_date"] == puzzle_date]
+    rows += [(p["game"], "daily", p["score"])
+             for p in _pending("nyt") if p["puzzle_date"] == puzzle_date and p["game"] in names]
+    # The last score per board wins, as it does in the database.
+    rows = {(game, board): (game, board, puzzle_date, uid, score) for game, board, score in rows}
+    return frames.typed_frame(games.SCORE_COLUMNS, list(rows.values()), SCORE_TYPES)
+
+def _with_queued_scores(scores, queued):
+    """A game's scores with the user's queued ones replacing theirs on the same boards."""
+    keep = ~((scores["user_id"] == queued["user_id"].iloc[0]) & scores["board"].isin(queued["board"]))
+    return frames.concat([scores[keep], queued])
+
+def _daily_results(entries, queued, names):
+    """
+    {game: {board: DataFrame}} from the cache entries, re-ranked where the
+    user has queued scores, with players named from the directory names.
+    """
+    results = {}
+    for game, (scores, boards) in entries.items():
+        mine = queued[queued["game"] == game]
+        if not mine.empty:
+            boards = _split_daily(_with_queued_scores(scores, mine), [game])[game]
+        results[game] = {board: _named(df, names) for board, df in boards.items()}
     return results
 
+@timed_query
+def rebuild_game_points():
+    """
+    Backfill game_daily_points from every game's scores.
+    Returns the number of rows written.
+    """
+    rows = get_backend().rebuild_game_points()
+    _game_daily_cache.clear()
+    _points_cache.clear()
+    return rows
+
+# Points leaderboards keyed by (period, its first day), so a new week or
+# month starts a new entry; any score logged drops them all.
+_points_cache = TTLCache(
+    maxsize=16,
+    ttl=float(get_setting("LEADERBOARD_CACHE_TTL", 300)),
+)
+
+def _points_key(period):
+    today = datetime.date.today()
+    return (period, period_bounds(period, today)[0] if period != "all" else None), today
+
+def get_points_leaderboards(period="weekly"):
+    """
+    This week's, this month's, or all-time points per player for every
+    game, from the precomputed points tables in one query, as {game:
+    DataFrame of name, period, total_points}. Games without points yet map
+    to an empty DataFrame.
+    """
+    key, today = _points_key(period)
+    df = _points_cache.get(key)
+    if df is None:
+        generation = _points_cache.generation(period)
+        df = _query_points_leaderboards(period, today)
+        _points_cache.set(key, df, generation)
+    return _split_points(df, get_name_directory()[0])
+
+@timed_query
+def _query_points_leaderboards(period, today):
+    return get_backend().game_points_leaderboard(period, today)
+
+def _split_points(df, names):
+    columns = ["user_id", "period", "total_points"]
+    return {
+        game: _named(df.loc[df["game"] == game, columns].reset_index(drop=True), names)
+        for game in games.available_games()
+    }
 
-def get_pips_points_leaderboard(period="weekly"):
+# ----------------- Concurrent reads -----------------
+# Async twins of the reads pages make on load, for fetch_concurrently. They
+# run on event_loop's shared loop (through psycopg's AsyncConnection on
+# Postgres) and share the read caches with their sync twins, so a page can
+# fetch everything at once and then call the sync functions as cache hits.
+#
+# Session state only exists on the script thread, so the user and the
+# backend are resolved when a twin is called and the coroutine it returns
+# only does the I/O.
+
+def fetch_concurrently(*coros):
     """
-    Aggregate daily points into weekly, monthly, or all-time leaderboards.
-    Includes easy, medium, hard, and overall points.
-    Returns columns: Name, period, total_points.
+    Await the given *_async reads together and return their results in
+    order, so the page waits for the slowest query instead of all of them
+    in turn. Call from a page script, e.g.
+
+        exercises, latest = fetch_concurrently(get_exercises_async(), get_latest_workouts_async())
     """
-    conn = get_connection()
+    return event_loop.run(_gather(coros))
 
-    if period == "weekly":
-        group_expr = "DATE_TRUNC('week', puzzle_date)"
-    elif period == "monthly":
-        group_expr = "DATE_TRUNC('month', puzzle_date)"
-    elif period == "all":
-        group_expr = "'all-time'"
-    else:
-        raise ValueError("Invalid period")
-
-    query = f"""
-    -- Per-difficulty points
-    WITH ranked AS (
-        SELECT s.user_id,
-               COALESCE(f.display_name, u.email) AS name,
-               s.puzzle_date,
-               s.difficulty,
-               RANK() OVER (
-                   PARTITION BY s.difficulty, s.puzzle_date
-                   ORDER BY s.time_seconds ASC
-               ) AS rnk
-        FROM pips_scores s
-        JOIN auth.users u ON s.user_id = u.id
-        LEFT JOIN family_members f ON u.id = f.user_id
-    ),
-    diff_points AS (
-        SELECT name,
-               puzzle_date,
-               difficulty,
-               CASE rnk WHEN 1 THEN 3
-                        WHEN 2 THEN 2
-                        WHEN 3 THEN 1
-                        ELSE 0 END AS points
-        FROM ranked
-    ),
-    -- Overall points (sum across difficulties per day)
-    overall AS (
-        SELECT s.user_id,
-               COALESCE(f.display_name, u.email) AS name,
-               s.puzzle_date,
-               SUM(s.time_seconds) AS total_time,
-               RANK() OVER (
-                   PARTITION BY s.puzzle_date
-                   ORDER BY SUM(s.time_seconds) ASC
-               ) AS rnk
-        FROM pips_scores s
-        JOIN auth.users u ON s.user_id = u.id
-        LEFT JOIN family_members f ON u.id = f.user_id
-        GROUP BY s.user_id, name, s.puzzle_date
-    ),
-    overall_points AS (
-        SELECT name,
-               puzzle_date,
-               'overall' AS difficulty,
-               CASE rnk WHEN 1 THEN 3
-                        WHEN 2 THEN 2
-                        WHEN 3 THEN 1
-                        ELSE 0 END AS points
-        FROM overall
-    ),
-    all_points AS (
-        SELECT * FROM diff_points
-        UNION ALL
-        SELECT * FROM overall_points
-    )
-    SELECT name,
-           {group_expr} AS period,
-           SUM(points) AS total_points
-    FROM all_points
-    GROUP BY name, period
-    ORDER BY total_points DESC
-    """
-    return pd.read_sql_query(query, conn)
\ No newline at end of file
+async def _gather(coros):
+    return await asyncio.gather(*coros)
+
+def cached_per_user_async(func):
+    """
+    @cached_per_user for a coroutine function taking (backend, user_id,
+    ...). Entries are shared with the sync twin, whose name is func's
+    without the "_async" suffix, when both are called with the same arguments.
+    """
+    name = func.__name__.removesuffix("_async")
+    timed = timed_query(func)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        uid = current_user_id()
+        key = (uid, name, args, tuple(sorted(kwargs.items())))
+        return _cached_call(key, timed, (get_backend(), uid, *args), kwargs)
+    return wrapper
+
+async def _cached_call(key, func, args, kwargs):
+    value = _history_cache.get(key, _MISSING)
+    if value is _MISSING:
+        generation = _history_cache.generation(key[0])
+        value = await func(*args, **kwargs)
+        _history_cache.set(key, value, generation)
+    return _copy_result(value)
+
+@cached_per_user_async
+async def get_exercises_async(backend, uid):
+    return await backend.get_exercises_async(uid)
+
+@with_pending("workouts", _merge_all_progress)
+@cached_per_user_async
+async def _get_all_progress_async(backend, uid):
+    rows = await backend.get_all_progress_async(uid)
+    return {name: (prev, rule, suggestion)
+            for name, prev, rule, suggestion in map(progress_from_row, rows)}
+
+def get_latest_workouts_async():
+    """Async twin of get_latest_workouts; also warms the cache for suggest_all."""
+    return _latest_workouts(_get_all_progress_async())
+
+async def _latest_workouts(progress):
+    return {name: prev for name, (prev, _, _) in (await progress).items()}
+
+@with_pending("workouts", _merge_workouts)
+@cached_per_user_async
+async def get_workouts_async(backend, uid, exercise_name=None, start_date=None, end_date=None,
+                             limit=None, cursor=None):
+    df = await backend.query_workouts_async(uid, exercise_name, start_date, end_date, limit, cursor)
+    return df.drop(columns="id")
+
+def get_daily_leaderboards_async(puzzle_date, names=None):
+    names = list(names or games.available_games())
+    return _daily_leaderboards(get_backend(), puzzle_date, names, _pending_scores(puzzle_date, names),
+                               get_name_directory()[0])
+
+async def _daily_leaderboards(backend, puzzle_date, names, queued, directory):
+    entries = {name: _game_daily_cache.get(((name, puzzle_date), "daily")) for name in names}
+    missing = [name for name, entry in entries.items() if entry is None]
+    if missing:
+        fetched = await _query_daily_leaderboards_async(backend, puzzle_date, missing)
+        entries.update(_cache_daily_leaderboards(puzzle_date, fetched))
+    return _daily_results(entries, queued, directory)
+
+@timed_query
+async def _query_daily_leaderboards_async(backend, puzzle_date, names):
+    return _daily_entries(await backend.game_day_scores_async(puzzle_date, names), names)
+
+def get_points_leaderboards_async(period="weekly"):
+    return _points_leaderboards(get_backend(), period, get_name_directory()[0])
+
+async def _points_leaderboards(backend, period, names):
+    key, today = _points_key(period)
+    df = _points_cache.get(key)
+    if df is None:
+        generation = _points_cache.generation(period)
+        df = await _query_points_leaderboards_async(backend, period, today)
+        _points_cache.set(key, df, generation)
+    return _split_points(df, names)
+
+@timed_query
+async def _query_points_leaderboards_async(backend, period, today):
+    return await backend.game_points_leaderboard_async(period, today)
@@ -0,0 +1,37 @@
+"""
+One asyncio event loop per process, running on a daemon thread.
+
+Streamlit runs every page script synchronously on its own thread, so a
+script can't await anything itself. run() hands a coroutine to the shared
+loop and blocks the script thread until it finishes. Async resources that
+belong to a loop, like psycopg's AsyncConnectionPool, are created on this
+one and live as long as the process.
+"""
+import asyncio
+import threading
+
+_loop = None
+_lock = threading.Lock()
+
+
+def get_loop():
+    """The shared loop, started on first use."""
+    global _loop
+    with _lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="db-event-loop", daemon=True).start()
+    return _loop
+
+
+def run(coro):
+    """Run coro on the shared loop and return its result, or raise its exception."""
+    loop = get_loop()
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is loop:
+        coro.close()
+        raise RuntimeError("event_loop.run() called from the shared loop itself; await instead")
+    return asyncio.run_coroutine_threadsafe(coro, loop).result()
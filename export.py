@@ -0,0 +1,118 @@
+"""
+Stream a user's full history out of the database as CSV or Parquet.
+
+Each dataset is read from the storage backend in fixed-size chunks (a
+named server-side cursor on Postgres) and written incrementally, so
+memory use does not depend on how much history the user has.
+"""
+import csv
+import io
+import os
+import tempfile
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from storage import get_backend
+
+CHUNK_SIZE = 5000
+FORMATS = ["csv", "parquet"]
+
+# dataset -> Arrow schema of the columns each backend's export query selects
+DATASETS = {
+    "workouts": pa.schema([
+        ("workout_date", pa.date32()),
+        ("exercise", pa.string()),
+        ("weight", pa.float64()),
+        ("sets", pa.int32()),
+        ("target_reps", pa.int32()),
+        ("achieved_reps", pa.int32()),
+        ("success", pa.bool_()),
+        ("scheme", pa.string()),
+    ]),
+    "cardio": pa.schema([
+        ("workout_date", pa.date32()),
+        ("workout_type", pa.string()),
+        ("time_minutes", pa.float64()),
+        ("distance_km", pa.float64()),
+        ("difficulty_level", pa.string()),
+    ]),
+    "pips": pa.schema([
+        ("puzzle_date", pa.date32()),
+        ("difficulty", pa.string()),
+        ("time_seconds", pa.int32()),
+    ]),
+    "nyt": pa.schema([
+        ("puzzle_date", pa.date32()),
+        ("game", pa.string()),
+        ("score", pa.int32()),
+        ("notes", pa.string()),
+    ]),
+}
+
+
+def iter_chunks(dataset, user_id, chunk_size=CHUNK_SIZE):
+    """Yield lists of at most chunk_size row tuples for one dataset."""
+    yield from get_backend().iter_export(dataset, user_id, chunk_size)
+
+
+def write_csv(dataset, user_id, out, chunk_size=CHUNK_SIZE):
+    """Write one dataset as CSV to a text file object. Returns the row count."""
+    schema = DATASETS[dataset]
+    writer = csv.writer(out)
+    writer.writerow(schema.names)
+    total = 0
+    for rows in iter_chunks(dataset, user_id, chunk_size):
+        writer.writerows(rows)
+        total += len(rows)
+    return total
+
+
+def write_parquet(dataset, user_id, out, chunk_size=CHUNK_SIZE):
+    """Write one dataset as Parquet, one row group per chunk. Returns the row count."""
+    schema = DATASETS[dataset]
+    total = 0
+    with pq.ParquetWriter(out, schema) as writer:
+        for rows in iter_chunks(dataset, user_id, chunk_size):
+            columns = zip(*rows)
+            writer.write_batch(pa.record_batch(
+                [pa.array(col, type=field.type) for col, field in zip(columns, schema)],
+                schema=schema,
+            ))
+            total += len(rows)
+    return total
+
+
+def export_file(dataset, user_id, fmt):
+    """
+    Export one dataset into an anonymous temporary file and return it,
+    rewound and ready to read. Used by the download page.
+    """
+    out = tempfile.TemporaryFile()
+    if fmt == "csv":
+        text = io.TextIOWrapper(out, encoding="utf-8", newline="")
+        write_csv(dataset, user_id, text)
+        text.flush()
+        text.detach()
+    elif fmt == "parquet":
+        write_parquet(dataset, user_id, out)
+    else:
+        raise ValueError(f"Unknown export format: {fmt}")
+    out.seek(0)
+    return out
+
+
+def export_all(user_id, fmt, directory):
+    """Write every dataset for the user into directory. Returns {path: rows}."""
+    os.makedirs(directory, exist_ok=True)
+    written = {}
+    for dataset in DATASETS:
+        path = os.path.join(directory, f"{dataset}.{fmt}")
+        if fmt == "csv":
+            with open(path, "w", encoding="utf-8", newline="") as out:
+                written[path] = write_csv(dataset, user_id, out)
+        elif fmt == "parquet":
+            written[path] = write_parquet(dataset, user_id, path)
+        else:
+            raise ValueError(f"Unknown export format: {fmt}")
+    return written
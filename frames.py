@@ -0,0 +1,54 @@
+"""
+Compact, typed DataFrames built straight from cursor rows.
+
+pd.read_sql_query leaves dates, names and schemes as object columns: a
+boxed Python object per cell, which st.dataframe has to re-inspect every
+time it serializes the frame for the browser. typed_frame() instead
+decodes each column once into a declared type: repeated text (exercise,
+workout type, scheme, game, board) as a categorical, everything else as
+a pyarrow array (float32 weights, date32 dates, small integers), so a
+cached history costs a few bytes a cell and goes to Arrow without any
+inference.
+
+Column types are declared next to the SELECTs they describe, in
+storage/base.py, as pandas dtype strings: "category" or any
+"<arrow type>[pyarrow]". Columns without a declared type are left to
+pandas.
+"""
+import pandas as pd
+import pyarrow as pa
+
+
+def typed_column(values, dtype):
+    """A list of Python values as an array of dtype (None: left as is, for pandas to infer)."""
+    if dtype is None:
+        return values
+    dtype = pd.api.types.pandas_dtype(dtype)
+    if isinstance(dtype, pd.CategoricalDtype):
+        return pd.Categorical(values)
+    if isinstance(dtype, pd.StringDtype):
+        # Ids may arrive as UUIDs or ints depending on the backend.
+        return pd.array([v if v is None or isinstance(v, str) else str(v) for v in values], dtype=dtype)
+    return pd.arrays.ArrowExtensionArray(pa.array(values, type=dtype.pyarrow_dtype, from_pandas=True))
+
+
+def typed_frame(columns, rows, dtypes):
+    """A DataFrame of rows (tuples in columns order), column c decoded as dtypes.get(c)."""
+    values = zip(*rows) if rows else [()] * len(columns)
+    return pd.DataFrame({c: typed_column(list(v), dtypes.get(c)) for c, v in zip(columns, values)},
+                        columns=columns)
+
+
+def dtypes_of(df):
+    """df's column types in the form typed_frame takes, so new rows can be decoded to match."""
+    return {c: "category" if isinstance(t, pd.CategoricalDtype) else t
+            for c, t in df.dtypes.items() if isinstance(t, (pd.CategoricalDtype, pd.StringDtype, pd.ArrowDtype))}
+
+
+def concat(frames):
+    """pd.concat that keeps categorical columns categorical when the frames' categories differ."""
+    merged = pd.concat(frames, ignore_index=True)
+    for column, dtype in frames[0].dtypes.items():
+        if isinstance(dtype, pd.CategoricalDtype) and not isinstance(merged[column].dtype, pd.CategoricalDtype):
+            merged[column] = merged[column].astype("category")
+    return merged
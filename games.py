@@ -0,0 +1,149 @@
+"""
+Game definitions and the ranking engine behind every leaderboard.
+
+A game is registered once with register_game(): which way its scores run,
+how ties are ranked, and the points the top places earn. Games may split
+a day into several boards (Pips has easy, medium and hard) and add a
+total board ranked on each player's summed score. Pips keeps its own
+pips_scores table; every other game's scores live in nyt_scores.
+
+daily_points ranks any mix of games, boards and days in one vectorised
+pass, so the number of games doesn't change how many times the scores
+are read or ranked.
+"""
+import numpy as np
+import pandas as pd
+
+# pandas rank methods by tie rule: "shared" gives tied players the same
+# place and skips the next (1, 1, 3); "dense" doesn't skip (1, 1, 2).
+TIE_RULES = {"shared": "min", "dense": "dense"}
+
+DEFAULT_POINTS = (3, 2, 1)
+
+SCORE_COLUMNS = ["game", "board", "puzzle_date", "user_id", "score"]
+
+_GAMES = {}
+
+
+def register_game(name, *, lower_is_better, score_label, min_score=0, max_score=None,
+                  boards=("daily",), total_board=None, ties="shared", points=DEFAULT_POINTS,
+                  table="nyt_scores", format_score=None, help=None):
+    """
+    Add a game to the registry. name is what nyt_scores.game stores and
+    the pages show; format_score turns a column of scores into display text.
+    """
+    if ties not in TIE_RULES:
+        raise ValueError(f"Unknown tie rule {ties!r}; expected one of {list(TIE_RULES)}")
+    _GAMES[name] = {
+        "name": name,
+        "lower_is_better": lower_is_better,
+        "score_label": score_label,
+        "min_score": min_score,
+        "max_score": max_score,
+        "boards": tuple(boards),
+        "total_board": total_board,
+        "ties": ties,
+        "points": tuple(points),
+        "table": table,
+        "format_score": format_score or (lambda scores: scores.astype("int64").astype(str)),
+        "help": help,
+    }
+    return _GAMES[name]
+
+
+def get_game(name):
+    try:
+        return _GAMES[name]
+    except KeyError:
+        raise ValueError(f"Unknown game: {name}") from None
+
+
+def available_games():
+    """Game names in registration order."""
+    return list(_GAMES)
+
+
+def all_boards(game):
+    """The game's boards in display order, its total board last."""
+    game = get_game(game) if isinstance(game, str) else game
+    return list(game["boards"]) + ([game["total_board"]] if game["total_board"] else [])
+
+
+def format_times(seconds):
+    """Seconds as M:SS, for a whole column."""
+    seconds = seconds.astype("int64")
+    return (seconds // 60).astype(str) + ":" + (seconds % 60).astype(str).str.zfill(2)
+
+
+# --- Games ---
+register_game(
+    "Pips", lower_is_better=True, score_label="Time", min_score=1,
+    boards=("easy", "medium", "hard"), total_board="overall",
+    table="pips_scores", format_score=format_times,
+)
+register_game(
+    "Wordle", lower_is_better=True, score_label="Guesses", min_score=1, max_score=7,
+    ties="dense", help="Guesses used; 7 if you didn't solve it.",
+)
+register_game(
+    "Connections", lower_is_better=True, score_label="Mistakes", min_score=0, max_score=4,
+    ties="dense", help="Mistakes made; 4 means the puzzle beat you.",
+)
+register_game(
+    "Spelling Bee", lower_is_better=False, score_label="Points", min_score=0,
+)
+
+
+# --- Ranking ---
+def with_totals(scores):
+    """scores plus a total-board row per player per day for every game that has one."""
+    totals = []
+    for name in scores["game"].unique():
+        total_board = get_game(name)["total_board"]
+        if not total_board:
+            continue
+        game_scores = scores[scores["game"] == name]
+        keys = [c for c in game_scores.columns if c not in ("board", "score")]
+        total = game_scores.groupby(keys, sort=False, dropna=False)["score"].sum().reset_index()
+        totals.append(total.assign(board=total_board))
+    if not totals:
+        return scores
+    return pd.concat([scores, *totals], ignore_index=True)
+
+
+def daily_points(scores):
+    """
+    Rank every (game, board, puzzle_date) in scores at once and award
+    points. scores has SCORE_COLUMNS (extra columns, e.g. name, are kept);
+    total boards are added first. Returns the rows with rank and points,
+    sorted by game, day, board and rank.
+    """
+    if scores.empty:
+        return scores.assign(rank=pd.Series(dtype="int64"), points=pd.Series(dtype="int64"))
+    scores = with_totals(scores)
+    names = scores["game"].unique()
+    definitions = [get_game(name) for name in names]
+    code = pd.Categorical(scores["game"], categories=names).codes
+
+    # Negate higher-is-better scores so every game ranks ascending.
+    direction = np.array([1.0 if g["lower_is_better"] else -1.0 for g in definitions])
+    signed = scores["score"].to_numpy(dtype="float64") * direction[code]
+    groups = [scores["game"], scores["board"], scores["puzzle_date"]]
+    methods = [TIE_RULES[g["ties"]] for g in definitions]
+    method = np.array(methods)[code]
+    rank = np.zeros(len(scores), dtype="int64")
+    for rule in set(methods):
+        rows = method == rule
+        ranked = pd.Series(signed[rows]).groupby([g[rows].to_numpy() for g in groups]).rank(method=rule)
+        rank[rows] = ranked.to_numpy(dtype="int64")
+
+    # One row of points per game, padded with zeros past its last paid place.
+    places = max(len(g["points"]) for g in definitions)
+    table = np.zeros((len(definitions), places + 1), dtype="int64")
+    for i, g in enumerate(definitions):
+        table[i, :len(g["points"])] = g["points"]
+    points = table[code, np.minimum(rank - 1, places)]
+
+    ranked = scores.assign(rank=rank, points=points)
+    return ranked.sort_values(["game", "puzzle_date", "board", "rank"], ignore_index=True)
+
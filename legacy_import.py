@@ -0,0 +1,94 @@
+"""
+Import the legacy SQLite schema (lifting.db, see setup_db.py / rest_db.py)
+into the exercises/workouts tables of the configured backend for one user.
+
+Entries are streamed out of SQLite in EntryID order, one chunk at a time,
+and each chunk is loaded (with COPY on Postgres) in the same transaction
+that advances the user's checkpoint, so an interrupted import resumes
+where it stopped and never loads a row twice.
+"""
+import os
+import sqlite3
+
+import db
+from storage import get_backend
+
+DEFAULT_SOURCE = "lifting.db"
+DEFAULT_CHUNK_SIZE = 5000
+
+# Legacy entries have no separate target/achieved reps, and only some
+# legacy files have a Result column (setup_db.py's and rest_db.py's don't);
+# an entry without one is treated as a completed (successful) set. {result}
+# is e.Result where the column exists, else NULL.
+_ENTRIES_SQL = """
+    SELECT e.EntryID, w.WorkoutDate, x.Name, e.Sets, e.Reps, e.Weight, {result}
+    FROM WorkoutEntries e
+    JOIN Workouts w ON e.WorkoutID = w.WorkoutID
+    JOIN Exercises x ON e.ExerciseID = x.ExerciseID
+    WHERE e.EntryID > ?
+    ORDER BY e.EntryID
+    LIMIT ?
+"""
+
+
+def _open_source(path):
+    # Read-only, so the import can never modify the legacy file.
+    return sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+
+
+def _has_column(src, table, column):
+    return any(row[1].lower() == column.lower() for row in src.execute(f"PRAGMA table_info({table})"))
+
+
+def import_legacy(user_id, source=DEFAULT_SOURCE, chunk_size=DEFAULT_CHUNK_SIZE, log=print):
+    """
+    Import every legacy WorkoutEntries row after the user's checkpoint.
+    Entries without a date, sets or reps can't become workouts; they are
+    skipped and counted. Returns the number of workouts loaded by this run.
+    """
+    backend = get_backend()
+    # The checkpoint is keyed by the file, however its path was spelled.
+    path = os.path.realpath(source)
+    src = _open_source(path)
+    try:
+        names = [name for (name,) in src.execute("SELECT Name FROM Exercises ORDER BY ExerciseID")]
+        exercise_ids = backend.ensure_exercises(user_id, names)
+        # Checkpoints saved before paths were resolved are keyed as given.
+        last_id = backend.legacy_checkpoint(user_id, path) or backend.legacy_checkpoint(user_id, source)
+        if last_id:
+            log(f"Resuming after entry {last_id}")
+
+        entries_sql = _ENTRIES_SQL.format(
+            result="e.Result" if _has_column(src, "WorkoutEntries", "Result") else "NULL")
+
+        total = skipped = 0
+        while True:
+            chunk = src.execute(entries_sql, (last_id, chunk_size)).fetchall()
+            if not chunk:
+                break
+
+            # created_at = the legacy date, so imported rows never outrank
+            # workouts logged in the app.
+            rows = [
+                (user_id, exercise_ids[name], workout_date, weight, sets,
+                 reps, reps, result != "Fail", f"{sets} x {reps}", workout_date)
+                for entry_id, workout_date, name, sets, reps, weight, result in chunk
+                if workout_date is not None and sets is not None and reps is not None
+            ]
+            # The checkpoint moves past skipped entries too.
+            last_id = chunk[-1][0]
+            backend.load_legacy_chunk(user_id, path, rows, last_id)
+
+            total += len(rows)
+            skipped += len(chunk) - len(rows)
+            log(f"Imported {total} entries (through entry {last_id})")
+    finally:
+        src.close()
+    if skipped:
+        log(f"Skipped {skipped} entries without a date, sets or reps")
+
+    # Imported rows can change which workout is the latest per exercise,
+    # and can hold records of their own.
+    db.recompute_progression(user_id)
+    db.rebuild_personal_records(user_id)
+    return total
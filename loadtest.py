@@ -0,0 +1,222 @@
+"""
+Drive the real pages with N concurrent signed-in sessions and report how
+one process copes as N grows.
+
+Every simulated session is a seeded user (see seed.py) signed in through
+st.session_state, running page scripts headlessly with Streamlit's
+AppTest, each on its own thread as the server would. Point the configured
+backend at a throwaway database (it is migrated, and seeded if it has no
+users yet) and run, e.g.:
+
+    DATABASE_URL=postgresql://localhost/lifting_load python loadtest.py \\
+        --sessions 1 --sessions 5 --sessions 20 --sessions 50 --runs 10
+
+At each concurrency level the pages are loaded one at a time by all the
+sessions at once, --runs times per session after a warm-up run. For every
+page it reports p50/p99 script run time, DB time per run (the time the
+page's @timed_query calls took, from metrics.py, averaged over the runs)
+and the share of runs that raised, plus the level's throughput. Where
+throughput stops growing while p99 keeps climbing, the process is
+saturated. Results are also written as JSON.
+"""
+import argparse
+import datetime
+import json
+import logging
+import pathlib
+import time
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from streamlit.runtime import Runtime
+from streamlit.testing.v1 import AppTest
+from streamlit.testing.v1.util import patch_config_options
+
+import db
+import metrics
+import seed
+from storage import get_backend
+
+ROOT = pathlib.Path(__file__).parent
+
+DEFAULT_SESSIONS = [1, 5, 10, 20, 50]
+
+# Pages a signed-in user loads, with the widget choice (if any) that makes
+# the page fetch something; it is made once, on the warm-up run.
+PAGES = {
+    "app.py": None,
+    "pages/1_Log_Workout.py": None,
+    "pages/2_Workout_History.py": lambda at: at.radio[0].set_value("Strength"),
+    "pages/3_Cardio_Log.py": None,
+    "pages/5_Leaderboards.py": None,
+    "pages/6_Log_NYT_Scores.py": None,
+    "pages/9_Training_Analytics.py": None,
+    "pages/10_Profile.py": None,
+}
+
+
+@contextmanager
+def concurrent_app_tests():
+    """
+    Let AppTests run on several threads at once. Every AppTest run installs
+    a mock Runtime and patches config.get_option, and undoes both when it
+    ends, under any other run still going. Here the patch is held for the
+    whole load test, and a run that finds the Runtime gone gets the most
+    recent one instead of failing.
+    """
+    original = Runtime.__dict__["instance"]
+    latest = []
+
+    def instance(cls):
+        if cls._instance is not None:
+            latest[:] = [cls._instance]
+            return cls._instance
+        if latest:
+            return latest[0]
+        return original.__func__(cls)
+
+    Runtime.instance = classmethod(instance)
+    try:
+        with patch_config_options({"global.appTest": True}):
+            yield
+    finally:
+        Runtime.instance = original
+
+
+def _session(page, user, timeout):
+    """An AppTest of page signed in as seeded user number user."""
+    at = AppTest.from_file(str(ROOT / page), default_timeout=timeout)
+    at.session_state["user_id"] = seed.seed_user_id(user)
+    at.session_state["user_email"] = f"user{user}@example.com"
+    # No refresh token, so auth never calls Supabase.
+    at.session_state["refresh_token"] = None
+    return at
+
+
+def _run(at):
+    """(ms, error) for one script run; error is None unless it timed out or raised."""
+    start = time.perf_counter()
+    try:
+        at.run()
+        error = at.exception[0].message if at.exception else None
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    return (time.perf_counter() - start) * 1000, error
+
+
+def _warm_up(at, setup):
+    _run(at)
+    if setup:
+        setup(at)
+        _run(at)
+
+
+def _timed_runs(at, runs, cold):
+    samples = []
+    for _ in range(runs):
+        if cold:
+            db._history_cache.clear()
+            db._game_daily_cache.clear()
+            db._points_cache.clear()
+            db._name_directory.clear()
+        samples.append(_run(at))
+    return samples
+
+
+def _percentile(ordered, q):
+    return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
+
+
+def run_page(page, users, runs, timeout, cold):
+    """Load page from len(users) sessions at once; returns its summary."""
+    sessions = [_session(page, user, timeout) for user in users]
+    with ThreadPoolExecutor(max_workers=len(sessions)) as pool:
+        list(pool.map(lambda at: _warm_up(at, PAGES.get(page)), sessions))
+        metrics.reset()
+        start = time.perf_counter()
+        samples = [s for per_session in pool.map(lambda at: _timed_runs(at, runs, cold), sessions)
+                   for s in per_session]
+        wall = time.perf_counter() - start
+    db_ms = sum(q["mean_ms"] * q["calls"] for q in metrics.snapshot())
+    ordered = sorted(ms for ms, _ in samples)
+    errors = [error for _, error in samples if error]
+    return {
+        "runs": len(samples),
+        "errors": len(errors),
+        "error_rate": round(len(errors) / len(samples), 4),
+        "first_error": errors[0] if errors else None,
+        "p50_ms": round(_percentile(ordered, 50), 1),
+        "p99_ms": round(_percentile(ordered, 99), 1),
+        "max_ms": round(ordered[-1], 1),
+        "db_ms_per_run": round(db_ms / len(samples), 1),
+        "wall_s": round(wall, 3),
+    }
+
+
+def run_level(sessions, pages, user_count, runs, timeout, cold, log=print):
+    users = [i % user_count + 1 for i in range(sessions)]
+    log(f"{sessions} concurrent session(s)")
+    results = {}
+    for page in pages:
+        results[page] = stats = run_page(page, users, runs, timeout, cold)
+        log(f"  {page:<32} p50 {stats['p50_ms']:8.1f} ms  p99 {stats['p99_ms']:8.1f} ms  "
+            f"db {stats['db_ms_per_run']:7.1f} ms/run  errors {stats['error_rate']:6.1%}")
+        if stats["first_error"]:
+            log(f"    first error: {stats['first_error'][:200]}")
+    total_runs = sum(s["runs"] for s in results.values())
+    throughput = total_runs / sum(s["wall_s"] for s in results.values())
+    log(f"  {total_runs} runs, {throughput:.1f} runs/s")
+    return {"pages": results, "runs_per_s": round(throughput, 2)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sessions", type=int, action="append",
+                        help=f"concurrent sessions; repeatable (default: {DEFAULT_SESSIONS})")
+    parser.add_argument("--page", action="append", choices=list(PAGES),
+                        help="page to load; repeatable (default: all of them)")
+    parser.add_argument("--runs", type=int, default=5, help="timed runs per session per page")
+    parser.add_argument("--timeout", type=float, default=60, help="seconds before a run counts as failed")
+    parser.add_argument("--cold", action="store_true",
+                        help="clear the read caches before every run, so every run reads the database")
+    parser.add_argument("--users", type=int, default=200, help="users to seed into an empty database")
+    parser.add_argument("--workouts", type=int, default=200_000, help="workouts to seed")
+    parser.add_argument("--out", default="loadtest.json", help="where to write the results")
+    args = parser.parse_args()
+
+    # pandas warns on every read_sql_query with a psycopg connection.
+    warnings.filterwarnings("ignore", message="pandas only supports SQLAlchemy")
+    # Slow queries are expected at the top levels; the summary reports them.
+    logging.getLogger("db.slow_queries").setLevel(logging.ERROR)
+    backend = get_backend()
+    db.migrate(log=lambda msg: None)
+    user_count = len(backend.user_directory())
+    if not user_count:
+        seed.seed(users=args.users, workouts=args.workouts, cardio=args.workouts // 4)
+        user_count = args.users
+
+    results = {
+        "meta": {
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+            "backend": backend.name,
+            "database": backend.version(),
+            "users": user_count,
+            "runs": args.runs,
+            "cold": args.cold,
+        },
+        "levels": {},
+    }
+    with concurrent_app_tests():
+        for sessions in args.sessions or DEFAULT_SESSIONS:
+            # JSON object keys are strings, so store levels that way throughout.
+            results["levels"][str(sessions)] = run_level(sessions, args.page or list(PAGES), user_count,
+                                                         args.runs, args.timeout, args.cold)
+
+    with open(args.out, "w") as out:
+        json.dump(results, out, indent=2)
+    print(f"Wrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
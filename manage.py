@@ -0,0 +1,127 @@
+"""
+Maintenance commands for the data layer (whichever STORAGE_BACKEND is configured).
+
+Run from the repo root so the Streamlit secrets are picked up, e.g.:
+
+    python manage.py migrate
+    python manage.py seed --users 100 --workouts 100000
+    python manage.py rebuild-game-points
+    python manage.py import-legacy --user-id <uuid> [--source lifting.db]
+    python manage.py export --user-id <uuid> --format parquet --out exports/
+    python manage.py recompute-progression [--user-id <uuid>] [--rule rep_cycle]
+    python manage.py rebuild-records [--user-id <uuid>]
+    python manage.py write-queue [--drain] [--retry-failed] [--prune-days 30]
+"""
+import argparse
+
+import db
+import export
+import legacy_import
+import progression
+import seed
+
+
+def run_migrations(args):
+    applied = db.migrate()
+    print(f"✅ Applied {len(applied)} migration(s)")
+
+
+def seed_database(args):
+    seed.seed(users=args.users, workouts=args.workouts, cardio=args.cardio)
+    print("✅ Seeded synthetic data")
+
+
+def rebuild_game_points(args):
+    rows = db.rebuild_game_points()
+    print(f"✅ Rebuilt game_daily_points: {rows} rows")
+
+
+def import_legacy(args):
+    rows = legacy_import.import_legacy(args.user_id, source=args.source, chunk_size=args.chunk_size)
+    print(f"✅ Imported {rows} legacy workouts from {args.source}")
+
+
+def export_history(args):
+    for path, rows in export.export_all(args.user_id, args.format, args.out).items():
+        print(f"✅ {path}: {rows} rows")
+
+
+def recompute_progression(args):
+    rows = db.recompute_progression(args.user_id, rule=args.rule)
+    print(f"✅ Recomputed exercise_progress: {rows} rows")
+
+
+def rebuild_records(args):
+    rows = db.rebuild_personal_records(args.user_id)
+    print(f"✅ Rebuilt personal records: {rows} rows")
+
+
+def write_queue(args):
+    queue = db.get_write_queue()
+    if args.retry_failed:
+        print(f"↩️ Requeued {queue.retry_failed()} failed write(s)")
+    if args.drain:
+        print("✅ Drained" if queue.drain(timeout=args.timeout) else "⏳ Writes still pending after the timeout")
+    if args.prune_days is not None:
+        rows = db.get_backend().prune_applied_writes(args.prune_days)
+        print(f"✅ Pruned {rows} idempotency key(s) older than {args.prune_days} days")
+    print(f"Queue: {queue.stats() or 'empty'}")
+    for key, user_id, op, error in queue.failed():
+        print(f"  failed {op} {key} for {user_id}: {error}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    cmd = commands.add_parser("migrate", help="Apply any pending schema migrations")
+    cmd.set_defaults(func=run_migrations)
+
+    cmd = commands.add_parser("seed", help="Fill a throwaway database with synthetic users and history")
+    cmd.add_argument("--users", type=int, default=100)
+    cmd.add_argument("--workouts", type=int, default=100_000)
+    cmd.add_argument("--cardio", type=int, default=20_000)
+    cmd.set_defaults(func=seed_database)
+
+    cmd = commands.add_parser("rebuild-game-points",
+                              help="Backfill the game points table from all scores")
+    cmd.set_defaults(func=rebuild_game_points)
+
+    cmd = commands.add_parser("import-legacy",
+                              help="Stream the legacy SQLite workouts into Postgres for one user")
+    cmd.add_argument("--user-id", required=True, help="auth.users id to import the workouts for")
+    cmd.add_argument("--source", default=legacy_import.DEFAULT_SOURCE, help="legacy SQLite file")
+    cmd.add_argument("--chunk-size", type=int, default=legacy_import.DEFAULT_CHUNK_SIZE)
+    cmd.set_defaults(func=import_legacy)
+
+    cmd = commands.add_parser("export", help="Export one user's full history to CSV or Parquet files")
+    cmd.add_argument("--user-id", required=True, help="auth.users id to export")
+    cmd.add_argument("--format", choices=export.FORMATS, default="csv")
+    cmd.add_argument("--out", default="exports", help="directory to write the files into")
+    cmd.set_defaults(func=export_history)
+
+    cmd = commands.add_parser("recompute-progression",
+                              help="Rebuild per-exercise progression state from workout history")
+    cmd.add_argument("--user-id", help="only this auth.users id (default: everyone)")
+    cmd.add_argument("--rule", choices=progression.available_rules(), default=progression.DEFAULT_RULE)
+    cmd.set_defaults(func=recompute_progression)
+
+    cmd = commands.add_parser("rebuild-records",
+                              help="Backfill the personal records tables from workout history")
+    cmd.add_argument("--user-id", help="only this auth.users id (default: everyone)")
+    cmd.set_defaults(func=rebuild_records)
+
+    cmd = commands.add_parser("write-queue", help="Inspect, flush or retry the local write-behind queue")
+    cmd.add_argument("--drain", action="store_true", help="flush everything due before exiting")
+    cmd.add_argument("--timeout", type=float, default=60, help="seconds --drain waits at most")
+    cmd.add_argument("--retry-failed", action="store_true", help="put failed writes back in line")
+    cmd.add_argument("--prune-days", type=int,
+                     help="forget the database's idempotency keys older than this many days")
+    cmd.set_defaults(func=write_queue)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""
+Per-query latency, row and error counters for the data layer.
+
+Wrap a db.py function with @timed_query and every call records its wall
+time into a fixed-bucket histogram under the function's name. Calls slower
+than SLOW_QUERY_MS are also written to the "db.slow_queries" logger and
+kept in a short in-memory list for the Query Stats page. Parameters are
+redacted down to their types, so no user data ends up in either.
+
+Counters are per process and reset on restart.
+"""
+import bisect
+import functools
+import inspect
+import logging
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+import pandas as pd
+
+from config import get_setting
+
+SLOW_QUERY_MS = float(get_setting("SLOW_QUERY_MS", 500))
+
+# Upper bounds (ms) of the histogram buckets; the last bucket is open-ended.
+BUCKET_BOUNDS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000]
+
+slow_log = logging.getLogger("db.slow_queries")
+
+
+class QueryStats:
+    """Latency histogram and counters for one named query."""
+
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKET_BOUNDS_MS) + 1)
+        self.calls = 0
+        self.errors = 0
+        self.rows = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, elapsed_ms, rows, failed):
+        self.buckets[bisect.bisect_left(BUCKET_BOUNDS_MS, elapsed_ms)] += 1
+        self.calls += 1
+        self.errors += failed
+        self.rows += rows
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+
+    def percentile(self, q):
+        """
+        Estimate the q-th percentile (0-100) in ms by interpolating within
+        the bucket it falls in. The open-ended bucket reports max_ms.
+        """
+        if not self.calls:
+            return None
+        rank = q / 100 * self.calls
+        seen = 0
+        for i, count in enumerate(self.buckets):
+            if count and seen + count >= rank:
+                if i == len(BUCKET_BOUNDS_MS):
+                    return self.max_ms
+                lower = BUCKET_BOUNDS_MS[i - 1] if i else 0.0
+                upper = min(BUCKET_BOUNDS_MS[i], self.max_ms)
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+        return self.max_ms
+
+
+_stats = {}
+_slow = deque(maxlen=200)
+_lock = threading.Lock()
+
+
+def _row_count(result):
+    """
+    Rows in a db.py return value: a DataFrame, list or dict, a (page, cursor)
+    pair, a dict of DataFrames, or a row count from a bulk write.
+    """
+    if result is None:
+        return 0
+    if isinstance(result, int):
+        return result
+    if isinstance(result, tuple):
+        return _row_count(result[0]) if result else 0
+    if isinstance(result, dict) and result and all(isinstance(v, pd.DataFrame) for v in result.values()):
+        return sum(len(v) for v in result.values())
+    if hasattr(result, "__len__") and not isinstance(result, str):
+        return len(result)
+    return 1
+
+
+def redact(args, kwargs):
+    """Describe call arguments by type only, e.g. (str, limit=int)."""
+    shown = [type(a).__name__ for a in args]
+    shown += [f"{k}={type(v).__name__}" for k, v in sorted(kwargs.items())]
+    return f"({', '.join(shown)})"
+
+
+def record(name, elapsed_ms, rows=0, failed=False, params=""):
+    with _lock:
+        stats = _stats.get(name)
+        if stats is None:
+            stats = _stats[name] = QueryStats()
+        stats.record(elapsed_ms, rows, failed)
+        if elapsed_ms >= SLOW_QUERY_MS:
+            _slow.append({
+                "at": datetime.now(),
+                "query": name,
+                "params": params,
+                "ms": round(elapsed_ms, 1),
+                "rows": rows,
+                "failed": failed,
+            })
+    if elapsed_ms >= SLOW_QUERY_MS:
+        slow_log.warning("slow query %s%s took %.0f ms (%d rows%s)",
+                         name, params, elapsed_ms, rows, ", failed" if failed else "")
+
+
+def timed_query(func):
+    """
+    Record latency, rows returned and errors for every call of func. For a
+    coroutine function the time is measured around the await.
+    """
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            result = None
+            failed = True
+            try:
+                result = await func(*args, **kwargs)
+                failed = False
+                return result
+            finally:
+                elapsed_ms = (time.perf_counter() - start) * 1000
+                record(func.__name__, elapsed_ms, _row_count(result), failed, redact(args, kwargs))
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        result = None
+        failed = True
+        try:
+            result = func(*args, **kwargs)
+            failed = False
+            return result
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            record(func.__name__, elapsed_ms, _row_count(result), failed, redact(args, kwargs))
+    return wrapper
+
+
+def snapshot():
+    """One dict per query with calls, errors, rows and p50/p95/p99/max in ms."""
+    with _lock:
+        return [
+            {
+                "query": name,
+                "calls": s.calls,
+                "errors": s.errors,
+                "rows": s.rows,
+                "mean_ms": s.total_ms / s.calls,
+                "p50_ms": s.percentile(50),
+                "p95_ms": s.percentile(95),
+                "p99_ms": s.percentile(99),
+                "max_ms": s.max_ms,
+            }
+            for name, s in sorted(_stats.items())
+        ]
+
+
+def slow_queries():
+    """Recent slow calls, newest first."""
+    with _lock:
+        return list(reversed(_slow))
+
+
+def reset():
+    with _lock:
+        _stats.clear()
+        _slow.clear()
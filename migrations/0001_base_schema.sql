@@ -0,0 +1,77 @@
+-- Tables used by db.py. Everything is IF NOT EXISTS so this is a no-op on
+-- the existing Supabase database and builds the full schema on a fresh
+-- local Postgres.
+
+-- Supabase provides auth.users; create a minimal stand-in elsewhere.
+CREATE SCHEMA IF NOT EXISTS auth;
+CREATE TABLE IF NOT EXISTS auth.users (
+    id UUID PRIMARY KEY,
+    email TEXT
+);
+
+CREATE TABLE IF NOT EXISTS family_members (
+    user_id UUID PRIMARY KEY,
+    display_name TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS exercises (
+    id BIGSERIAL PRIMARY KEY,
+    user_id UUID NOT NULL,
+    name TEXT NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    UNIQUE (user_id, name)
+);
+
+CREATE TABLE IF NOT EXISTS workouts (
+    id BIGSERIAL PRIMARY KEY,
+    user_id UUID NOT NULL,
+    exercise_id BIGINT NOT NULL REFERENCES exercises (id) ON DELETE CASCADE,
+    workout_date DATE NOT NULL,
+    weight NUMERIC,
+    sets INTEGER,
+    target_reps INTEGER,
+    achieved_reps INTEGER,
+    success BOOLEAN,
+    scheme TEXT,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS cardio_exercises (
+    id BIGSERIAL PRIMARY KEY,
+    user_id UUID NOT NULL,
+    name TEXT NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    UNIQUE (user_id, name)
+);
+
+CREATE TABLE IF NOT EXISTS cardio_workouts (
+    id BIGSERIAL PRIMARY KEY,
+    user_id UUID NOT NULL,
+    workout_type TEXT NOT NULL,
+    workout_date DATE NOT NULL,
+    time_minutes NUMERIC,
+    distance_km NUMERIC,
+    difficulty_level TEXT,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS pips_scores (
+    id BIGSERIAL PRIMARY KEY,
+    user_id UUID NOT NULL,
+    puzzle_date DATE NOT NULL,
+    difficulty TEXT NOT NULL,
+    time_seconds INTEGER NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    UNIQUE (user_id, puzzle_date, difficulty)
+);
+
+CREATE TABLE IF NOT EXISTS nyt_scores (
+    id BIGSERIAL PRIMARY KEY,
+    user_id UUID NOT NULL,
+    game TEXT NOT NULL,
+    puzzle_date DATE NOT NULL,
+    score INTEGER NOT NULL,
+    notes TEXT,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    UNIQUE (user_id, game, puzzle_date)
+);
@@ -0,0 +1,9 @@
+-- Points per (puzzle_date, difficulty, user), maintained by log_pips_score.
+-- difficulty is easy / medium / hard / overall.
+CREATE TABLE IF NOT EXISTS pips_daily_points (
+    puzzle_date DATE NOT NULL,
+    difficulty TEXT NOT NULL,
+    user_id UUID NOT NULL,
+    points INTEGER NOT NULL,
+    PRIMARY KEY (puzzle_date, difficulty, user_id)
+);
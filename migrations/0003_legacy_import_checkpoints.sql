@@ -0,0 +1,8 @@
+-- Last legacy WorkoutEntries.EntryID imported per (user, source file).
+CREATE TABLE IF NOT EXISTS legacy_import_checkpoints (
+    user_id UUID NOT NULL,
+    source TEXT NOT NULL,
+    last_entry_id BIGINT NOT NULL,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (user_id, source)
+);
@@ -0,0 +1,20 @@
+-- Latest workout and next suggestion per (user, exercise), maintained by
+-- log_workouts. Rebuild with: python manage.py recompute-progression
+CREATE TABLE IF NOT EXISTS exercise_progress (
+    user_id UUID NOT NULL,
+    exercise_id BIGINT NOT NULL,
+    workout_date DATE,
+    weight NUMERIC,
+    sets INTEGER,
+    target_reps INTEGER,
+    achieved_reps INTEGER,
+    success BOOLEAN,
+    scheme TEXT,
+    rule TEXT NOT NULL,
+    next_weight NUMERIC,
+    next_sets INTEGER,
+    next_target_reps INTEGER,
+    next_scheme TEXT,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (user_id, exercise_id)
+);
@@ -0,0 +1,36 @@
+-- Indexes behind the queries in db.py. check_explain.py fails if any of
+-- those queries plans a sequential scan.
+
+-- get_previous_workout / recompute_progression: latest workout per exercise.
+CREATE INDEX IF NOT EXISTS workouts_user_exercise_created_idx
+    ON workouts (user_id, exercise_id, created_at DESC, id DESC);
+
+-- get_workouts(_page): keyset pagination, unfiltered and per exercise.
+CREATE INDEX IF NOT EXISTS workouts_user_date_idx
+    ON workouts (user_id, workout_date DESC, id DESC);
+CREATE INDEX IF NOT EXISTS workouts_user_exercise_date_idx
+    ON workouts (user_id, exercise_id, workout_date DESC, id DESC);
+
+-- get_last_cardio.
+CREATE INDEX IF NOT EXISTS cardio_workouts_user_type_created_idx
+    ON cardio_workouts (user_id, workout_type, created_at DESC);
+
+-- get_cardio_workouts(_page): keyset pagination, unfiltered and per type.
+CREATE INDEX IF NOT EXISTS cardio_workouts_user_date_idx
+    ON cardio_workouts (user_id, workout_date DESC, id DESC);
+CREATE INDEX IF NOT EXISTS cardio_workouts_user_type_date_idx
+    ON cardio_workouts (user_id, workout_type, workout_date DESC, id DESC);
+
+-- Pips daily leaderboards and the re-ranking of a Pips day's points
+-- (Repository._refresh_game_points in storage/base.py): one day's times,
+-- covering.
+CREATE INDEX IF NOT EXISTS pips_scores_date_difficulty_time_idx
+    ON pips_scores (puzzle_date, difficulty, time_seconds) INCLUDE (user_id);
+
+-- Per-user exports and lookups of score history.
+CREATE INDEX IF NOT EXISTS pips_scores_user_date_idx
+    ON pips_scores (user_id, puzzle_date);
+CREATE INDEX IF NOT EXISTS nyt_scores_date_game_idx
+    ON nyt_scores (puzzle_date, game);
+CREATE INDEX IF NOT EXISTS nyt_scores_user_date_idx
+    ON nyt_scores (user_id, puzzle_date);
@@ -0,0 +1,28 @@
+-- Personal records, kept current by log_workouts / log_cardio in the same
+-- transaction as the workout (see storage/base.py), so PR lookups are
+-- primary-key reads instead of scans of the whole history. Backfill
+-- existing history with: python manage.py rebuild-records
+
+-- record: 'weight' (heaviest for `reps` achieved reps), 'e1rm' (best Epley
+-- estimate) or 'volume' (biggest one-day tonnage); reps is 0 for the last two.
+CREATE TABLE IF NOT EXISTS personal_records (
+    user_id UUID NOT NULL,
+    exercise_id BIGINT NOT NULL REFERENCES exercises (id) ON DELETE CASCADE,
+    record TEXT NOT NULL,
+    reps INTEGER NOT NULL DEFAULT 0,
+    value DOUBLE PRECISION NOT NULL,
+    workout_date DATE NOT NULL,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (user_id, exercise_id, record, reps)
+);
+
+-- record: 'pace' (min/km, lower is better) or 'distance' (km).
+CREATE TABLE IF NOT EXISTS cardio_records (
+    user_id UUID NOT NULL,
+    workout_type TEXT NOT NULL,
+    record TEXT NOT NULL,
+    value DOUBLE PRECISION NOT NULL,
+    workout_date DATE NOT NULL,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (user_id, workout_type, record)
+);
@@ -0,0 +1,22 @@
+-- Points per (game, puzzle_date, board, user) for every game registered in
+-- games.py, kept current by log_pips_score / log_nyt_score in the same
+-- transaction as the score (see storage/base.py). board is Pips' difficulty
+-- or 'overall', and 'daily' for the other games.
+--
+-- Replaces pips_daily_points, whose rows carry over as Pips. Backfill the
+-- other games with: python manage.py rebuild-game-points
+CREATE TABLE IF NOT EXISTS game_daily_points (
+    game TEXT NOT NULL,
+    puzzle_date DATE NOT NULL,
+    board TEXT NOT NULL,
+    user_id UUID NOT NULL,
+    points INTEGER NOT NULL,
+    PRIMARY KEY (game, puzzle_date, board, user_id)
+);
+
+INSERT INTO game_daily_points (game, puzzle_date, board, user_id, points)
+SELECT 'Pips', puzzle_date, difficulty, user_id, points
+FROM pips_daily_points
+ON CONFLICT DO NOTHING;
+
+DROP TABLE IF EXISTS pips_daily_points;
@@ -0,0 +1,9 @@
+-- Idempotency keys of the writes the local write queue (write_queue.py) has
+-- flushed. log_workouts / log_cardio / log_pips_score / log_nyt_score insert
+-- the key in the same transaction as the write, so a write replayed after a
+-- crash or a lost reply is recognised and skipped instead of applied twice.
+-- Prune old keys with: python manage.py write-queue --prune-days 30
+CREATE TABLE IF NOT EXISTS applied_writes (
+    key TEXT PRIMARY KEY,
+    applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
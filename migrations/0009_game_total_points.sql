@@ -0,0 +1,19 @@
+-- All-time points per (game, user): the all-time points leaderboard reads
+-- this instead of summing every row of game_daily_points. Kept current by
+-- the same transaction that re-ranks a game's day (see storage/base.py),
+-- and rebuilt by: python manage.py rebuild-game-points
+--
+-- The weekly and monthly leaderboards read one period's days of
+-- game_daily_points through its (game, puzzle_date, ...) primary key.
+CREATE TABLE IF NOT EXISTS game_total_points (
+    game TEXT NOT NULL,
+    user_id UUID NOT NULL,
+    points BIGINT NOT NULL,
+    PRIMARY KEY (game, user_id)
+);
+
+INSERT INTO game_total_points (game, user_id, points)
+SELECT game, user_id, SUM(points)
+FROM game_daily_points
+GROUP BY game, user_id
+ON CONFLICT DO NOTHING;
@@ -0,0 +1,28 @@
+import streamlit as st
+from db import get_display_name, get_name_directory, set_display_name
+
+st.set_page_config(page_title="Profile", page_icon="🙂")
+st.title("🙂 Your Profile")
+
+# --- Guard ---
+if "user_id" not in st.session_state or not st.session_state["user_id"]:
+    st.error("You must be signed in to edit your profile.")
+    st.stop()
+
+# --- Display name ---
+st.subheader("Leaderboard name")
+current = get_display_name()
+with st.form("display_name_form"):
+    display_name = st.text_input(
+        "Display name",
+        value=current or "",
+        max_chars=40,
+        help="What the family sees on the leaderboards. Leave blank to show your email instead.",
+    )
+    if st.form_submit_button("💾 Save"):
+        set_display_name(display_name)
+        st.success("Display name saved.")
+        st.rerun()
+
+names, _ = get_name_directory()
+st.caption(f"You appear on the leaderboards as **{names.get(str(st.session_state['user_id']), st.session_state.get('user_email'))}**.")
@@ -2,12 +2,19 @@ import streamlit as st
 import pandas as pd
 from datetime import date
 from db import (
-    get_exercises,
-    suggest_next_workout,
+    fetch_concurrently,
+    get_exercises_async,
+    get_latest_workouts_async,
+    get_workouts_async,
+    suggest_all,
     log_workout,
+    log_workouts,
     get_workouts,
-    get_previous_workout,
+    get_personal_records,
+    HISTORY_PAGE_SIZE,
 )
+from progression import SCHEME_CYCLE
+from utils import show_write_notices
 
 st.set_page_config(page_title="Log Workout", page_icon="💪")
 
@@ -18,16 +25,184 @@ if "user_id" not in st.session_state or not st.session_state["user_id"]:
     st.error("You must be signed in to log a workout.")
     st.stop()
 
+show_write_notices()
+
+# --- Load the page's data in one concurrent round of queries ---
+# The exercise picker keeps its value in session state, so after the first
+# run its recent history can be fetched alongside everything else.
+chosen = st.session_state.get("log_exercise")
+reads = [get_exercises_async(), get_latest_workouts_async()]
+if chosen:
+    reads.append(get_workouts_async(exercise_name=chosen, limit=HISTORY_PAGE_SIZE))
+exercises, latest, *_ = fetch_concurrently(*reads)
+
 # --- Select exercise ---
-exercises = get_exercises()
 if not exercises:
     st.info("No exercises found. Add one first from the 'Add Exercise' page.")
     st.stop()
 
-exercise_name = st.selectbox("Choose an exercise", exercises)
+scheme_options = SCHEME_CYCLE
+
+
+def show_new_records(records):
+    """Celebrate any personal records a log just beat."""
+    for record in records:
+        st.success(f"🏆 New PR! {record['description']}")
+    if records:
+        st.balloons()
+
+
+def logged(message, records):
+    """
+    Rerun the whole page after a log, not just the form's fragment, so the
+    last workout, records, history and suggestion above it read the new
+    data; message and records are shown after the rerun.
+    """
+    st.session_state["log_flash"] = (message, records)
+    st.rerun(scope="app")
+
+
+flash = st.session_state.pop("log_flash", None)
+if flash:
+    st.success(flash[0])
+    show_new_records(flash[1])
+
+
+# --- Whole session: every exercise in one submit and one transaction ---
+# Fragments: picking exercises and editing the session rerun only the
+# form, not the reads above it; a successful submit reruns everything.
+@st.fragment
+def log_session(exercises, suggestions):
+    """Plan and log a whole session."""
+    with st.expander("📋 Suggested next workout for every lift"):
+        st.dataframe(
+            pd.DataFrame.from_dict(suggestions, orient="index"),
+            use_container_width=True,
+        )
+
+    planned = st.multiselect("Exercises in this session", exercises)
+
+    with st.form("log_session_form"):
+        session_date = st.date_input("Workout date", value=date.today())
+        session = st.data_editor(
+            pd.DataFrame({
+                "Exercise": planned,
+                "Weight": [float(suggestions[name]["weight"]) for name in planned],
+                "Sets": [int(suggestions[name]["sets"]) for name in planned],
+                "Target Reps": [int(suggestions[name]["target_reps"]) for name in planned],
+                "Achieved Reps": [int(suggestions[name]["target_reps"]) for name in planned],
+                "Success": [True] * len(planned),
+                "Scheme": [suggestions[name]["scheme"] for name in planned],
+            }).astype({
+                "Exercise": "str", "Weight": "float", "Sets": "int", "Target Reps": "int",
+                "Achieved Reps": "int", "Success": "bool", "Scheme": "str",
+            }),
+            num_rows="dynamic",
+            use_container_width=True,
+            column_config={
+                "Exercise": st.column_config.SelectboxColumn(options=exercises, required=True),
+                "Weight": st.column_config.NumberColumn(min_value=0.0, step=2.5, default=20.0, required=True),
+                "Sets": st.column_config.NumberColumn(min_value=1, step=1, default=3, required=True),
+                "Target Reps": st.column_config.NumberColumn(min_value=1, step=1, default=15, required=True),
+                "Achieved Reps": st.column_config.NumberColumn(min_value=0, step=1, default=15, required=True),
+                "Success": st.column_config.CheckboxColumn(default=True),
+                "Scheme": st.column_config.SelectboxColumn(options=scheme_options, default="3 x 15", required=True),
+            },
+        )
+        submitted = st.form_submit_button("✅ Log Session")
+
+    if submitted:
+        session = session.dropna(subset=["Exercise"])
+        if session.empty:
+            st.error("Add at least one exercise to the session.")
+        else:
+            try:
+                records = log_workouts([
+                    {
+                        "exercise_name": row["Exercise"],
+                        "weight": float(row["Weight"]),
+                        "sets": int(row["Sets"]),
+                        "target_reps": int(row["Target Reps"]),
+                        "achieved_reps": int(row["Achieved Reps"]),
+                        "success": bool(row["Success"]),
+                        "scheme": row["Scheme"],
+                        "workout_date": session_date,
+                    }
+                    for row in session.to_dict("records")
+                ])
+            except Exception as e:
+                st.error(f"Error logging session: {e}")
+            else:
+                logged(f"Session logged: {len(session)} exercises.", records)
+
+
+# --- One exercise ---
+@st.fragment
+def log_single(exercise_name, suggestion):
+    """The log form for one exercise, prefilled with its suggestion."""
+    with st.form("log_workout_form"):
+        workout_date = st.date_input("Workout date", value=date.today())
+        weight = st.number_input(
+            "Weight (kg)", min_value=0.0, step=2.5, value=float(suggestion["weight"])
+        )
+        sets = st.number_input(
+            "Sets", min_value=1, step=1, value=int(suggestion["sets"])
+        )
+        target_reps = st.number_input(
+            "Target reps", min_value=1, step=1, value=int(suggestion["target_reps"])
+        )
+        achieved_reps = st.number_input(
+            "Achieved reps", min_value=0, step=1, value=int(suggestion["target_reps"])
+        )
+        success = st.checkbox("Success?", value=True)
+
+        # ✅ Scheme selection (restricted options)
+        default_scheme = suggestion.get("scheme", "3 x 5")
+        if default_scheme not in scheme_options:
+            default_scheme = "3 x 5"
+        scheme = st.selectbox("Scheme", scheme_options, index=scheme_options.index(default_scheme))
+
+        # --- Buttons ---
+        col1, col2 = st.columns(2)
+        with col1:
+            submitted = st.form_submit_button("✅ Log Workout")
+        with col2:
+            clear = st.form_submit_button("🗑️ Clear Form")
+
+        if submitted:
+            try:
+                records = log_workout(
+                    exercise_name=exercise_name,
+                    weight=weight,
+                    sets=sets,
+                    target_reps=target_reps,
+                    achieved_reps=achieved_reps,
+                    success=success,
+                    scheme=scheme,
+                    workout_date=workout_date,
+                )
+            except Exception as e:
+                st.error(f"Error logging workout: {e}")
+            else:
+                logged("Workout logged!", records)
+
+        if clear:
+            st.rerun()
+
+
+# Next suggestion for every exercise, from the progression state just fetched.
+suggestions = suggest_all()
+
+mode = st.radio("Log", ["Single exercise", "Whole session"], horizontal=True)
+
+if mode == "Whole session":
+    log_session(exercises, suggestions)
+    st.stop()
+
+exercise_name = st.selectbox("Choose an exercise", exercises, key="log_exercise")
 
 # --- Show last workout for this exercise ---
-previous = get_previous_workout(exercise_name)
+previous = latest.get(exercise_name)
 if previous:
     st.subheader(f"Last workout for {exercise_name}")
     st.write(
@@ -41,65 +216,24 @@ if previous:
 else:
     st.info(f"No previous workout logged for {exercise_name}.")
 
-# --- Optional: full history in an expander ---
-all_workouts = get_workouts()
-if not all_workouts.empty:
-    prev = all_workouts[all_workouts["Exercise"] == exercise_name]
-    if not prev.empty:
-        with st.expander(f"📜 Full history for {exercise_name}"):
-            st.dataframe(prev, use_container_width=True)
+# --- Personal records for this exercise ---
+records = get_personal_records(exercise_name)
+if not records.empty:
+    with st.expander(f"🏆 Personal records for {exercise_name}"):
+        st.dataframe(records, use_container_width=True, hide_index=True)
+
+# --- Optional: recent history in an expander ---
+# Already cached by the fetch above unless this is the first pick.
+recent = get_workouts(exercise_name=exercise_name, limit=HISTORY_PAGE_SIZE)
+if not recent.empty:
+    with st.expander(f"📜 Recent history for {exercise_name}"):
+        st.dataframe(recent, use_container_width=True)
+        st.caption("See the Workout History page for older sessions.")
 
 # --- Suggest next workout ---
-suggestion = suggest_next_workout(exercise_name)
+suggestion = suggestions[exercise_name]
 st.write("### Suggested next workout")
 st.json(suggestion)
 
 # --- Input form ---
-with st.form("log_workout_form"):
-    workout_date = st.date_input("Workout date", value=date.today())
-    weight = st.number_input(
-        "Weight (kg)", min_value=0.0, step=2.5, value=float(suggestion["weight"])
-    )
-    sets = st.number_input(
-        "Sets", min_value=1, step=1, value=int(suggestion["sets"])
-    )
-    target_reps = st.number_input(
-        "Target reps", min_value=1, step=1, value=int(suggestion["target_reps"])
-    )
-    achieved_reps = st.number_input(
-        "Achieved reps", min_value=0, step=1, value=int(suggestion["target_reps"])
-    )
-    success = st.checkbox("Success?", value=True)
-
-    # ✅ Scheme selection (restricted options)
-    scheme_options = ["3 x 15", "3 x 10", "3 x 5"]
-    default_scheme = suggestion.get("scheme", "3 x 5")
-    if default_scheme not in scheme_options:
-        default_scheme = "3 x 5"
-    scheme = st.selectbox("Scheme", scheme_options, index=scheme_options.index(default_scheme))
-
-    # --- Buttons ---
-    col1, col2 = st.columns(2)
-    with col1:
-        submitted = st.form_submit_button("✅ Log Workout")
-    with col2:
-        clear = st.form_submit_button("🗑️ Clear Form")
-
-    if submitted:
-        try:
-            log_workout(
-                exercise_name=exercise_name,
-                weight=weight,
-                sets=sets,
-                target_reps=target_reps,
-                achieved_reps=achieved_reps,
-                success=success,
-                scheme=scheme,
-                workout_date=workout_date,
-            )
-            st.success("Workout logged!")
-        except Exception as e:
-            st.error(f"Error logging workout: {e}")
-
-    if clear:
-         st.rerun()
\ No newline at end of file
+log_single(exercise_name, suggestion)
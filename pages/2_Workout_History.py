@@ -1,5 +1,14 @@
 import streamlit as st
-from db import get_workouts, get_cardio_workouts
+from functools import partial
+import charts
+from db import (
+    get_exercises,
+    get_strength_series,
+    get_workouts_page,
+    get_cardio_exercises,
+    get_cardio_workouts_page,
+)
+from utils import show_paged_history
 
 st.set_page_config(page_title="Workout History", page_icon="📜")
 
@@ -22,36 +31,53 @@ if history_type is None:
     st.info("Please select Strength or Cardio to view your history.")
     st.stop()
 
+
+@st.fragment
+def strength_chart(exercise_name):
+    """The exercise's progress chart; its own widgets rerun only this."""
+    col_metric, col_bucket = st.columns(2)
+    with col_metric:
+        metric = st.selectbox("Show", ["e1RM (kg)", "Top weight (kg)", "Tonnage (kg)", "Sets"])
+    with col_bucket:
+        bucket = st.radio("Per", ["day", "week", "month"], index=1, horizontal=True)
+    series = get_strength_series(exercise_name, bucket=bucket)
+    if series.empty:
+        st.info(f"No {exercise_name} workouts to chart yet.")
+    else:
+        st.line_chart(charts.downsample(series, "Date", metric), x="Date", y=metric)
+
+
 # --- Strength history ---
 if history_type == "Strength":
-    df = get_workouts()
-    if df.empty:
-        st.info("No strength workouts logged yet. Head to 'Log Workout' to add your first one!")
-        st.stop()
-
     st.subheader("Your Strength Workouts")
-    st.dataframe(df, use_container_width=True)
 
-    # Optional: filter by exercise
-    exercise_filter = st.selectbox("Filter by exercise", ["All"] + sorted(df["Exercise"].unique().tolist()))
-    if exercise_filter != "All":
-        df = df[df["Exercise"] == exercise_filter]
+    # Optional: filter by exercise (applied in the query, one page at a time)
+    exercise_filter = st.selectbox("Filter by exercise", ["All"] + get_exercises())
+    exercise_name = None if exercise_filter == "All" else exercise_filter
+
+    show_paged_history(
+        f"strength_history_{exercise_filter}",
+        partial(get_workouts_page, exercise_name=exercise_name),
+        "No strength workouts logged yet. Head to 'Log Workout' to add your first one!",
+    )
 
-    st.dataframe(df, use_container_width=True)
+    # --- Progress chart: bucketed in SQL, downsampled before it's sent ---
+    st.subheader("Progress over time")
+    if exercise_name is None:
+        st.info("Pick an exercise above to chart its progress.")
+    else:
+        strength_chart(exercise_name)
 
 # --- Cardio history ---
 elif history_type == "Cardio":
-    df = get_cardio_workouts()
-    if df.empty:
-        st.info("No cardio workouts logged yet. Head to 'Log Cardio Workout' to add your first one!")
-        st.stop()
-
     st.subheader("Your Cardio Workouts")
-    st.dataframe(df, use_container_width=True)
 
-    # Optional: filter by activity
-    activity_filter = st.selectbox("Filter by activity", ["All"] + sorted(df["Workout Type"].unique().tolist()))
-    if activity_filter != "All":
-        df = df[df["Workout Type"] == activity_filter]
+    # Optional: filter by activity (applied in the query, one page at a time)
+    activity_filter = st.selectbox("Filter by activity", ["All"] + get_cardio_exercises())
+    workout_type = None if activity_filter == "All" else activity_filter
 
-    st.dataframe(df, use_container_width=True)
\ No newline at end of file
+    show_paged_history(
+        f"cardio_history_{activity_filter}",
+        partial(get_cardio_workouts_page, workout_type=workout_type),
+        "No cardio workouts logged yet. Head to 'Log Cardio Workout' to add your first one!",
+    )
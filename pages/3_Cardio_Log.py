@@ -1,11 +1,16 @@
 import streamlit as st
 from datetime import date
+from functools import partial
+import charts
 from db import (
     log_cardio,
-    get_cardio_workouts,
+    get_cardio_series,
+    get_cardio_workouts_page,
     get_last_cardio,
     get_cardio_exercises,
+    get_cardio_records,
 )
+from utils import show_paged_history, show_write_notices
 
 st.set_page_config(page_title="Cardio Log", page_icon="🏃")
 
@@ -35,6 +40,16 @@ if last:
 else:
     st.info(f"No previous {workout_type} workout logged.")
 
+# --- Personal records ---
+# Records beaten by the last submit, carried across the rerun that follows it.
+for description in st.session_state.pop("cardio_new_records", []):
+    st.success(f"🏆 New PR! {description}")
+show_write_notices()
+records = get_cardio_records(workout_type)
+if not records.empty:
+    with st.expander(f"🏆 Personal records for {workout_type}"):
+        st.dataframe(records, use_container_width=True, hide_index=True)
+
 # --- Input form ---
 with st.form("cardio_form"):
     workout_date = st.date_input("Workout date", value=date.today())
@@ -45,26 +60,45 @@ with st.form("cardio_form"):
     submitted = st.form_submit_button("✅ Log Cardio Workout")
     if submitted:
         try:
-            log_cardio(workout_type, time_minutes, distance_km, difficulty, workout_date)
+            new_records = log_cardio(workout_type, time_minutes, distance_km, difficulty, workout_date)
+            st.session_state["cardio_new_records"] = [r["description"] for r in new_records]
             st.success("Cardio workout logged!")
             st.rerun()
         except Exception as e:
             st.error(f"Error logging cardio workout: {e}")
 
 # --- History ---
-df = get_cardio_workouts()
-if not df.empty:
-    st.subheader("Your cardio history")
-    st.dataframe(df, use_container_width=True)
+st.subheader("Your cardio history")
 
-    # Optional: filter by exercise
-    exercise_filter = st.selectbox("Filter by exercise", ["All"] + sorted(df["Workout Type"].unique().tolist()))
-    if exercise_filter != "All":
-        df = df[df["Workout Type"] == exercise_filter]
+# Optional: filter by exercise (applied in the query, one page at a time)
+exercise_filter = st.selectbox("Filter by exercise", ["All"] + cardio_exercises)
+history_type = None if exercise_filter == "All" else exercise_filter
 
-    # Optional: chart progress
-    if not df.empty:
-        st.subheader("Progress over time")
-        st.line_chart(df, x="Date", y="Distance (km)", color="Workout Type")
-else:
-    st.info("No cardio workouts logged yet.")
\ No newline at end of file
+show_paged_history(
+    f"cardio_log_history_{exercise_filter}",
+    partial(get_cardio_workouts_page, workout_type=history_type),
+    "No cardio workouts logged yet.",
+)
+
+# --- Progress chart: bucketed in SQL, downsampled before it's sent ---
+@st.fragment
+def cardio_chart(workout_type):
+    """The progress chart; its own widgets rerun only this."""
+    series = get_cardio_series(workout_type=workout_type,
+                               bucket=st.session_state.get("cardio_chart_bucket", "week"))
+    if series.empty:
+        return
+    st.subheader("Progress over time")
+    col_metric, col_bucket = st.columns(2)
+    with col_metric:
+        metric = st.selectbox("Show", ["Distance (km)", "Time (min)", "Pace (min/km)", "Speed (km/h)"])
+    with col_bucket:
+        # index matches the bucket the series above was read with.
+        st.radio("Per", ["day", "week", "month"], index=1, horizontal=True, key="cardio_chart_bucket")
+    st.line_chart(
+        charts.downsample(series, "Date", metric, by="Workout Type"),
+        x="Date", y=metric, color="Workout Type",
+    )
+
+
+cardio_chart(history_type)
\ No newline at end of file
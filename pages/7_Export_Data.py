@@ -0,0 +1,37 @@
+import streamlit as st
+from datetime import date
+from functools import partial
+from db import current_user_id
+from export import DATASETS, FORMATS, export_file
+
+st.set_page_config(page_title="Export Data", page_icon="📦")
+
+st.title("📦 Export Your Data")
+
+# --- Guard: must be signed in ---
+if "user_id" not in st.session_state or not st.session_state["user_id"]:
+    st.error("You must be signed in to export your data.")
+    st.stop()
+
+st.write("Download your full history. Files are generated when you click, however much you've logged.")
+
+fmt = st.radio("Format", FORMATS, horizontal=True, format_func=str.upper)
+
+labels = {
+    "workouts": "🏋️ Strength workouts",
+    "cardio": "🏃 Cardio workouts",
+    "pips": "🧩 Pips scores",
+    "nyt": "📰 NYT game scores",
+}
+
+uid = current_user_id()
+for dataset in DATASETS:
+    st.download_button(
+        labels[dataset],
+        # Deferred: only runs when clicked, on a separate thread, so pass
+        # the user id in rather than reading session_state there.
+        data=partial(export_file, dataset, uid, fmt),
+        file_name=f"{dataset}_{date.today()}.{fmt}",
+        mime="text/csv" if fmt == "csv" else "application/octet-stream",
+        key=f"export_{dataset}",
+    )
@@ -0,0 +1,51 @@
+import streamlit as st
+import pandas as pd
+import metrics
+from utils import is_admin
+
+st.set_page_config(page_title="Query Stats", page_icon="⏱️")
+st.title("⏱️ Query Stats")
+
+# --- Guard: admins only ---
+if "user_id" not in st.session_state or not st.session_state["user_id"]:
+    st.error("You must be signed in to view query stats.")
+    st.stop()
+if not is_admin():
+    st.error("Query stats are only available to admins.")
+    st.stop()
+
+st.caption(
+    "Latency of every database call made by this server process since it started "
+    f"(or since the last reset). Calls over {metrics.SLOW_QUERY_MS:.0f} ms are logged as slow."
+)
+
+# --- Per-query latency ---
+stats = pd.DataFrame(metrics.snapshot())
+if stats.empty:
+    st.info("No queries recorded yet.")
+else:
+    stats = stats.sort_values("p95_ms", ascending=False)
+    st.dataframe(
+        stats.round(1),
+        use_container_width=True,
+        hide_index=True,
+        column_config={
+            "mean_ms": "mean (ms)",
+            "p50_ms": "p50 (ms)",
+            "p95_ms": "p95 (ms)",
+            "p99_ms": "p99 (ms)",
+            "max_ms": "max (ms)",
+        },
+    )
+
+# --- Slow queries ---
+st.subheader("🐢 Slow queries")
+slow = pd.DataFrame(metrics.slow_queries())
+if slow.empty:
+    st.info("No slow queries.")
+else:
+    st.dataframe(slow, use_container_width=True, hide_index=True)
+
+if st.button("Reset stats"):
+    metrics.reset()
+    st.rerun()
@@ -0,0 +1,53 @@
+import streamlit as st
+import analytics
+import charts
+from db import get_training_days, get_training_volume
+
+st.set_page_config(page_title="Training Analytics", page_icon="📈")
+st.title("📈 Training Analytics")
+
+# --- Guard: must be signed in ---
+if "user_id" not in st.session_state or not st.session_state["user_id"]:
+    st.error("You must be signed in to view your analytics.")
+    st.stop()
+
+daily = get_training_days()
+if daily.empty:
+    st.info("No workouts logged yet. Log a few from the 'Log Workout' page to see your trends.")
+    st.stop()
+
+exercise = st.selectbox("Exercise", sorted(daily["Exercise"].unique()))
+days = daily[daily["Exercise"] == exercise]
+
+# --- Estimated 1RM ---
+st.subheader("🏋️ Estimated 1RM")
+formula = st.radio("Formula", analytics.E1RM_FORMULAS, horizontal=True, format_func=str.capitalize)
+best = days.loc[days[f"e1rm_{formula}"].idxmax()] if days[f"e1rm_{formula}"].notna().any() else None
+if best is not None:
+    st.metric("Best estimate", f"{best[f'e1rm_{formula}']:.1f} kg", help=f"on {best['Date']:%Y-%m-%d}")
+st.line_chart(charts.downsample(days, "Date", f"e1rm_{formula}"), x="Date", y=f"e1rm_{formula}", y_label="e1RM (kg)")
+
+# --- Volume and intensity ---
+st.subheader("📊 Volume and intensity")
+period = st.radio("Group by", list(analytics.PERIODS), horizontal=True, format_func=str.capitalize)
+volume = get_training_volume(period)
+volume = volume[volume["Exercise"] == exercise].drop(columns="Exercise")
+
+st.bar_chart(volume, x="period", y="tonnage", y_label="Tonnage (kg)")
+st.dataframe(
+    volume.sort_values("period", ascending=False),
+    use_container_width=True,
+    hide_index=True,
+    column_config={
+        "period": st.column_config.DateColumn("Starting"),
+        "tonnage": st.column_config.NumberColumn("Tonnage (kg)", format="%.0f"),
+        "top_weight": st.column_config.NumberColumn("Top weight (kg)", format="%.1f"),
+        "e1rm": st.column_config.NumberColumn("Best e1RM (kg)", format="%.1f"),
+        "avg_load": st.column_config.NumberColumn("Avg load (kg)", format="%.1f"),
+        "intensity": st.column_config.ProgressColumn("Intensity", min_value=0.0, max_value=1.0, format="percent"),
+    },
+)
+st.caption(
+    "Tonnage is weight × sets × achieved reps. Avg load is tonnage per rep; intensity is "
+    "avg load as a share of the best estimated 1RM reached up to that period."
+)
@@ -0,0 +1,87 @@
+"""
+Progression rules: given the previous workout for an exercise, suggest the
+next one.
+
+A rule is a function prev -> suggestion, where prev is the dict returned by
+db.get_previous_workout and the suggestion has weight, sets, target_reps
+and scheme. Register new rules with @register_rule("name").
+"""
+
+DEFAULT_RULE = "rep_cycle"
+
+_RULES = {}
+
+
+def register_rule(name):
+    def decorator(func):
+        _RULES[name] = func
+        return func
+    return decorator
+
+
+def get_rule(name):
+    try:
+        return _RULES[name]
+    except KeyError:
+        raise ValueError(f"Unknown progression rule: {name}") from None
+
+
+def available_rules():
+    return sorted(_RULES)
+
+
+# --- Schemes ---
+SCHEME_CYCLE = ["3 x 15", "3 x 10", "3 x 5"]
+
+SCHEME_ALIASES = {
+    "3x15": "3 x 15", "3 x 15": "3 x 15", "3×15": "3 x 15",
+    "3x10": "3 x 10", "3 x 10": "3 x 10", "3×10": "3 x 10",
+    "3x5": "3 x 5", "3 x 5": "3 x 5", "3×5": "3 x 5",
+}
+
+SCHEME_DEFAULTS = {
+    "3 x 15": (3, 15),
+    "3 x 10": (3, 10),
+    "3 x 5": (3, 5),
+}
+
+STARTING_SUGGESTION = {"weight": 20.0, "sets": 3, "target_reps": 15, "scheme": "3 x 15"}
+
+
+def normalize_scheme(scheme, default="3 x 15"):
+    return SCHEME_ALIASES.get(str(scheme).strip(), default)
+
+
+# --- Rules ---
+@register_rule("rep_cycle")
+def rep_cycle(prev):
+    """
+    Add 2.5 kg after a successful session and keep the scheme; after a
+    failed one keep the weight and move on to the next scheme in the cycle
+    (3 x 15 -> 3 x 10 -> 3 x 5 -> 3 x 15).
+    """
+    current_scheme = normalize_scheme(prev["scheme"])
+    idx = SCHEME_CYCLE.index(current_scheme)
+
+    if prev["success"]:
+        inc = 2.5
+        next_scheme = current_scheme
+    else:
+        inc = 0.0
+        next_scheme = SCHEME_CYCLE[(idx + 1) % len(SCHEME_CYCLE)]
+
+    sets, reps = SCHEME_DEFAULTS[next_scheme]
+    return {
+        "weight": float(prev["weight"]) + inc,
+        "sets": sets,
+        "target_reps": reps,
+        "scheme": next_scheme,
+    }
+
+
+def suggest(prev, rule=DEFAULT_RULE):
+    """Suggest the next workout from the previous one (None if there isn't one)."""
+    if not prev:
+        return dict(STARTING_SUGGESTION)
+    return get_rule(rule)(prev)
+
@@ -0,0 +1,268 @@
+"""
+Fill a throwaway database with synthetic users and history.
+
+Everything is generated inside the database (generate_series on Postgres,
+a recursive CTE on SQLite), so even tens of millions of rows load in one
+statement per table. Only ever point this at a throwaway database: it adds
+users to auth.users (users on SQLite).
+"""
+import db
+from storage import get_backend
+
+# Synthetic user i has id seed_user_id(i) and email user<i>@example.com.
+USER_ID_SQL = "('00000000-0000-4000-8000-' || lpad(({i})::text, 12, '0'))::uuid"
+SQLITE_USER_ID_SQL = "printf('00000000-0000-4000-8000-%012d', {i})"
+
+# Every table seed() and the derived rebuilds write to.
+TABLES = [
+    "auth.users", "family_members", "exercises", "workouts", "exercise_progress",
+    "cardio_exercises", "cardio_workouts", "pips_scores", "game_daily_points", "game_total_points",
+    "nyt_scores", "personal_records", "cardio_records",
+]
+SQLITE_TABLES = ["users"] + TABLES[1:]
+
+PIPS_DIFFICULTIES = ["easy", "medium", "hard"]
+NYT_GAMES = ["Wordle", "Connections", "Spelling Bee"]
+
+
+def seed_user_id(i):
+    return f"00000000-0000-4000-8000-{i:012d}"
+
+
+def truncate():
+    """Empty every seeded table so seed() can run again at a different scale."""
+    backend = get_backend()
+    if backend.name == "sqlite":
+        with backend.transaction() as conn:
+            for table in SQLITE_TABLES:
+                conn.execute(f"DELETE FROM {table}")
+    else:
+        with backend.connection() as conn:
+            conn.execute(f"TRUNCATE {', '.join(TABLES)} RESTART IDENTITY CASCADE")
+            conn.commit()
+    db._history_cache.clear()
+    db._game_daily_cache.clear()
+    db._points_cache.clear()
+
+
+def seed(users=100, exercises_per_user=8, workouts=100_000, cardio=20_000, puzzle_days=90, log=print):
+    """
+    Seed the database and rebuild the derived tables. Returns row counts
+    per table. Call on a database that has been migrated but not seeded.
+    """
+    params = {
+        "users": users,
+        "epu": exercises_per_user,
+        "workouts": workouts,
+        "cardio": cardio,
+        "days": puzzle_days,
+    }
+    backend = get_backend()
+    if backend.name == "sqlite":
+        with backend.transaction() as conn:
+            counts = _seed_sqlite(conn, params)
+    else:
+        with backend.connection() as conn:
+            with conn.cursor() as cur:
+                counts = _seed_postgres(cur, params)
+            conn.commit()
+    for table, rows in counts.items():
+        log(f"Seeded {table}: {rows} rows")
+
+    counts["exercise_progress"] = db.recompute_progression()
+    counts["personal_records"] = db.rebuild_personal_records()
+    counts["game_daily_points"] = db.rebuild_game_points()
+
+    with backend.connection() as conn:
+        conn.execute("ANALYZE")
+    return counts
+
+
+def _seed_postgres(cur, params):
+    uid = USER_ID_SQL.format(i="u")
+    counts = {}
+    cur.execute(f"""
+        INSERT INTO auth.users (id, email)
+        SELECT {uid}, 'user' || u || '@example.com'
+        FROM generate_series(0, %(users)s - 1) u
+    """, params)
+    counts["auth.users"] = cur.rowcount
+
+    # Every other user has a display name.
+    cur.execute(f"""
+        INSERT INTO family_members (user_id, display_name)
+        SELECT {uid}, 'Player ' || u
+        FROM generate_series(0, %(users)s - 1, 2) u
+    """, params)
+    counts["family_members"] = cur.rowcount
+
+    cur.execute(f"""
+        INSERT INTO exercises (user_id, name)
+        SELECT {uid}, 'Lift ' || x
+        FROM generate_series(0, %(users)s - 1) u,
+             generate_series(1, %(epu)s) x
+    """, params)
+    counts["exercises"] = cur.rowcount
+
+    # Workout g belongs to user g % users and cycles through their
+    # exercises; each full round of all users' exercises is two days.
+    cur.execute(f"""
+        INSERT INTO workouts (user_id, exercise_id, workout_date, weight, sets,
+                              target_reps, achieved_reps, success, scheme, created_at)
+        SELECT e.user_id, e.id, s.workout_date,
+               20 + (s.g %% 40) * 2.5, 3,
+               (ARRAY[15, 10, 5])[s.g %% 3 + 1],
+               (ARRAY[15, 10, 5])[s.g %% 3 + 1] - (s.g %% 4 = 0)::int,
+               s.g %% 4 <> 0,
+               (ARRAY['3 x 15', '3 x 10', '3 x 5'])[s.g %% 3 + 1],
+               s.workout_date + make_interval(secs => s.g %% 86400)
+        FROM (
+            SELECT g,
+                   {USER_ID_SQL.format(i="g %% %(users)s")} AS user_id,
+                   'Lift ' || ((g / %(users)s) %% %(epu)s + 1) AS name,
+                   DATE '2000-01-01' + (g / (%(users)s * %(epu)s) * 2)::int AS workout_date
+            FROM generate_series(0, %(workouts)s - 1) g
+        ) s
+        JOIN exercises e ON e.user_id = s.user_id AND e.name = s.name
+    """, params)
+    counts["workouts"] = cur.rowcount
+
+    cur.execute(f"""
+        INSERT INTO cardio_exercises (user_id, name)
+        SELECT {uid}, t
+        FROM generate_series(0, %(users)s - 1) u,
+             unnest(ARRAY['Run', 'Bike', 'Row']) t
+    """, params)
+    counts["cardio_exercises"] = cur.rowcount
+
+    cur.execute(f"""
+        INSERT INTO cardio_workouts (user_id, workout_type, workout_date, time_minutes,
+                                     distance_km, difficulty_level, created_at)
+        SELECT {USER_ID_SQL.format(i="g %% %(users)s")},
+               (ARRAY['Run', 'Bike', 'Row'])[(g / %(users)s) %% 3 + 1],
+               DATE '2000-01-01' + (g / (%(users)s * 3))::int,
+               20 + g %% 40,
+               3 + (g %% 70) / 10.0,
+               (g %% 10 + 1) || '/10',
+               DATE '2000-01-01' + (g / (%(users)s * 3))::int + make_interval(secs => g %% 86400)
+        FROM generate_series(0, %(cardio)s - 1) g
+    """, params)
+    counts["cardio_workouts"] = cur.rowcount
+
+    cur.execute(f"""
+        INSERT INTO pips_scores (user_id, puzzle_date, difficulty, time_seconds)
+        SELECT {uid}, CURRENT_DATE - d, diff,
+               30 + ((u * 7919 + d * 104729 + length(diff) * 31) %% 600)
+        FROM generate_series(0, %(users)s - 1) u,
+             generate_series(0, %(days)s - 1) d,
+             unnest(%(difficulties)s::text[]) diff
+    """, {**params, "difficulties": PIPS_DIFFICULTIES})
+    counts["pips_scores"] = cur.rowcount
+
+    cur.execute(f"""
+        INSERT INTO nyt_scores (user_id, game, puzzle_date, score)
+        SELECT {uid}, game, CURRENT_DATE - d,
+               1 + ((u * 7919 + d * 104729 + length(game)) %% 6)
+        FROM generate_series(0, %(users)s - 1) u,
+             generate_series(0, %(days)s - 1) d,
+             unnest(%(games)s::text[]) game
+    """, {**params, "games": NYT_GAMES})
+    counts["nyt_scores"] = cur.rowcount
+    return counts
+
+
+def _series(name, start, stop):
+    """A recursive CTE yielding name = start..stop inclusive (SQLite has no generate_series)."""
+    return f"{name}({name}) AS (SELECT {start} UNION ALL SELECT {name} + 1 FROM {name} WHERE {name} < {stop})"
+
+
+def _values(name, items):
+    return f"{name}({name}) AS (VALUES {', '.join(f'({i!r})' for i in items)})"
+
+
+def _seed_sqlite(conn, params):
+    """The same data as _seed_postgres, in SQLite's dialect."""
+    uid = SQLITE_USER_ID_SQL.format(i="u")
+    users = _series("u", 0, ":users - 1")
+    counts = {}
+
+    # INSERT comes before WITH: sqlite3 reports a rowcount of -1 for a
+    # statement that starts with WITH.
+    counts["users"] = conn.execute(f"""
+        INSERT INTO users (id, email)
+        WITH RECURSIVE {users}
+        SELECT {uid}, 'user' || u || '@example.com' FROM u
+    """, params).rowcount
+
+    # Every other user has a display name.
+    counts["family_members"] = conn.execute(f"""
+        INSERT INTO family_members (user_id, display_name)
+        WITH RECURSIVE {users}
+        SELECT {uid}, 'Player ' || u FROM u WHERE u % 2 = 0
+    """, params).rowcount
+
+    counts["exercises"] = conn.execute(f"""
+        INSERT INTO exercises (user_id, name)
+        WITH RECURSIVE {users}, {_series("x", 1, ":epu")}
+        SELECT {uid}, 'Lift ' || x FROM u, x
+    """, params).rowcount
+
+    # Same layout as Postgres: workout g belongs to user g % users and two
+    # days pass per full round of every user's exercises.
+    counts["workouts"] = conn.execute(f"""
+        INSERT INTO workouts (user_id, exercise_id, workout_date, weight, sets,
+                              target_reps, achieved_reps, success, scheme, created_at)
+        WITH RECURSIVE {_series("g", 0, ":workouts - 1")}
+        SELECT e.user_id, e.id, s.workout_date,
+               20 + (s.g % 40) * 2.5, 3,
+               CASE s.g % 3 WHEN 0 THEN 15 WHEN 1 THEN 10 ELSE 5 END,
+               CASE s.g % 3 WHEN 0 THEN 15 WHEN 1 THEN 10 ELSE 5 END - (s.g % 4 = 0),
+               s.g % 4 <> 0,
+               CASE s.g % 3 WHEN 0 THEN '3 x 15' WHEN 1 THEN '3 x 10' ELSE '3 x 5' END,
+               datetime(s.workout_date, '+' || (s.g % 86400) || ' seconds')
+        FROM (
+            SELECT g,
+                   {SQLITE_USER_ID_SQL.format(i="g % :users")} AS user_id,
+                   'Lift ' || ((g / :users) % :epu + 1) AS name,
+                   date('2000-01-01', '+' || (g / (:users * :epu) * 2) || ' days') AS workout_date
+            FROM g
+        ) s
+        JOIN exercises e ON e.user_id = s.user_id AND e.name = s.name
+    """, params).rowcount
+
+    counts["cardio_exercises"] = conn.execute(f"""
+        INSERT INTO cardio_exercises (user_id, name)
+        WITH RECURSIVE {users}, {_values("t", ["Run", "Bike", "Row"])}
+        SELECT {uid}, t FROM u, t
+    """, params).rowcount
+
+    counts["cardio_workouts"] = conn.execute(f"""
+        INSERT INTO cardio_workouts (user_id, workout_type, workout_date, time_minutes,
+                                     distance_km, difficulty_level, created_at)
+        WITH RECURSIVE {_series("g", 0, ":cardio - 1")}
+        SELECT {SQLITE_USER_ID_SQL.format(i="g % :users")},
+               CASE (g / :users) % 3 WHEN 0 THEN 'Run' WHEN 1 THEN 'Bike' ELSE 'Row' END,
+               date('2000-01-01', '+' || (g / (:users * 3)) || ' days'),
+               20 + g % 40,
+               3 + (g % 70) / 10.0,
+               (g % 10 + 1) || '/10',
+               datetime('2000-01-01', '+' || (g / (:users * 3)) || ' days', '+' || (g % 86400) || ' seconds')
+        FROM g
+    """, params).rowcount
+
+    counts["pips_scores"] = conn.execute(f"""
+        INSERT INTO pips_scores (user_id, puzzle_date, difficulty, time_seconds)
+        WITH RECURSIVE {users}, {_series("d", 0, ":days - 1")}, {_values("diff", PIPS_DIFFICULTIES)}
+        SELECT {uid}, date('now', 'localtime', '-' || d || ' days'), diff,
+               30 + ((u * 7919 + d * 104729 + length(diff) * 31) % 600)
+        FROM u, d, diff
+    """, params).rowcount
+
+    counts["nyt_scores"] = conn.execute(f"""
+        INSERT INTO nyt_scores (user_id, game, puzzle_date, score)
+        WITH RECURSIVE {users}, {_series("d", 0, ":days - 1")}, {_values("game", NYT_GAMES)}
+        SELECT {uid}, game, date('now', 'localtime', '-' || d || ' days'),
+               1 + ((u * 7919 + d * 104729 + length(game)) % 6)
+        FROM u, d, game
+    """, params).rowcount
+    return counts
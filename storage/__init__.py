@@ -0,0 +1,32 @@
+"""
+Storage backends behind db.py.
+
+Pick one with the STORAGE_BACKEND setting:
+
+- "postgres" (default): Supabase / any Postgres at DATABASE_URL.
+- "sqlite": an embedded database file at SQLITE_PATH (default tracker.db,
+  next to the app), for single-node or offline installs. It is this
+  app's own schema, not the legacy lifting.db that legacy_import.py
+  reads from.
+
+Each backend's driver is only imported when that backend is selected.
+"""
+import streamlit as st
+
+from config import get_setting
+from storage.base import LEADERBOARD_PERIODS, DuplicateWrite, Repository
+
+BACKENDS = ["postgres", "sqlite"]
+
+
+@st.cache_resource
+def get_backend():
+    """The configured Repository, one per process."""
+    name = get_setting("STORAGE_BACKEND", "postgres")
+    if name == "postgres":
+        from storage.postgres import PostgresRepository
+        return PostgresRepository(get_setting("DATABASE_URL"))
+    if name == "sqlite":
+        from storage.sqlite import SQLiteRepository
+        return SQLiteRepository(get_setting("SQLITE_PATH", "tracker.db"))
+    raise ValueError(f"Unknown STORAGE_BACKEND {name!r}; expected one of {BACKENDS}")
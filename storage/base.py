@@ -0,0 +1,812 @@
+"""
+The interface every storage backend implements, plus the pieces of query
+building and row shaping the backends share.
+
+Backends know nothing about Streamlit: every per-user method takes the
+user_id explicitly, and caching, instrumentation and the session lookup
+all stay in db.py.
+
+The reads a page makes on load also have *_async versions, which
+db.fetch_concurrently awaits together on event_loop's shared loop.
+"""
+import asyncio
+import datetime
+from abc import ABC, abstractmethod
+
+import pandas as pd
+
+import analytics
+import games
+import progression
+from frames import typed_frame
+
+LEADERBOARD_PERIODS = ["weekly", "monthly", "all"]
+
+
+class DuplicateWrite(Exception):
+    """A write's idempotency key was already applied; nothing was written."""
+
+
+# Time buckets for the chart series; weeks start on Monday.
+CHART_BUCKETS = ["day", "week", "month"]
+
+# Columns of the "previous workout" dict, in exercise_progress column order.
+PREVIOUS_COLUMNS = ["date", "weight", "sets", "target_reps", "achieved_reps", "success", "scheme"]
+
+# SELECT list shared by get_progress / get_all_progress in every backend.
+PROGRESS_COLUMNS = """
+    e.name, p.workout_date, p.weight, p.sets, p.target_reps,
+    p.achieved_reps, p.success, p.scheme,
+    p.rule, p.next_weight, p.next_sets, p.next_target_reps, p.next_scheme
+"""
+
+WORKOUT_HISTORY_SELECT = """
+    SELECT w.id,
+           w.workout_date AS "Date",
+           e.name AS "Exercise",
+           CAST(w.weight AS DOUBLE PRECISION) AS "Weight",
+           w.sets AS "Sets",
+           w.target_reps AS "Target Reps",
+           w.achieved_reps AS "Achieved Reps",
+           w.success AS "Success",
+           w.scheme AS "Scheme"
+    FROM workouts w
+    JOIN exercises e ON w.exercise_id = e.id
+"""
+
+CARDIO_HISTORY_SELECT = """
+    SELECT c.id,
+           c.workout_date AS "Date",
+           c.workout_type AS "Workout Type",
+           CAST(c.time_minutes AS DOUBLE PRECISION) AS "Time (min)",
+           CAST(c.distance_km AS DOUBLE PRECISION) AS "Distance (km)",
+           c.difficulty_level AS "Difficulty"
+    FROM cardio_workouts c
+"""
+
+# Column types of the history reads (see frames.py). Numeric columns are
+# cast to double precision above so they arrive as floats, not Decimals.
+WORKOUT_HISTORY_TYPES = {
+    "id": "int64[pyarrow]",
+    "Date": "date32[pyarrow]",
+    "Exercise": "category",
+    "Weight": "float32[pyarrow]",
+    "Sets": "int32[pyarrow]",
+    "Target Reps": "int32[pyarrow]",
+    "Achieved Reps": "int32[pyarrow]",
+    "Success": "bool[pyarrow]",
+    "Scheme": "category",
+}
+
+CARDIO_HISTORY_TYPES = {
+    "id": "int64[pyarrow]",
+    "Date": "date32[pyarrow]",
+    "Workout Type": "category",
+    "Time (min)": "float32[pyarrow]",
+    "Distance (km)": "float32[pyarrow]",
+    "Difficulty": "category",
+}
+
+
+def history_query(select, table, user_id, filters, start_date, end_date, limit, cursor, param="%s"):
+    """
+    Build a filtered, keyset-paginated history query ordered newest first.
+    filters maps column -> value; None values are skipped. cursor is the
+    (workout_date, id) of the last row of the previous page. param is the
+    driver's placeholder.
+    """
+    where = [f"{table}.user_id = {param}"]
+    params = [user_id]
+    for column, value in filters.items():
+        if value is not None:
+            where.append(f"{column} = {param}")
+            params.append(value)
+    if start_date is not None:
+        where.append(f"{table}.workout_date >= {param}")
+        params.append(start_date)
+    if end_date is not None:
+        where.append(f"{table}.workout_date <= {param}")
+        params.append(end_date)
+    if cursor is not None:
+        where.append(f"({table}.workout_date, {table}.id) < ({param}, {param})")
+        params.extend(cursor)
+    query = f"""
+        {select}
+        WHERE {" AND ".join(where)}
+        ORDER BY {table}.workout_date DESC, {table}.id DESC
+    """
+    if limit is not None:
+        query += f" LIMIT {param}"
+        params.append(limit)
+    return query, params
+
+
+def progress_params(user_id, exercise_id, prev, rule):
+    """One exercise_progress row: the previous workout plus the rule's suggestion."""
+    nxt = progression.suggest(prev, rule)
+    return (
+        user_id, exercise_id, prev["date"], prev["weight"], prev["sets"], prev["target_reps"],
+        prev["achieved_reps"], prev["success"], prev["scheme"], rule,
+        nxt["weight"], nxt["sets"], nxt["target_reps"], nxt["scheme"],
+    )
+
+
+def progress_from_row(row):
+    """Split a PROGRESS_COLUMNS row into (name, previous workout, rule, suggestion)."""
+    prev = dict(zip(PREVIOUS_COLUMNS, row[1:8]))
+    suggestion = {
+        "weight": float(row[9]),
+        "sets": row[10],
+        "target_reps": row[11],
+        "scheme": row[12],
+    }
+    return row[0], prev, row[8], suggestion
+
+
+def latest_per_exercise(entries):
+    """
+    The latest entry per exercise_name, as (name, prev) pairs: the one with
+    the latest workout_date, the last of those on a tie.
+    """
+    latest = {}
+    for e in entries:
+        kept = latest.get(e["exercise_name"])
+        if kept is None or str(kept["workout_date"]) <= str(e["workout_date"]):
+            latest[e["exercise_name"]] = e
+    return [(name, {"date": e["workout_date"], **e}) for name, e in latest.items()]
+
+
+# --- Personal records ---
+# Strength records per (user, exercise): the heaviest weight for each
+# achieved rep count, the best Epley e1RM and the biggest session (one
+# day's) tonnage. Cardio records per (user, workout type): the fastest pace
+# in min/km and the longest distance. Values are double precision and
+# computed the same way here and in the SQL below, so re-logging a record
+# exactly never counts as beating it.
+LOWER_IS_BETTER = {"pace"}
+
+# Upserts that only ever move a record forward, whatever order sessions
+# are logged in. {param} is the backend's placeholder, {now} its timestamp.
+STRENGTH_RECORD_UPSERT_SQL = """
+    INSERT INTO personal_records (user_id, exercise_id, record, reps, value, workout_date)
+    VALUES ({param}, {param}, {param}, {param}, {param}, {param})
+    ON CONFLICT (user_id, exercise_id, record, reps) DO UPDATE
+    SET value = excluded.value,
+        workout_date = excluded.workout_date,
+        updated_at = {now}
+    WHERE personal_records.value < excluded.value
+"""
+
+CARDIO_RECORD_UPSERT_SQL = """
+    INSERT INTO cardio_records (user_id, workout_type, record, value, workout_date)
+    VALUES ({param}, {param}, {param}, {param}, {param})
+    ON CONFLICT (user_id, workout_type, record) DO UPDATE
+    SET value = excluded.value,
+        workout_date = excluded.workout_date,
+        updated_at = {now}
+    WHERE CASE WHEN excluded.record = 'pace' THEN excluded.value < cardio_records.value
+               ELSE excluded.value > cardio_records.value END
+"""
+
+# One day's tonnage for exercises in a session. {real} is the backend's
+# double precision type, {param} its placeholder.
+SESSION_VOLUME_SQL = """
+    SELECT exercise_id, workout_date, SUM(CAST(weight AS {real}) * sets * achieved_reps)
+    FROM workouts
+    WHERE user_id = {param} AND exercise_id IN ({ids}) AND workout_date IN ({dates})
+    GROUP BY exercise_id, workout_date
+"""
+
+# Rebuild strength records from history; {and_user} optionally filters to one user.
+STRENGTH_RECORDS_INSERT_SQL = """
+INSERT INTO personal_records (user_id, exercise_id, record, reps, value, workout_date)
+WITH lifts AS (
+    SELECT user_id, exercise_id, workout_date, achieved_reps AS reps,
+           CAST(weight AS {real}) AS weight,
+           CASE WHEN achieved_reps = 1 THEN CAST(weight AS {real})
+                ELSE CAST(weight AS {real}) * (1 + CAST(achieved_reps AS {real}) / 30) END AS e1rm
+    FROM workouts
+    WHERE achieved_reps > 0 AND weight IS NOT NULL {and_user}
+),
+sessions AS (
+    SELECT user_id, exercise_id, workout_date,
+           SUM(CAST(weight AS {real}) * sets * achieved_reps) AS volume
+    FROM workouts
+    WHERE achieved_reps > 0 AND weight IS NOT NULL AND sets IS NOT NULL {and_user}
+    GROUP BY user_id, exercise_id, workout_date
+),
+candidates AS (
+    SELECT user_id, exercise_id, 'weight' AS record, reps, weight AS value, workout_date FROM lifts
+    UNION ALL
+    SELECT user_id, exercise_id, 'e1rm', 0, e1rm, workout_date FROM lifts
+    UNION ALL
+    SELECT user_id, exercise_id, 'volume', 0, volume, workout_date FROM sessions
+),
+ranked AS (
+    SELECT candidates.*,
+           ROW_NUMBER() OVER (
+               PARTITION BY user_id, exercise_id, record, reps
+               ORDER BY value DESC, workout_date
+           ) AS rn
+    FROM candidates
+)
+SELECT user_id, exercise_id, record, reps, value, workout_date
+FROM ranked
+WHERE rn = 1
+"""
+
+CARDIO_RECORDS_INSERT_SQL = """
+INSERT INTO cardio_records (user_id, workout_type, record, value, workout_date)
+WITH candidates AS (
+    SELECT user_id, workout_type, 'pace' AS record,
+           CAST(time_minutes AS {real}) / CAST(distance_km AS {real}) AS value, workout_date
+    FROM cardio_workouts
+    WHERE time_minutes > 0 AND distance_km > 0 {and_user}
+    UNION ALL
+    SELECT user_id, workout_type, 'distance', CAST(distance_km AS {real}), workout_date
+    FROM cardio_workouts
+    WHERE distance_km > 0 {and_user}
+),
+ranked AS (
+    SELECT candidates.*,
+           ROW_NUMBER() OVER (
+               PARTITION BY user_id, workout_type, record
+               ORDER BY CASE WHEN record = 'pace' THEN value ELSE -value END, workout_date
+           ) AS rn
+    FROM candidates
+)
+SELECT user_id, workout_type, record, value, workout_date
+FROM ranked
+WHERE rn = 1
+"""
+
+
+# --- Chart series ---
+# One row per time bucket, aggregated in the database so charts never load
+# raw history. {bucket} is the backend's expression for bucketing
+# workout_date; {exercise_filter} / {type_filter} are optional conditions.
+STRENGTH_SERIES_SQL = """
+    SELECT {bucket} AS bucket,
+           COUNT(*) AS sets_logged,
+           MAX(CAST(w.weight AS {real})) AS top_weight,
+           MAX(CASE WHEN w.achieved_reps = 1 THEN CAST(w.weight AS {real})
+                    WHEN w.achieved_reps > 1
+                    THEN CAST(w.weight AS {real}) * (1 + CAST(w.achieved_reps AS {real}) / 30) END) AS e1rm,
+           SUM(CAST(w.weight AS {real}) * w.sets * w.achieved_reps) AS tonnage
+    FROM workouts w
+    JOIN exercises e ON w.exercise_id = e.id
+    WHERE w.user_id = {param} AND e.user_id = w.user_id AND e.name = {param}
+    GROUP BY 1
+    ORDER BY 1
+"""
+
+CARDIO_SERIES_SQL = """
+    SELECT {bucket} AS bucket,
+           workout_type,
+           COUNT(*) AS sessions,
+           SUM(CAST(distance_km AS {real})) AS distance_km,
+           SUM(CAST(time_minutes AS {real})) AS time_minutes
+    FROM cardio_workouts
+    WHERE user_id = {param} {type_filter}
+    GROUP BY 1, 2
+    ORDER BY 2, 1
+"""
+
+
+# --- Games ---
+# One day's (or a range of days') scores for any set of games as
+# games.SCORE_COLUMNS. Pips is read from pips_scores with its difficulty as
+# the board; every other game from nyt_scores, on the single board "daily".
+def game_scores_query(names, start_date=None, end_date=None, param="%s"):
+    """(SQL, params) reading the named games' scores between two dates inclusive, in one statement."""
+    dates, date_params = "", []
+    if start_date is not None:
+        dates += f" AND puzzle_date >= {param}"
+        date_params.append(start_date)
+    if end_date is not None:
+        dates += f" AND puzzle_date <= {param}"
+        date_params.append(end_date)
+    parts, params = [], []
+    for name in names:
+        if games.get_game(name)["table"] == "pips_scores":
+            parts.append(f"""
+                SELECT CAST({param} AS TEXT) AS game, difficulty AS board, puzzle_date, user_id,
+                       time_seconds AS score
+                FROM pips_scores
+                WHERE 1 = 1{dates}
+            """)
+            params += [name, *date_params]
+    others = [name for name in names if games.get_game(name)["table"] == "nyt_scores"]
+    if others:
+        parts.append(f"""
+            SELECT game, 'daily' AS board, puzzle_date, user_id, score
+            FROM nyt_scores
+            WHERE game IN ({", ".join([param] * len(others))}){dates}
+        """)
+        params += [*others, *date_params]
+    return " UNION ALL ".join(parts), params
+
+
+# Points per game and player for one LEADERBOARD_PERIODS period: the
+# current week or month from game_daily_points (a range on its primary
+# key), all time from the game_total_points rollup. Players are user ids:
+# db.py names them from its directory after ranking.
+def period_bounds(period, today):
+    """(first day, last day) of the weekly (Monday to Sunday) or monthly period containing today."""
+    if period == "weekly":
+        start = today - datetime.timedelta(days=today.weekday())
+        return start, start + datetime.timedelta(days=6)
+    if period == "monthly":
+        start = today.replace(day=1)
+        return start, (start + datetime.timedelta(days=32)).replace(day=1) - datetime.timedelta(days=1)
+    raise ValueError(f"Invalid period {period!r}")
+
+
+def game_points_query(period, today, param="%s"):
+    """(SQL, params) ranking every registered game's players by their points in period."""
+    if period == "all":
+        return """
+            SELECT game, user_id, 'all-time' AS period, points AS total_points
+            FROM game_total_points
+            ORDER BY game, total_points DESC
+        """, []
+    start, end = period_bounds(period, today)
+    names = games.available_games()
+    return f"""
+        SELECT game, user_id, CAST({param} AS TEXT) AS period, SUM(points) AS total_points
+        FROM game_daily_points
+        WHERE game IN ({", ".join([param] * len(names))}) AND puzzle_date BETWEEN {param} AND {param}
+        GROUP BY game, user_id
+        ORDER BY game, total_points DESC
+    """, [start.isoformat(), *names, start, end]
+
+
+# Moves a player's all-time total by the change in one day's points.
+GAME_TOTAL_POINTS_UPSERT_SQL = """
+    INSERT INTO game_total_points (game, user_id, points)
+    VALUES ({param}, {param}, {param})
+    ON CONFLICT (game, user_id) DO UPDATE
+    SET points = game_total_points.points + excluded.points
+"""
+
+# Column types of game_scores_query and game_points_query results; period
+# is the period's first day, or 'all-time', as text.
+SCORE_TYPES = {
+    "game": "category",
+    "board": "category",
+    "puzzle_date": "date32[pyarrow]",
+    "user_id": "string[pyarrow]",
+    "score": "int32[pyarrow]",
+}
+
+GAME_POINTS_TYPES = {
+    "game": "category",
+    "user_id": "string[pyarrow]",
+    "period": "string[pyarrow]",
+    "total_points": "int64[pyarrow]",
+}
+
+# --- Users ---
+# Everyone who can appear on a leaderboard, with their email and display
+# name. {users} is the backend's table of signed-in users (auth.users on
+# Postgres); family members without a row there are included too.
+USER_DIRECTORY_SQL = """
+    SELECT u.id, u.email, f.display_name
+    FROM {users} u
+    LEFT JOIN family_members f ON f.user_id = u.id
+    UNION ALL
+    SELECT f.user_id, NULL, f.display_name
+    FROM family_members f
+    WHERE NOT EXISTS (SELECT 1 FROM {users} u WHERE u.id = f.user_id)
+"""
+
+GAME_POINTS_COLUMNS = ["game", "puzzle_date", "board", "user_id", "points"]
+
+
+def game_point_rows(ranked):
+    """games.daily_points output as GAME_POINTS_COLUMNS tuples of plain Python values."""
+    return list(zip(ranked["game"], ranked["puzzle_date"], ranked["board"], ranked["user_id"],
+                    ranked["points"].tolist()))
+
+def strength_candidates(entries, exercise_ids, session_volumes):
+    """
+    The best value a session sets per (exercise_id, record, reps), as
+    {key: (value, workout_date)}. session_volumes maps (exercise_id,
+    workout_date) to that day's tonnage, earlier logs included.
+    """
+    candidates = {}
+
+    def offer(key, value, workout_date):
+        if key not in candidates or value > candidates[key][0]:
+            candidates[key] = (value, workout_date)
+
+    for e in entries:
+        reps = e["achieved_reps"]
+        if not reps or reps <= 0 or e["weight"] is None:
+            continue
+        exercise_id = exercise_ids[e["exercise_name"]]
+        weight = float(e["weight"])
+        offer((exercise_id, "weight", int(reps)), weight, e["workout_date"])
+        offer((exercise_id, "e1rm", 0), float(analytics.epley(weight, reps)), e["workout_date"])
+    for (exercise_id, workout_date), volume in session_volumes.items():
+        if volume:
+            offer((exercise_id, "volume", 0), float(volume), workout_date)
+    return candidates
+
+
+def cardio_candidates(workout_type, time_minutes, distance_km, workout_date):
+    """{(workout_type, record): (value, workout_date)} for one cardio session."""
+    candidates = {}
+    if distance_km and distance_km > 0:
+        candidates[(workout_type, "distance")] = (float(distance_km), workout_date)
+        if time_minutes and time_minutes > 0:
+            candidates[(workout_type, "pace")] = (float(time_minutes) / float(distance_km), workout_date)
+    return candidates
+
+
+def improved_records(candidates, current):
+    """
+    The candidates that beat the current record for their key (or have
+    none yet), as (key, value, workout_date, previous value or None).
+    Keys are (exercise_id, record, reps) or (workout_type, record).
+    """
+    improved = []
+    for key, (value, workout_date) in candidates.items():
+        record = key[1]
+        previous = current.get(key)
+        if previous is None or (value < previous if record in LOWER_IS_BETTER else value > previous):
+            improved.append((key, value, workout_date, previous))
+    return improved
+
+
+def record_changes(user_id, improved, names=None):
+    """
+    improved_records output as (upsert params, change dict) pairs. names
+    maps exercise ids to names for strength keys; cardio keys carry the
+    workout type already.
+    """
+    changes = []
+    for key, value, workout_date, previous in improved:
+        subject, record, *reps = key
+        changes.append(((user_id, *key, value, workout_date), {
+            "exercise": names[subject] if names else subject,
+            "record": record,
+            "reps": reps[0] if reps else 0,
+            "value": value,
+            "previous": previous,
+            "workout_date": workout_date,
+        }))
+    return changes
+
+
+class Repository(ABC):
+    """
+    Storage for everything db.py reads and writes. Methods that return
+    tables return DataFrames with the column names the pages display.
+    """
+
+    name = None
+
+    # Errors that mean "try again later" (the database is unreachable or
+    # busy) rather than "this write is wrong"; the write queue retries them.
+    transient_errors = ()
+
+    # SQL dialect for the shared statements in this module: placeholder,
+    # double precision type and current timestamp.
+    sql_param = "%s"
+    sql_real = "float8"
+    sql_now = "now()"
+
+    @abstractmethod
+    def connection(self):
+        """Context manager yielding a native connection, for backend-specific tools."""
+
+    @abstractmethod
+    def version(self):
+        """Human-readable server or library version."""
+
+    @abstractmethod
+    def migrate(self, log=print):
+        """Bring the schema up to date. Returns the versions applied."""
+
+    def _read_frame(self, query, params, dtypes):
+        """A read's rows decoded straight into a typed DataFrame (see frames.py)."""
+        with self.connection() as conn:
+            cur = conn.execute(query, params)
+            return typed_frame([c[0] for c in cur.description], cur.fetchall(), dtypes)
+
+    # --- Users ---
+    def remember_user(self, user_id, email):
+        """Record a signed-in user's email for leaderboards, where the backend keeps users itself."""
+
+    @abstractmethod
+    def user_directory(self):
+        """(user_id, email, display_name) for everyone in USER_DIRECTORY_SQL; either name may be None."""
+
+    @abstractmethod
+    def set_display_name(self, user_id, display_name):
+        """Set the user's family_members display name, or remove it if display_name is None."""
+
+    # --- Exercises ---
+    @abstractmethod
+    def add_exercise(self, user_id, name): ...
+
+    @abstractmethod
+    def get_exercises(self, user_id): ...
+
+    @abstractmethod
+    def ensure_exercises(self, user_id, names):
+        """Create any missing exercises; return {name: exercise id} for all of the user's exercises."""
+
+    # --- Workouts ---
+    @abstractmethod
+    def log_workouts(self, user_id, entries, rule=progression.DEFAULT_RULE, keys=()):
+        """
+        Insert a session and update progression state and personal records
+        in one transaction. Returns the record_changes dicts of the records
+        the session improved. keys are the write queue's idempotency keys
+        for the entries (see _claim_writes).
+        """
+
+    @abstractmethod
+    def query_workouts(self, user_id, exercise_name, start_date, end_date, limit, cursor):
+        """History as a DataFrame of WORKOUT_HISTORY_SELECT columns (WORKOUT_HISTORY_TYPES), newest first."""
+
+    # --- Progression state ---
+    @abstractmethod
+    def get_progress(self, user_id, exercise_name):
+        """One PROGRESS_COLUMNS row, or None."""
+
+    @abstractmethod
+    def get_all_progress(self, user_id):
+        """Every PROGRESS_COLUMNS row for the user."""
+
+    @abstractmethod
+    def recompute_progression(self, user_id=None, rule=progression.DEFAULT_RULE, chunk_size=5000):
+        """Rebuild exercise_progress from history. Returns the number of rows written."""
+
+    # --- Personal records ---
+    @abstractmethod
+    def get_personal_records(self, user_id, exercise_name):
+        """(record, reps, value, workout_date) rows for one exercise."""
+
+    @abstractmethod
+    def get_cardio_records(self, user_id, workout_type):
+        """(record, value, workout_date) rows for one workout type."""
+
+    @abstractmethod
+    def rebuild_personal_records(self, user_id=None):
+        """Rebuild strength and cardio records from history. Returns the number of rows written."""
+
+    def _update_strength_records(self, cur, user_id, entries, exercise_ids):
+        """
+        Move the user's strength records forward for a session just written
+        on cur, inside the caller's transaction. Returns the change dicts.
+        """
+        ids = sorted({exercise_ids[e["exercise_name"]] for e in entries})
+        dates = sorted({e["workout_date"] for e in entries})
+        sessions = {(exercise_ids[e["exercise_name"]], e["workout_date"]) for e in entries}
+        p = self.sql_param
+        rows = cur.execute(SESSION_VOLUME_SQL.format(
+            real=self.sql_real, param=p, ids=", ".join([p] * len(ids)), dates=", ".join([p] * len(dates)),
+        ), (user_id, *ids, *dates)).fetchall()
+        volumes = {(r[0], r[1]): r[2] for r in rows if (r[0], r[1]) in sessions}
+        rows = cur.execute(f"""
+            SELECT exercise_id, record, reps, value FROM personal_records
+            WHERE user_id = {p} AND exercise_id IN ({", ".join([p] * len(ids))})
+        """, (user_id, *ids)).fetchall()
+        current = {(r[0], r[1], r[2]): r[3] for r in rows}
+        changes = record_changes(
+            user_id,
+            improved_records(strength_candidates(entries, exercise_ids, volumes), current),
+            {i: name for name, i in exercise_ids.items()},
+        )
+        if changes:
+            cur.executemany(STRENGTH_RECORD_UPSERT_SQL.format(param=p, now=self.sql_now),
+                            [params for params, _ in changes])
+        return [change for _, change in changes]
+
+    def _update_cardio_records(self, cur, user_id, workout_type, time_minutes, distance_km, workout_date):
+        """Cardio counterpart of _update_strength_records for one session."""
+        p = self.sql_param
+        rows = cur.execute(f"""
+            SELECT workout_type, record, value FROM cardio_records
+            WHERE user_id = {p} AND workout_type = {p}
+        """, (user_id, workout_type)).fetchall()
+        current = {(r[0], r[1]): r[2] for r in rows}
+        changes = record_changes(
+            user_id, improved_records(cardio_candidates(workout_type, time_minutes, distance_km, workout_date), current),
+        )
+        if changes:
+            cur.executemany(CARDIO_RECORD_UPSERT_SQL.format(param=p, now=self.sql_now),
+                            [params for params, _ in changes])
+        return [change for _, change in changes]
+
+    # --- Chart series ---
+    @abstractmethod
+    def strength_series(self, user_id, exercise_name, bucket):
+        """DataFrame of bucket, sets_logged, top_weight, e1rm, tonnage per CHART_BUCKETS bucket."""
+
+    @abstractmethod
+    def cardio_series(self, user_id, workout_type, bucket):
+        """DataFrame of bucket, workout_type, sessions, distance_km, time_minutes; all types if workout_type is None."""
+
+    # --- Cardio ---
+    @abstractmethod
+    def log_cardio(self, user_id, workout_type, time_minutes, distance_km, difficulty_level, workout_date, keys=()):
+        """Insert a session and update its cardio records in one transaction; returns the improved records."""
+
+    @abstractmethod
+    def query_cardio_workouts(self, user_id, workout_type, start_date, end_date, limit, cursor):
+        """History as a DataFrame of CARDIO_HISTORY_SELECT columns (CARDIO_HISTORY_TYPES), newest first."""
+
+    @abstractmethod
+    def get_last_cardio(self, user_id, workout_type):
+        """(workout_date, time_minutes, distance_km, difficulty_level) or None."""
+
+    @abstractmethod
+    def add_cardio_exercise(self, user_id, name): ...
+
+    @abstractmethod
+    def get_cardio_exercises(self, user_id): ...
+
+    # --- Games ---
+    @abstractmethod
+    def log_pips_score(self, user_id, difficulty, time_seconds, puzzle_date, keys=()):
+        """Upsert a score and re-rank that day's Pips points in the same transaction."""
+
+    @abstractmethod
+    def log_nyt_score(self, user_id, game, score, puzzle_date, notes=None, keys=()):
+        """Upsert a score and re-rank that day's points for the game in the same transaction."""
+
+    @abstractmethod
+    def game_day_scores(self, puzzle_date, names):
+        """DataFrame of games.SCORE_COLUMNS (SCORE_TYPES) for the named games on one day."""
+
+    @abstractmethod
+    def rebuild_game_points(self, chunk_days=31):
+        """Backfill game_daily_points from every score. Returns the number of rows written."""
+
+    @abstractmethod
+    def game_points_leaderboard(self, period, today):
+        """
+        DataFrame of game, user_id, period, total_points (GAME_POINTS_TYPES)
+        for the LEADERBOARD_PERIODS period containing today.
+        """
+
+    def _lock_game_day(self, cur, game, puzzle_date):
+        """Serialise re-ranking of one game's day; a no-op where writers already queue."""
+
+    def _refresh_game_points(self, cur, game, puzzle_date):
+        """
+        Re-rank one game's day from its scores on cur, inside the caller's
+        transaction, so the points commit (or roll back) with the score.
+        """
+        p = self.sql_param
+        self._lock_game_day(cur, game, puzzle_date)
+        query, params = game_scores_query([game], puzzle_date, puzzle_date, param=p)
+        scores = pd.DataFrame(cur.execute(query, params).fetchall(), columns=games.SCORE_COLUMNS)
+        before = cur.execute(f"""
+            SELECT user_id, SUM(points) FROM game_daily_points
+            WHERE game = {p} AND puzzle_date = {p}
+            GROUP BY user_id
+        """, (game, puzzle_date)).fetchall()
+        cur.execute(f"DELETE FROM game_daily_points WHERE game = {p} AND puzzle_date = {p}",
+                    (game, puzzle_date))
+        ranked = games.daily_points(scores)
+        self._insert_game_points(cur, ranked)
+
+        # Keep the all-time rollup in step: each player's change that day.
+        change = {}
+        for user_id, points in before:
+            change[str(user_id)] = change.get(str(user_id), 0) - points
+        for user_id, points in zip(ranked["user_id"], ranked["points"].tolist()):
+            change[str(user_id)] = change.get(str(user_id), 0) + points
+        rows = [(game, user_id, points) for user_id, points in change.items() if points]
+        if rows:
+            cur.executemany(GAME_TOTAL_POINTS_UPSERT_SQL.format(param=p), rows)
+
+    def _rebuild_game_points(self, cur, chunk_days=31):
+        """
+        Replace game_daily_points from every registered game's scores on cur,
+        chunk_days of puzzles at a time. Returns the number of rows written.
+        """
+        cur.execute("DELETE FROM game_daily_points")
+        first, last = cur.execute("""
+            SELECT MIN(puzzle_date), MAX(puzzle_date)
+            FROM (SELECT puzzle_date FROM pips_scores
+                  UNION ALL
+                  SELECT puzzle_date FROM nyt_scores) d
+        """).fetchone()
+        if first is None:
+            self._rebuild_total_points(cur)
+            return 0
+        # SQLite hands back the text it stores.
+        start = datetime.date.fromisoformat(str(first))
+        last = datetime.date.fromisoformat(str(last))
+        names = games.available_games()
+        rows = 0
+        while start <= last:
+            end = start + datetime.timedelta(days=chunk_days - 1)
+            query, params = game_scores_query(names, start, end, param=self.sql_param)
+            scores = pd.DataFrame(cur.execute(query, params).fetchall(), columns=games.SCORE_COLUMNS)
+            ranked = games.daily_points(scores)
+            self._insert_game_points(cur, ranked)
+            rows += len(ranked)
+            start = end + datetime.timedelta(days=1)
+        self._rebuild_total_points(cur)
+        return rows
+
+    def _rebuild_total_points(self, cur):
+        """Replace the game_total_points rollup from game_daily_points on cur."""
+        cur.execute("DELETE FROM game_total_points")
+        cur.execute("""
+            INSERT INTO game_total_points (game, user_id, points)
+            SELECT game, user_id, SUM(points) FROM game_daily_points
+            GROUP BY game, user_id
+        """)
+
+    def _insert_game_points(self, cur, ranked):
+        if ranked.empty:
+            return
+        p = self.sql_param
+        cur.executemany(f"""
+            INSERT INTO game_daily_points ({", ".join(GAME_POINTS_COLUMNS)})
+            VALUES ({", ".join([p] * len(GAME_POINTS_COLUMNS))})
+        """, game_point_rows(ranked))
+
+    # --- Idempotent writes ---
+    def _claim_writes(self, cur, keys):
+        """
+        Record the write queue's idempotency keys on cur, inside the write's
+        own transaction. Raises DuplicateWrite if any of them was applied
+        before, which rolls the whole write back.
+        """
+        if not keys:
+            return
+        values = ", ".join([f"({self.sql_param})"] * len(keys))
+        claimed = cur.execute(
+            f"INSERT INTO applied_writes (key) VALUES {values} ON CONFLICT (key) DO NOTHING", list(keys)
+        ).rowcount
+        if claimed < len(keys):
+            raise DuplicateWrite(f"{len(keys) - claimed} of {len(keys)} writes were already applied")
+
+    @abstractmethod
+    def prune_applied_writes(self, days):
+        """Forget idempotency keys applied more than days ago. Returns how many."""
+
+    # --- Async reads ---
+    # By default these run the sync read on a worker thread; backends with an
+    # async driver override them. Only await them on event_loop's loop.
+    async def get_exercises_async(self, user_id):
+        return await asyncio.to_thread(self.get_exercises, user_id)
+
+    async def get_all_progress_async(self, user_id):
+        return await asyncio.to_thread(self.get_all_progress, user_id)
+
+    async def query_workouts_async(self, user_id, exercise_name, start_date, end_date, limit, cursor):
+        return await asyncio.to_thread(self.query_workouts, user_id, exercise_name,
+                                       start_date, end_date, limit, cursor)
+
+    async def game_day_scores_async(self, puzzle_date, names):
+        return await asyncio.to_thread(self.game_day_scores, puzzle_date, names)
+
+    async def game_points_leaderboard_async(self, period):
+        return await asyncio.to_thread(self.game_points_leaderboard, period)
+
+    # --- Bulk import and export ---
+    @abstractmethod
+    def legacy_checkpoint(self, user_id, source):
+        """Last legacy EntryID imported for the user from source (0 if none)."""
+
+    @abstractmethod
+    def load_legacy_chunk(self, user_id, source, rows, last_entry_id):
+        """
+        Insert workouts rows (user_id, exercise_id, workout_date, weight, sets,
+        target_reps, achieved_reps, success, scheme, created_at) and advance
+        the checkpoint in one transaction.
+        """
+
+    @abstractmethod
+    def iter_export(self, dataset, user_id, chunk_size):
+        """Yield lists of row tuples for an export.DATASETS dataset, oldest first."""
@@ -0,0 +1,588 @@
+"""
+Postgres (Supabase) backend: a psycopg connection pool, schema managed by
+the versioned SQL files in migrations/, and user names from auth.users.
+The *_async reads go through a second, async pool of psycopg
+AsyncConnections.
+"""
+import asyncio
+import pathlib
+from contextlib import contextmanager
+
+import pandas as pd
+import psycopg
+from psycopg_pool import AsyncConnectionPool, ConnectionPool
+
+import progression
+from config import get_setting
+from frames import typed_frame
+from storage.base import (
+    CARDIO_HISTORY_SELECT,
+    CARDIO_HISTORY_TYPES,
+    CARDIO_RECORDS_INSERT_SQL,
+    CARDIO_SERIES_SQL,
+    GAME_POINTS_COLUMNS,
+    GAME_POINTS_TYPES,
+    PREVIOUS_COLUMNS,
+    PROGRESS_COLUMNS,
+    SCORE_TYPES,
+    STRENGTH_RECORDS_INSERT_SQL,
+    STRENGTH_SERIES_SQL,
+    USER_DIRECTORY_SQL,
+    WORKOUT_HISTORY_SELECT,
+    WORKOUT_HISTORY_TYPES,
+    Repository,
+    game_point_rows,
+    game_points_query,
+    game_scores_query,
+    history_query,
+    latest_per_exercise,
+    progress_params,
+)
+
+# --- Connection pool sizing (override in secrets if needed) ---
+POOL_MIN_SIZE = int(get_setting("DB_POOL_MIN_SIZE", 1))
+POOL_MAX_SIZE = int(get_setting("DB_POOL_MAX_SIZE", 10))
+POOL_TIMEOUT = float(get_setting("DB_POOL_TIMEOUT", 10))
+
+MIGRATIONS_DIR = pathlib.Path(__file__).parent.parent / "migrations"
+
+_EXERCISES_SQL = "SELECT name FROM exercises WHERE user_id = %s ORDER BY name"
+
+_PROGRESS_SELECT = f"""
+    SELECT {PROGRESS_COLUMNS}
+    FROM exercise_progress p
+    JOIN exercises e ON p.exercise_id = e.id
+    WHERE p.user_id = %s
+"""
+
+_UPSERT_PROGRESS_SQL = """
+    INSERT INTO exercise_progress (
+        user_id, exercise_id, workout_date, weight, sets, target_reps,
+        achieved_reps, success, scheme, rule,
+        next_weight, next_sets, next_target_reps, next_scheme
+    )
+    VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)
+    ON CONFLICT (user_id, exercise_id) DO UPDATE
+    SET workout_date = EXCLUDED.workout_date,
+        weight = EXCLUDED.weight,
+        sets = EXCLUDED.sets,
+        target_reps = EXCLUDED.target_reps,
+        achieved_reps = EXCLUDED.achieved_reps,
+        success = EXCLUDED.success,
+        scheme = EXCLUDED.scheme,
+        rule = EXCLUDED.rule,
+        next_weight = EXCLUDED.next_weight,
+        next_sets = EXCLUDED.next_sets,
+        next_target_reps = EXCLUDED.next_target_reps,
+        next_scheme = EXCLUDED.next_scheme,
+        updated_at = now()
+    WHERE exercise_progress.workout_date <= EXCLUDED.workout_date
+"""
+
+_BUCKET_EXPRS = {
+    "day": "{column}",
+    "week": "DATE_TRUNC('week', {column})::date",
+    "month": "DATE_TRUNC('month', {column})::date",
+}
+
+
+def _game_day_query(puzzle_date, names):
+    return game_scores_query(names, puzzle_date, puzzle_date)
+
+
+def _frame(description, rows, dtypes):
+    """A typed DataFrame (see frames.py) from a cursor's description and rows."""
+    return typed_frame([c.name for c in description], rows, dtypes)
+
+
+# Numeric columns are cast to float8 so they arrive as floats, not Decimals.
+_EXPORT_QUERIES = {
+    "workouts": """
+        SELECT w.workout_date, e.name AS exercise, w.weight::float8, w.sets,
+               w.target_reps, w.achieved_reps, w.success, w.scheme
+        FROM workouts w
+        JOIN exercises e ON w.exercise_id = e.id
+        WHERE w.user_id = %s
+        ORDER BY w.workout_date, w.id
+    """,
+    "cardio": """
+        SELECT workout_date, workout_type, time_minutes::float8,
+               distance_km::float8, difficulty_level
+        FROM cardio_workouts
+        WHERE user_id = %s
+        ORDER BY workout_date, id
+    """,
+    "pips": """
+        SELECT puzzle_date, difficulty, time_seconds
+        FROM pips_scores
+        WHERE user_id = %s
+        ORDER BY puzzle_date, difficulty
+    """,
+    "nyt": """
+        SELECT puzzle_date, game, score, notes
+        FROM nyt_scores
+        WHERE user_id = %s
+        ORDER BY puzzle_date, game
+    """,
+}
+
+
+class PostgresRepository(Repository):
+    name = "postgres"
+    # Lost connections, pool timeouts, serialization failures and deadlocks.
+    transient_errors = (psycopg.OperationalError, psycopg.InterfaceError)
+
+    def __init__(self, url):
+        """
+        One pool per process, shared by every session and script thread.
+        Connections are health-checked on checkout and the pool reconnects
+        in the background if the database drops them.
+        """
+        self.pool = ConnectionPool(
+            url,
+            min_size=POOL_MIN_SIZE,
+            max_size=POOL_MAX_SIZE,
+            timeout=POOL_TIMEOUT,
+            check=ConnectionPool.check_connection,
+            # The Supabase pooler runs in transaction mode, which does not
+            # support server-side prepared statements.
+            kwargs={"prepare_threshold": None},
+            open=False,
+        )
+        self.pool.open()
+        self.url = url
+        self._async_pool = None
+        self._async_pool_opened = None
+
+    @contextmanager
+    def connection(self):
+        """
+        Check a connection out of the pool for the duration of the block.
+        The transaction is committed on success, rolled back on error, and
+        the connection is returned to the pool either way.
+        """
+        with self.pool.connection() as conn:
+            yield conn
+
+    def version(self):
+        with self.connection() as conn:
+            return "PostgreSQL " + conn.execute("SHOW server_version").fetchone()[0]
+
+    def migrate(self, log=print):
+        """
+        Apply the versioned SQL files in migrations/ in order. Each file runs
+        in its own transaction and is recorded in schema_migrations, so
+        re-running only applies files that haven't been applied yet.
+        """
+        with self.connection() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS schema_migrations (
+                    version TEXT PRIMARY KEY,
+                    applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+                )
+            """)
+            done = {r[0] for r in conn.execute("SELECT version FROM schema_migrations")}
+            conn.commit()
+
+        versions = []
+        for path in sorted(MIGRATIONS_DIR.glob("*.sql")):
+            version = path.stem
+            if version in done:
+                continue
+            with self.connection() as conn:
+                with conn.cursor() as cur:
+                    cur.execute(path.read_text())
+                    cur.execute("INSERT INTO schema_migrations (version) VALUES (%s)", (version,))
+                conn.commit()
+            log(f"Applied {version}")
+            versions.append(version)
+        return versions
+
+    # ----------------- Users -----------------
+    def user_directory(self):
+        with self.connection() as conn:
+            return conn.execute(USER_DIRECTORY_SQL.format(users="auth.users")).fetchall()
+
+    def set_display_name(self, user_id, display_name):
+        with self.connection() as conn:
+            if display_name is None:
+                conn.execute("DELETE FROM family_members WHERE user_id = %s", (user_id,))
+            else:
+                conn.execute("""
+                    INSERT INTO family_members (user_id, display_name)
+                    VALUES (%s, %s)
+                    ON CONFLICT (user_id) DO UPDATE SET display_name = EXCLUDED.display_name
+                """, (user_id, display_name))
+            conn.commit()
+
+    # ----------------- Exercises -----------------
+    def add_exercise(self, user_id, name):
+        with self.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    INSERT INTO exercises (user_id, name)
+                    VALUES (%s, %s)
+                    ON CONFLICT (user_id, name) DO NOTHING
+                """, (user_id, name))
+                conn.commit()
+
+    def get_exercises(self, user_id):
+        with self.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(_EXERCISES_SQL, (user_id,))
+                return [r[0] for r in cur.fetchall()]
+
+    def ensure_exercises(self, user_id, names):
+        with self.connection() as conn:
+            with conn.cursor() as cur:
+                cur.executemany("""
+                    INSERT INTO exercises (user_id, name)
+                    VALUES (%s, %s)
+                    ON CONFLICT (user_id, name) DO NOTHING
+                """, [(user_id, name) for name in names])
+                cur.execute("SELECT name, id FROM exercises WHERE user_id = %s", (user_id,))
+                ids = dict(cur.fetchall())
+            conn.commit()
+        return ids
+
+    # ----------------- Workouts -----------------
+    def log_workouts(self, user_id, entries, rule=progression.DEFAULT_RULE, keys=()):
+        """Exercise ids are resolved in one query and all rows go in with one COPY."""
+        names = sorted({e["exercise_name"] for e in entries})
+        with self.connection() as conn:
+            with conn.cursor() as cur:
+                self._claim_writes(cur, keys)
+                # Look up every exercise_id at once
+                cur.execute("SELECT name, id FROM exercises WHERE user_id = %s AND name = ANY(%s)",
+                            (user_id, names))
+                exercise_ids = dict(cur.fetchall())
+                for name in names:
+                    if name not in exercise_ids:
+                        raise RuntimeError(f"Exercise '{name}' not found for user {user_id}")
+
+                with cur.copy("""
+                    COPY workouts (user_id, exercise_id, workout_date, weight, sets, target_reps, achieved_reps, success, scheme)
+                    FROM STDIN
+                """) as copy_in:
+                    for e in entries:
+                        copy_in.write_row((
+                            user_id, exercise_ids[e["exercise_name"]], e["workout_date"], e["weight"], e["sets"],
+                            e["target_reps"], e["achieved_reps"], e["success"], e["scheme"],
+                        ))
+
+                # The last entry per exercise becomes its progression state.
+                cur.executemany(_UPSERT_PROGRESS_SQL, [
+                    progress_params(user_id, exercise_ids[name], prev, rule)
+                    for name, prev in latest_per_exercise(entries)
+                ])
+                records = self._update_strength_records(cur, user_id, entries, exercise_ids)
+                conn.commit()
+        return records
+
+    def query_workouts(self, user_id, exercise_name, start_date, end_date, limit, cursor):
+        query, params = history_query(WORKOUT_HISTORY_SELECT, "w", user_id, {"e.name": exercise_name},
+                                      start_date, end_date, limit, cursor)
+        return self._read_frame(query, params, WORKOUT_HISTORY_TYPES)
+
+    # ----------------- Progression state -----------------
+    def get_progress(self, user_id, exercise_name):
+        with self.connection() as conn:
+            with conn.cursor() as cur:
+                # (user_id, name) is unique, so this is one primary-key row.
+                cur.execute(_PROGRESS_SELECT + " AND e.user_id = p.user_id AND e.name = %s",
+                            (user_id, exercise_name))
+                return cur.fetchone()
+
+    def get_all_progress(self, user_id):
+        with self.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(_PROGRESS_SELECT, (user_id,))
+                return cur.fetchall()
+
+    def recompute_progression(self, user_id=None, rule=progression.DEFAULT_RULE, chunk_size=5000):
+        user_filter = "AND w.user_id = %s" if user_id else ""
+        params = (user_id,) if user_id else ()
+        total = 0
+        with self.connection() as conn:
+            with conn.cursor() as cur:
+                if user_id:
+                    cur.execute("DELETE FROM exercise_progress WHERE user_id = %s", (user_id,))
+                else:
+                    cur.execute("DELETE FROM exercise_progress")
+                with conn.cursor(name="recompute_progression") as latest:
+                    latest.execute(f"""
+                        SELECT DISTINCT ON (w.user_id, w.exercise_id)
+                               w.user_id, w.exercise_id, w.workout_date, w.weight, w.sets,
+                               w.target_reps, w.achieved_reps, w.success, w.scheme
+                        FROM workouts w
+                        WHERE TRUE {user_filter}
+                        ORDER BY w.user_id, w.exercise_id, w.created_at DESC, w.id DESC
+                    """, params)
+                    while True:
+                        rows = latest.fetchmany(chunk_size)
+                        if not rows:
+                            break
+                        cur.executemany(_UPSERT_PROGRESS_SQL, [
+                            progress_params(row[0], row[1], dict(zip(PREVIOUS_COLUMNS, row[2:])), rule)
+                            for row in rows
+                        ])
+                        total += len(rows)
+                conn.commit()
+        return total
+
+    # ----------------- Personal records -----------------
+    def get_personal_records(self, user_id, exercise_name):
+        with self.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    SELECT r.record, r.reps, r.value, r.workout_date
+                    FROM personal_records r
+                    JOIN exercises e ON r.exercise_id = e.id
+                    WHERE r.user_id = %s AND e.user_id = r.user_id AND e.name = %s
+                    ORDER BY r.record, r.reps
+                """, (user_id, exercise_name))
+                return cur.fetchall()
+
+    def get_cardio_records(self, user_id, workout_type):
+        with self.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    SELECT record, value, workout_date
+                    FROM cardio_records
+                    WHERE user_id = %s AND workout_type = %s
+                    ORDER BY record
+                """, (user_id, workout_type))
+                return cur.fetchall()
+
+    def rebuild_personal_records(self, user_id=None):
+        and_user = "AND user_id = %s" if user_id else ""
+        user_filter = "WHERE user_id = %s" if user_id else ""
+        params = (user_id,) if user_id else ()
+        rows = 0
+        with self.connection() as conn:
+            with conn.cursor() as cur:
+                for table, insert_sql in [("personal_records", STRENGTH_RECORDS_INSERT_SQL),
+                                          ("cardio_records", CARDIO_RECORDS_INSERT_SQL)]:
+                    # Logs that land mid-rebuild wait instead of being overwritten.
+                    cur.execute(f"LOCK TABLE {table} IN EXCLUSIVE MODE")
+                    cur.execute(f"DELETE FROM {table} {user_filter}", params)
+                    cur.execute(insert_sql.format(real=self.sql_real, and_user=and_user), params * 2)
+                    rows += cur.rowcount
+                conn.commit()
+        return rows
+
+    # ----------------- Chart series -----------------
+    def strength_series(self, user_id, exercise_name, bucket):
+        query = STRENGTH_SERIES_SQL.format(
+            bucket=_BUCKET_EXPRS[bucket].format(column="w.workout_date"), real=self.sql_real, param="%s",
+        )
+        with self.connection() as conn:
+            return pd.read_sql_query(query, conn, params=(user_id, exercise_name))
+
+    def cardio_series(self, user_id, workout_type, bucket):
+        query = CARDIO_SERIES_SQL.format(
+            bucket=_BUCKET_EXPRS[bucket].format(column="workout_date"), real=self.sql_real, param="%s",
+            type_filter="AND workout_type = %s" if workout_type else "",
+        )
+        params = (user_id, workout_type) if workout_type else (user_id,)
+        with self.connection() as conn:
+            return pd.read_sql_query(query, conn, params=params)
+
+    # ----------------- Cardio Workouts -----------------
+    def log_cardio(self, user_id, workout_type, time_minutes, distance_km, difficulty_level, workout_date, keys=()):
+        with self.connection() as conn:
+            with conn.cursor() as cur:
+                self._claim_writes(cur, keys)
+                cur.execute("""
+                    INSERT INTO cardio_workouts (user_id, workout_type, workout_date, time_minutes, distance_km, difficulty_level)
+                    VALUES (%s, %s, %s, %s, %s, %s)
+                """, (user_id, workout_type, workout_date, time_minutes, distance_km, difficulty_level))
+                records = self._update_cardio_records(cur, user_id, workout_type, time_minutes, distance_km,
+                                                      workout_date)
+                conn.commit()
+        return records
+
+    def query_cardio_workouts(self, user_id, workout_type, start_date, end_date, limit, cursor):
+        query, params = history_query(CARDIO_HISTORY_SELECT, "c", user_id, {"c.workout_type": workout_type},
+                                      start_date, end_date, limit, cursor)
+        return self._read_frame(query, params, CARDIO_HISTORY_TYPES)
+
+    def get_last_cardio(self, user_id, workout_type):
+        with self.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    SELECT workout_date, time_minutes, distance_km, difficulty_level
+                    FROM cardio_workouts
+                    WHERE user_id = %s AND workout_type = %s
+                    ORDER BY created_at DESC
+                    LIMIT 1
+                """, (user_id, workout_type))
+                return cur.fetchone()
+
+    def add_cardio_exercise(self, user_id, name):
+        with self.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    INSERT INTO cardio_exercises (user_id, name)
+                    VALUES (%s, %s)
+                    ON CONFLICT (user_id, name) DO NOTHING
+                """, (user_id, name))
+                conn.commit()
+
+    def get_cardio_exercises(self, user_id):
+        with self.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT name FROM cardio_exercises WHERE user_id = %s ORDER BY name", (user_id,))
+                return [r[0] for r in cur.fetchall()]
+
+    # ----------------- Pips & NYT Games -----------------
+    def log_pips_score(self, user_id, difficulty, time_seconds, puzzle_date, keys=()):
+        with self.connection() as conn:
+            with conn.cursor() as cur:
+                self._claim_writes(cur, keys)
+                cur.execute("""
+                    INSERT INTO pips_scores (user_id, puzzle_date, difficulty, time_seconds)
+                    VALUES (%s, %s, %s, %s)
+                    ON CONFLICT (user_id, puzzle_date, difficulty) DO UPDATE
+                    SET time_seconds = EXCLUDED.time_seconds
+                """, (user_id, puzzle_date, difficulty, time_seconds))
+                self._refresh_game_points(cur, "Pips", puzzle_date)
+                conn.commit()
+
+    def log_nyt_score(self, user_id, game, score, puzzle_date, notes=None, keys=()):
+        with self.connection() as conn:
+            with conn.cursor() as cur:
+                self._claim_writes(cur, keys)
+                cur.execute("""
+                    INSERT INTO nyt_scores (user_id, game, puzzle_date, score, notes)
+                    VALUES (%s, %s, %s, %s, %s)
+                    ON CONFLICT (user_id, game, puzzle_date) DO UPDATE
+                    SET score = EXCLUDED.score,
+                        notes = EXCLUDED.notes
+                """, (user_id, game, puzzle_date, score, notes))
+                self._refresh_game_points(cur, game, puzzle_date)
+                conn.commit()
+
+    def _lock_game_day(self, cur, game, puzzle_date):
+        # Concurrent submits for the same day would otherwise interleave
+        # their delete/insert.
+        cur.execute("SELECT pg_advisory_xact_lock(hashtext('game_daily_points:' || %s || ':' || %s::text))",
+                    (game, puzzle_date))
+
+    def _insert_game_points(self, cur, ranked):
+        with cur.copy(f"COPY game_daily_points ({', '.join(GAME_POINTS_COLUMNS)}) FROM STDIN") as copy:
+            for row in game_point_rows(ranked):
+                copy.write_row(row)
+
+    def prune_applied_writes(self, days):
+        with self.connection() as conn:
+            deleted = conn.execute("DELETE FROM applied_writes WHERE applied_at < now() - make_interval(days => %s)",
+                                   (days,)).rowcount
+            conn.commit()
+        return deleted
+
+    def game_day_scores(self, puzzle_date, names):
+        query, params = _game_day_query(puzzle_date, names)
+        return self._read_frame(query, params, SCORE_TYPES)
+
+    def rebuild_game_points(self, chunk_days=31):
+        with self.connection() as conn:
+            with conn.cursor() as cur:
+                # Scores logged mid-rebuild wait instead of being overwritten.
+                cur.execute("LOCK TABLE game_daily_points IN EXCLUSIVE MODE")
+                rows = self._rebuild_game_points(cur, chunk_days)
+                conn.commit()
+        return rows
+
+    def game_points_leaderboard(self, period, today):
+        query, params = game_points_query(period, today)
+        return self._read_frame(query, params, GAME_POINTS_TYPES)
+
+    # ----------------- Bulk import and export -----------------
+    def legacy_checkpoint(self, user_id, source):
+        with self.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    SELECT last_entry_id FROM legacy_import_checkpoints
+                    WHERE user_id = %s AND source = %s
+                """, (user_id, source))
+                row = cur.fetchone()
+        return row[0] if row else 0
+
+    def load_legacy_chunk(self, user_id, source, rows, last_entry_id):
+        with self.connection() as conn:
+            with conn.cursor() as cur:
+                with cur.copy("""
+                    COPY workouts (user_id, exercise_id, workout_date, weight, sets,
+                                   target_reps, achieved_reps, success, scheme, created_at)
+                    FROM STDIN
+                """) as copy_in:
+                    for row in rows:
+                        copy_in.write_row(row)
+                cur.execute("""
+                    INSERT INTO legacy_import_checkpoints (user_id, source, last_entry_id)
+                    VALUES (%s, %s, %s)
+                    ON CONFLICT (user_id, source) DO UPDATE
+                    SET last_entry_id = EXCLUDED.last_entry_id,
+                        updated_at = now()
+                """, (user_id, source, last_entry_id))
+                conn.commit()
+
+    def iter_export(self, dataset, user_id, chunk_size):
+        """Read through a named (server-side) cursor so memory stays flat."""
+        with self.connection() as conn:
+            with conn.cursor(name=f"export_{dataset}") as cur:
+                cur.itersize = chunk_size
+                cur.execute(_EXPORT_QUERIES[dataset], (user_id,))
+                while True:
+                    rows = cur.fetchmany(chunk_size)
+                    if not rows:
+                        break
+                    yield rows
+
+    # ----------------- Async reads -----------------
+    async def _async_connection_pool(self):
+        """
+        The AsyncConnectionPool behind the *_async reads, opened on first use.
+        It belongs to the loop that opened it, event_loop's shared one, which
+        is single-threaded: concurrent first callers all await the same open.
+        """
+        if self._async_pool_opened is None:
+            self._async_pool = AsyncConnectionPool(
+                self.url,
+                min_size=POOL_MIN_SIZE,
+                max_size=POOL_MAX_SIZE,
+                timeout=POOL_TIMEOUT,
+                check=AsyncConnectionPool.check_connection,
+                kwargs={"prepare_threshold": None},
+                open=False,
+            )
+            self._async_pool_opened = asyncio.ensure_future(self._async_pool.open())
+        await self._async_pool_opened
+        return self._async_pool
+
+    async def _fetch_async(self, query, params=None):
+        """(cursor description, rows) for a read on a pooled AsyncConnection."""
+        pool = await self._async_connection_pool()
+        async with pool.connection() as conn:
+            cur = await conn.execute(query, params)
+            return cur.description, await cur.fetchall()
+
+    async def get_exercises_async(self, user_id):
+        _, rows = await self._fetch_async(_EXERCISES_SQL, (user_id,))
+        return [r[0] for r in rows]
+
+    async def get_all_progress_async(self, user_id):
+        _, rows = await self._fetch_async(_PROGRESS_SELECT, (user_id,))
+        return rows
+
+    async def query_workouts_async(self, user_id, exercise_name, start_date, end_date, limit, cursor):
+        query, params = history_query(WORKOUT_HISTORY_SELECT, "w", user_id, {"e.name": exercise_name},
+                                      start_date, end_date, limit, cursor)
+        return _frame(*await self._fetch_async(query, params), WORKOUT_HISTORY_TYPES)
+
+    async def game_day_scores_async(self, puzzle_date, names):
+        return _frame(*await self._fetch_async(*_game_day_query(puzzle_date, names)), SCORE_TYPES)
+
+    async def game_points_leaderboard_async(self, period, today):
+        return _frame(*await self._fetch_async(*game_points_query(period, today)), GAME_POINTS_TYPES)
@@ -0,0 +1,644 @@
+"""
+Embedded SQLite backend for single-node and offline installs.
+
+The database is one local file in WAL mode, so readers never block the
+writer and reads are a function call rather than a network round trip.
+Each thread keeps its own connection; writes run in BEGIN IMMEDIATE
+transactions so concurrent writers queue on busy_timeout instead of
+failing. The schema is created on first use and versioned with
+PRAGMA user_version.
+
+There is no auth.users here: the leaderboards read names from a local
+users table that db.py fills in as signed-in users log scores.
+"""
+import datetime
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+import pandas as pd
+
+import progression
+from storage.base import (
+    CARDIO_HISTORY_SELECT,
+    CARDIO_HISTORY_TYPES,
+    CARDIO_RECORDS_INSERT_SQL,
+    CARDIO_SERIES_SQL,
+    GAME_POINTS_TYPES,
+    PREVIOUS_COLUMNS,
+    PROGRESS_COLUMNS,
+    SCORE_TYPES,
+    STRENGTH_RECORDS_INSERT_SQL,
+    STRENGTH_SERIES_SQL,
+    USER_DIRECTORY_SQL,
+    WORKOUT_HISTORY_SELECT,
+    WORKOUT_HISTORY_TYPES,
+    Repository,
+    game_points_query,
+    game_scores_query,
+    history_query,
+    latest_per_exercise,
+    progress_params,
+)
+
+# Dates are stored as ISO text and booleans as 0/1; declaring columns DATE
+# or BOOLEAN makes them come back as datetime.date and bool.
+sqlite3.register_adapter(datetime.date, datetime.date.isoformat)
+sqlite3.register_adapter(datetime.datetime, lambda d: d.isoformat(" "))
+sqlite3.register_converter("DATE", lambda b: datetime.date.fromisoformat(b.decode()))
+sqlite3.register_converter("BOOLEAN", lambda b: bool(int(b)))
+
+PRAGMAS = {
+    "journal_mode": "WAL",
+    # Safe with WAL: a power cut can lose the last commits, never corrupt.
+    "synchronous": "NORMAL",
+    "foreign_keys": "ON",
+    "busy_timeout": 5000,
+    "temp_store": "MEMORY",
+    "cache_size": -64000,        # KiB, i.e. 64 MB of page cache per connection
+    "mmap_size": 256 * 1024 * 1024,
+}
+
+_NOW = "(strftime('%Y-%m-%d %H:%M:%f', 'now'))"
+
+# One script per schema version; PRAGMA user_version records the last applied.
+SCHEMA = [
+    f"""
+    CREATE TABLE users (
+        id TEXT PRIMARY KEY,
+        email TEXT
+    );
+
+    CREATE TABLE family_members (
+        user_id TEXT PRIMARY KEY,
+        display_name TEXT NOT NULL
+    );
+
+    CREATE TABLE exercises (
+        id INTEGER PRIMARY KEY,
+        user_id TEXT NOT NULL,
+        name TEXT NOT NULL,
+        created_at TEXT NOT NULL DEFAULT {_NOW},
+        UNIQUE (user_id, name)
+    );
+
+    CREATE TABLE workouts (
+        id INTEGER PRIMARY KEY,
+        user_id TEXT NOT NULL,
+        exercise_id INTEGER NOT NULL REFERENCES exercises (id) ON DELETE CASCADE,
+        workout_date DATE NOT NULL,
+        weight REAL,
+        sets INTEGER,
+        target_reps INTEGER,
+        achieved_reps INTEGER,
+        success BOOLEAN,
+        scheme TEXT,
+        created_at TEXT NOT NULL DEFAULT {_NOW}
+    );
+
+    CREATE TABLE exercise_progress (
+        user_id TEXT NOT NULL,
+        exercise_id INTEGER NOT NULL,
+        workout_date DATE,
+        weight REAL,
+        sets INTEGER,
+        target_reps INTEGER,
+        achieved_reps INTEGER,
+        success BOOLEAN,
+        scheme TEXT,
+        rule TEXT NOT NULL,
+        next_weight REAL,
+        next_sets INTEGER,
+        next_target_reps INTEGER,
+        next_scheme TEXT,
+        updated_at TEXT NOT NULL DEFAULT {_NOW},
+        PRIMARY KEY (user_id, exercise_id)
+    ) WITHOUT ROWID;
+
+    CREATE TABLE cardio_exercises (
+        id INTEGER PRIMARY KEY,
+        user_id TEXT NOT NULL,
+        name TEXT NOT NULL,
+        created_at TEXT NOT NULL DEFAULT {_NOW},
+        UNIQUE (user_id, name)
+    );
+
+    CREATE TABLE cardio_workouts (
+        id INTEGER PRIMARY KEY,
+        user_id TEXT NOT NULL,
+        workout_type TEXT NOT NULL,
+        workout_date DATE NOT NULL,
+        time_minutes REAL,
+        distance_km REAL,
+        difficulty_level TEXT,
+        created_at TEXT NOT NULL DEFAULT {_NOW}
+    );
+
+    CREATE TABLE pips_scores (
+        id INTEGER PRIMARY KEY,
+        user_id TEXT NOT NULL,
+        puzzle_date DATE NOT NULL,
+        difficulty TEXT NOT NULL,
+        time_seconds INTEGER NOT NULL,
+        created_at TEXT NOT NULL DEFAULT {_NOW},
+        UNIQUE (user_id, puzzle_date, difficulty)
+    );
+
+    CREATE TABLE pips_daily_points (
+        puzzle_date DATE NOT NULL,
+        difficulty TEXT NOT NULL,
+        user_id TEXT NOT NULL,
+        points INTEGER NOT NULL,
+        PRIMARY KEY (puzzle_date, difficulty, user_id)
+    ) WITHOUT ROWID;
+
+    CREATE TABLE nyt_scores (
+        id INTEGER PRIMARY KEY,
+        user_id TEXT NOT NULL,
+        game TEXT NOT NULL,
+        puzzle_date DATE NOT NULL,
+        score INTEGER NOT NULL,
+        notes TEXT,
+        created_at TEXT NOT NULL DEFAULT {_NOW},
+        UNIQUE (user_id, game, puzzle_date)
+    );
+
+    CREATE TABLE legacy_import_checkpoints (
+        user_id TEXT NOT NULL,
+        source TEXT NOT NULL,
+        last_entry_id INTEGER NOT NULL,
+        updated_at TEXT NOT NULL DEFAULT {_NOW},
+        PRIMARY KEY (user_id, source)
+    ) WITHOUT ROWID;
+
+    -- Same access paths as migrations/0005_hot_path_indexes.sql.
+    CREATE INDEX workouts_user_exercise_created_idx
+        ON workouts (user_id, exercise_id, created_at DESC, id DESC);
+    CREATE INDEX workouts_user_date_idx
+        ON workouts (user_id, workout_date DESC, id DESC);
+    CREATE INDEX workouts_user_exercise_date_idx
+        ON workouts (user_id, exercise_id, workout_date DESC, id DESC);
+    CREATE INDEX cardio_workouts_user_type_created_idx
+        ON cardio_workouts (user_id, workout_type, created_at DESC, id DESC);
+    CREATE INDEX cardio_workouts_user_date_idx
+        ON cardio_workouts (user_id, workout_date DESC, id DESC);
+    CREATE INDEX cardio_workouts_user_type_date_idx
+        ON cardio_workouts (user_id, workout_type, workout_date DESC, id DESC);
+    -- Covering: user_id last instead of INCLUDE, which SQLite lacks.
+    CREATE INDEX pips_scores_date_difficulty_time_idx
+        ON pips_scores (puzzle_date, difficulty, time_seconds, user_id);
+    CREATE INDEX pips_scores_user_date_idx
+        ON pips_scores (user_id, puzzle_date);
+    CREATE INDEX nyt_scores_date_game_idx
+        ON nyt_scores (puzzle_date, game);
+    CREATE INDEX nyt_scores_user_date_idx
+        ON nyt_scores (user_id, puzzle_date);
+    """,
+    # 2: personal records, as migrations/0006_personal_records.sql.
+    f"""
+    CREATE TABLE personal_records (
+        user_id TEXT NOT NULL,
+        exercise_id INTEGER NOT NULL REFERENCES exercises (id) ON DELETE CASCADE,
+        record TEXT NOT NULL,
+        reps INTEGER NOT NULL DEFAULT 0,
+        value REAL NOT NULL,
+        workout_date DATE NOT NULL,
+        updated_at TEXT NOT NULL DEFAULT {_NOW},
+        PRIMARY KEY (user_id, exercise_id, record, reps)
+    ) WITHOUT ROWID;
+
+    CREATE TABLE cardio_records (
+        user_id TEXT NOT NULL,
+        workout_type TEXT NOT NULL,
+        record TEXT NOT NULL,
+        value REAL NOT NULL,
+        workout_date DATE NOT NULL,
+        updated_at TEXT NOT NULL DEFAULT {_NOW},
+        PRIMARY KEY (user_id, workout_type, record)
+    ) WITHOUT ROWID;
+    """,
+    # 3: points for every game, as migrations/0007_game_daily_points.sql.
+    """
+    CREATE TABLE game_daily_points (
+        game TEXT NOT NULL,
+        puzzle_date DATE NOT NULL,
+        board TEXT NOT NULL,
+        user_id TEXT NOT NULL,
+        points INTEGER NOT NULL,
+        PRIMARY KEY (game, puzzle_date, board, user_id)
+    ) WITHOUT ROWID;
+
+    INSERT OR IGNORE INTO game_daily_points (game, puzzle_date, board, user_id, points)
+    SELECT 'Pips', puzzle_date, difficulty, user_id, points FROM pips_daily_points;
+
+    DROP TABLE pips_daily_points;
+    """,
+    # 4: idempotency keys, as migrations/0008_applied_writes.sql.
+    f"""
+    CREATE TABLE applied_writes (
+        key TEXT PRIMARY KEY,
+        applied_at TEXT NOT NULL DEFAULT {_NOW}
+    ) WITHOUT ROWID;
+    """,
+    # 5: all-time points per player, as migrations/0009_game_total_points.sql.
+    """
+    CREATE TABLE game_total_points (
+        game TEXT NOT NULL,
+        user_id TEXT NOT NULL,
+        points INTEGER NOT NULL,
+        PRIMARY KEY (game, user_id)
+    ) WITHOUT ROWID;
+
+    INSERT INTO game_total_points (game, user_id, points)
+    SELECT game, user_id, SUM(points) FROM game_daily_points
+    GROUP BY game, user_id;
+    """,
+]
+
+_PROGRESS_SELECT = f"""
+    SELECT {PROGRESS_COLUMNS}
+    FROM exercise_progress p
+    JOIN exercises e ON p.exercise_id = e.id
+    WHERE p.user_id = ?
+"""
+
+_UPSERT_PROGRESS_SQL = f"""
+    INSERT INTO exercise_progress (
+        user_id, exercise_id, workout_date, weight, sets, target_reps,
+        achieved_reps, success, scheme, rule,
+        next_weight, next_sets, next_target_reps, next_scheme
+    )
+    VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?)
+    ON CONFLICT (user_id, exercise_id) DO UPDATE
+    SET workout_date = excluded.workout_date,
+        weight = excluded.weight,
+        sets = excluded.sets,
+        target_reps = excluded.target_reps,
+        achieved_reps = excluded.achieved_reps,
+        success = excluded.success,
+        scheme = excluded.scheme,
+        rule = excluded.rule,
+        next_weight = excluded.next_weight,
+        next_sets = excluded.next_sets,
+        next_target_reps = excluded.next_target_reps,
+        next_scheme = excluded.next_scheme,
+        updated_at = {_NOW}
+    WHERE exercise_progress.workout_date <= excluded.workout_date
+"""
+
+# Same buckets as the Postgres backend; weeks start on Monday.
+_BUCKET_EXPRS = {
+    "day": "{column}",
+    "week": "date({column}, 'weekday 0', '-6 days')",
+    "month": "date({column}, 'start of month')",
+}
+
+_EXPORT_QUERIES = {
+    "workouts": """
+        SELECT w.workout_date, e.name AS exercise, w.weight, w.sets,
+               w.target_reps, w.achieved_reps, w.success, w.scheme
+        FROM workouts w
+        JOIN exercises e ON w.exercise_id = e.id
+        WHERE w.user_id = ?
+        ORDER BY w.workout_date, w.id
+    """,
+    "cardio": """
+        SELECT workout_date, workout_type, time_minutes, distance_km, difficulty_level
+        FROM cardio_workouts
+        WHERE user_id = ?
+        ORDER BY workout_date, id
+    """,
+    "pips": """
+        SELECT puzzle_date, difficulty, time_seconds
+        FROM pips_scores
+        WHERE user_id = ?
+        ORDER BY puzzle_date, difficulty
+    """,
+    "nyt": """
+        SELECT puzzle_date, game, score, notes
+        FROM nyt_scores
+        WHERE user_id = ?
+        ORDER BY puzzle_date, game
+    """,
+}
+
+
+class SQLiteRepository(Repository):
+    name = "sqlite"
+    # "database is locked" once busy_timeout runs out.
+    transient_errors = (sqlite3.OperationalError,)
+    sql_param = "?"
+    sql_real = "REAL"
+    sql_now = _NOW
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self.migrate(log=lambda msg: None)
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # isolation_level=None: no implicit transactions, so reads run
+            # in autocommit and writes open their own with transaction().
+            conn = sqlite3.connect(self.path, detect_types=sqlite3.PARSE_DECLTYPES, isolation_level=None)
+            for pragma, value in PRAGMAS.items():
+                conn.execute(f"PRAGMA {pragma} = {value}")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def connection(self):
+        yield self._conn()
+
+    @contextmanager
+    def transaction(self):
+        """
+        BEGIN IMMEDIATE takes the write lock up front, so two writers queue
+        on busy_timeout instead of deadlocking on a read-to-write upgrade.
+        """
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+
+    def version(self):
+        return "SQLite " + sqlite3.sqlite_version
+
+    def migrate(self, log=print):
+        conn = self._conn()
+        current = conn.execute("PRAGMA user_version").fetchone()[0]
+        versions = []
+        for version, script in enumerate(SCHEMA[current:], start=current + 1):
+            conn.executescript(f"BEGIN IMMEDIATE; {script}; PRAGMA user_version = {version}; COMMIT;")
+            log(f"Applied SQLite schema version {version}")
+            versions.append(str(version))
+        return versions
+
+    # --- Users ---
+    def remember_user(self, user_id, email):
+        if not email:
+            return
+        with self.transaction() as conn:
+            conn.execute("""
+                INSERT INTO users (id, email) VALUES (?, ?)
+                ON CONFLICT (id) DO UPDATE SET email = excluded.email
+                WHERE users.email IS NOT excluded.email
+            """, (user_id, email))
+
+    def user_directory(self):
+        return self._conn().execute(USER_DIRECTORY_SQL.format(users="users")).fetchall()
+
+    def set_display_name(self, user_id, display_name):
+        with self.transaction() as conn:
+            if display_name is None:
+                conn.execute("DELETE FROM family_members WHERE user_id = ?", (user_id,))
+            else:
+                conn.execute("""
+                    INSERT INTO family_members (user_id, display_name) VALUES (?, ?)
+                    ON CONFLICT (user_id) DO UPDATE SET display_name = excluded.display_name
+                """, (user_id, display_name))
+
+    # ----------------- Exercises -----------------
+    def add_exercise(self, user_id, name):
+        with self.transaction() as conn:
+            conn.execute("INSERT OR IGNORE INTO exercises (user_id, name) VALUES (?, ?)", (user_id, name))
+
+    def get_exercises(self, user_id):
+        rows = self._conn().execute("SELECT name FROM exercises WHERE user_id = ? ORDER BY name", (user_id,))
+        return [r[0] for r in rows]
+
+    def ensure_exercises(self, user_id, names):
+        with self.transaction() as conn:
+            conn.executemany("INSERT OR IGNORE INTO exercises (user_id, name) VALUES (?, ?)",
+                             [(user_id, name) for name in names])
+            return dict(conn.execute("SELECT name, id FROM exercises WHERE user_id = ?", (user_id,)))
+
+    # ----------------- Workouts -----------------
+    def log_workouts(self, user_id, entries, rule=progression.DEFAULT_RULE, keys=()):
+        names = sorted({e["exercise_name"] for e in entries})
+        with self.transaction() as conn:
+            self._claim_writes(conn, keys)
+            exercise_ids = dict(conn.execute(
+                f"SELECT name, id FROM exercises WHERE user_id = ? AND name IN ({','.join('?' * len(names))})",
+                (user_id, *names),
+            ))
+            for name in names:
+                if name not in exercise_ids:
+                    raise RuntimeError(f"Exercise '{name}' not found for user {user_id}")
+
+            conn.executemany("""
+                INSERT INTO workouts (user_id, exercise_id, workout_date, weight, sets,
+                                      target_reps, achieved_reps, success, scheme)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, [
+                (user_id, exercise_ids[e["exercise_name"]], e["workout_date"], e["weight"], e["sets"],
+                 e["target_reps"], e["achieved_reps"], e["success"], e["scheme"])
+                for e in entries
+            ])
+            conn.executemany(_UPSERT_PROGRESS_SQL, [
+                progress_params(user_id, exercise_ids[name], prev, rule)
+                for name, prev in latest_per_exercise(entries)
+            ])
+            return self._update_strength_records(conn, user_id, entries, exercise_ids)
+
+    def query_workouts(self, user_id, exercise_name, start_date, end_date, limit, cursor):
+        query, params = history_query(WORKOUT_HISTORY_SELECT, "w", user_id, {"e.name": exercise_name},
+                                      start_date, end_date, limit, cursor, param="?")
+        return self._read_frame(query, params, WORKOUT_HISTORY_TYPES)
+
+    # ----------------- Progression state -----------------
+    def get_progress(self, user_id, exercise_name):
+        return self._conn().execute(
+            _PROGRESS_SELECT + " AND e.user_id = p.user_id AND e.name = ?", (user_id, exercise_name),
+        ).fetchone()
+
+    def get_all_progress(self, user_id):
+        return self._conn().execute(_PROGRESS_SELECT, (user_id,)).fetchall()
+
+    def recompute_progression(self, user_id=None, rule=progression.DEFAULT_RULE, chunk_size=5000):
+        user_filter = "WHERE user_id = ?" if user_id else ""
+        params = (user_id,) if user_id else ()
+        total = 0
+        with self.transaction() as conn:
+            conn.execute(f"DELETE FROM exercise_progress {user_filter}", params)
+            # No DISTINCT ON in SQLite: keep the first row per exercise instead.
+            latest = conn.execute(f"""
+                SELECT user_id, exercise_id, workout_date, weight, sets,
+                       target_reps, achieved_reps, success, scheme
+                FROM (
+                    SELECT w.*,
+                           ROW_NUMBER() OVER (
+                               PARTITION BY user_id, exercise_id
+                               ORDER BY created_at DESC, id DESC
+                           ) AS rn
+                    FROM workouts w
+                    {user_filter}
+                )
+                WHERE rn = 1
+            """, params)
+            while True:
+                rows = latest.fetchmany(chunk_size)
+                if not rows:
+                    break
+                conn.executemany(_UPSERT_PROGRESS_SQL, [
+                    progress_params(row[0], row[1], dict(zip(PREVIOUS_COLUMNS, row[2:])), rule)
+                    for row in rows
+                ])
+                total += len(rows)
+        return total
+
+    # ----------------- Personal records -----------------
+    def get_personal_records(self, user_id, exercise_name):
+        return self._conn().execute("""
+            SELECT r.record, r.reps, r.value, r.workout_date
+            FROM personal_records r
+            JOIN exercises e ON r.exercise_id = e.id
+            WHERE r.user_id = ? AND e.user_id = r.user_id AND e.name = ?
+            ORDER BY r.record, r.reps
+        """, (user_id, exercise_name)).fetchall()
+
+    def get_cardio_records(self, user_id, workout_type):
+        return self._conn().execute("""
+            SELECT record, value, workout_date
+            FROM cardio_records
+            WHERE user_id = ? AND workout_type = ?
+            ORDER BY record
+        """, (user_id, workout_type)).fetchall()
+
+    def rebuild_personal_records(self, user_id=None):
+        and_user = "AND user_id = ?" if user_id else ""
+        user_filter = "WHERE user_id = ?" if user_id else ""
+        params = (user_id,) if user_id else ()
+        rows = 0
+        with self.transaction() as conn:
+            for table, insert_sql in [("personal_records", STRENGTH_RECORDS_INSERT_SQL),
+                                      ("cardio_records", CARDIO_RECORDS_INSERT_SQL)]:
+                conn.execute(f"DELETE FROM {table} {user_filter}", params)
+                rows += conn.execute(insert_sql.format(real=self.sql_real, and_user=and_user), params * 2).rowcount
+        return rows
+
+    # ----------------- Chart series -----------------
+    def strength_series(self, user_id, exercise_name, bucket):
+        query = STRENGTH_SERIES_SQL.format(
+            bucket=_BUCKET_EXPRS[bucket].format(column="w.workout_date"), real=self.sql_real, param="?",
+        )
+        return pd.read_sql_query(query, self._conn(), params=(user_id, exercise_name))
+
+    def cardio_series(self, user_id, workout_type, bucket):
+        query = CARDIO_SERIES_SQL.format(
+            bucket=_BUCKET_EXPRS[bucket].format(column="workout_date"), real=self.sql_real, param="?",
+            type_filter="AND workout_type = ?" if workout_type else "",
+        )
+        params = (user_id, workout_type) if workout_type else (user_id,)
+        return pd.read_sql_query(query, self._conn(), params=params)
+
+    # ----------------- Cardio Workouts -----------------
+    def log_cardio(self, user_id, workout_type, time_minutes, distance_km, difficulty_level, workout_date, keys=()):
+        with self.transaction() as conn:
+            self._claim_writes(conn, keys)
+            conn.execute("""
+                INSERT INTO cardio_workouts (user_id, workout_type, workout_date, time_minutes, distance_km, difficulty_level)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, (user_id, workout_type, workout_date, time_minutes, distance_km, difficulty_level))
+            return self._update_cardio_records(conn, user_id, workout_type, time_minutes, distance_km, workout_date)
+
+    def query_cardio_workouts(self, user_id, workout_type, start_date, end_date, limit, cursor):
+        query, params = history_query(CARDIO_HISTORY_SELECT, "c", user_id, {"c.workout_type": workout_type},
+                                      start_date, end_date, limit, cursor, param="?")
+        return self._read_frame(query, params, CARDIO_HISTORY_TYPES)
+
+    def get_last_cardio(self, user_id, workout_type):
+        return self._conn().execute("""
+            SELECT workout_date, time_minutes, distance_km, difficulty_level
+            FROM cardio_workouts
+            WHERE user_id = ? AND workout_type = ?
+            ORDER BY created_at DESC, id DESC
+            LIMIT 1
+        """, (user_id, workout_type)).fetchone()
+
+    def add_cardio_exercise(self, user_id, name):
+        with self.transaction() as conn:
+            conn.execute("INSERT OR IGNORE INTO cardio_exercises (user_id, name) VALUES (?, ?)", (user_id, name))
+
+    def get_cardio_exercises(self, user_id):
+        rows = self._conn().execute("SELECT name FROM cardio_exercises WHERE user_id = ? ORDER BY name", (user_id,))
+        return [r[0] for r in rows]
+
+    # ----------------- Pips & NYT Games -----------------
+    def log_pips_score(self, user_id, difficulty, time_seconds, puzzle_date, keys=()):
+        with self.transaction() as conn:
+            self._claim_writes(conn, keys)
+            conn.execute("""
+                INSERT INTO pips_scores (user_id, puzzle_date, difficulty, time_seconds)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT (user_id, puzzle_date, difficulty) DO UPDATE
+                SET time_seconds = excluded.time_seconds
+            """, (user_id, puzzle_date, difficulty, time_seconds))
+            # The write lock from BEGIN IMMEDIATE already serialises refreshes.
+            self._refresh_game_points(conn, "Pips", puzzle_date)
+
+    def log_nyt_score(self, user_id, game, score, puzzle_date, notes=None, keys=()):
+        with self.transaction() as conn:
+            self._claim_writes(conn, keys)
+            conn.execute("""
+                INSERT INTO nyt_scores (user_id, game, puzzle_date, score, notes)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (user_id, game, puzzle_date) DO UPDATE
+                SET score = excluded.score,
+                    notes = excluded.notes
+            """, (user_id, game, puzzle_date, score, notes))
+            self._refresh_game_points(conn, game, puzzle_date)
+
+    def prune_applied_writes(self, days):
+        with self.transaction() as conn:
+            return conn.execute("DELETE FROM applied_writes WHERE applied_at < strftime('%Y-%m-%d %H:%M:%f', 'now', ?)",
+                                (f"-{days} days",)).rowcount
+
+    def game_day_scores(self, puzzle_date, names):
+        query, params = game_scores_query(names, puzzle_date, puzzle_date, param="?")
+        return self._read_frame(query, params, SCORE_TYPES)
+
+    def rebuild_game_points(self, chunk_days=31):
+        with self.transaction() as conn:
+            return self._rebuild_game_points(conn, chunk_days)
+
+    def game_points_leaderboard(self, period, today):
+        query, params = game_points_query(period, today, param="?")
+        return self._read_frame(query, params, GAME_POINTS_TYPES)
+
+    # ----------------- Bulk import and export -----------------
+    def legacy_checkpoint(self, user_id, source):
+        row = self._conn().execute("""
+            SELECT last_entry_id FROM legacy_import_checkpoints
+            WHERE user_id = ? AND source = ?
+        """, (user_id, source)).fetchone()
+        return row[0] if row else 0
+
+    def load_legacy_chunk(self, user_id, source, rows, last_entry_id):
+        with self.transaction() as conn:
+            conn.executemany("""
+                INSERT INTO workouts (user_id, exercise_id, workout_date, weight, sets,
+                                      target_reps, achieved_reps, success, scheme, created_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, rows)
+            conn.execute(f"""
+                INSERT INTO legacy_import_checkpoints (user_id, source, last_entry_id)
+                VALUES (?, ?, ?)
+                ON CONFLICT (user_id, source) DO UPDATE
+                SET last_entry_id = excluded.last_entry_id,
+                    updated_at = {_NOW}
+            """, (user_id, source, last_entry_id))
+
+    def iter_export(self, dataset, user_id, chunk_size):
+        """SQLite cursors step through results lazily, so fetchmany keeps memory flat."""
+        cur = self._conn().execute(_EXPORT_QUERIES[dataset], (user_id,))
+        while True:
+            rows = cur.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield rows
@@ -0,0 +1,140 @@
+"""
+write_queue.WriteQueue against a temporary SQLite file, with a fake
+apply() standing in for the database.
+
+    python -m pytest test_write_queue.py
+"""
+import pytest
+
+from write_queue import WriteQueue
+
+
+class Unavailable(Exception):
+    """A transient error: the database is down."""
+
+
+class FakeDatabase:
+    """
+    Records applied writes and, like the real backends, skips a write whose
+    idempotency key it has seen before. failures[key] = n makes the next n
+    calls including key raise Unavailable; a payload whose "n" is in
+    rejected makes every call including it raise ValueError; a key in
+    lose_reply is committed and then raises Unavailable once.
+    """
+
+    def __init__(self):
+        self.calls = []
+        self.keys = set()
+        self.failures = {}
+        self.rejected = set()
+        self.lose_reply = set()
+        self.after = []
+
+    def apply(self, user_id, op, writes):
+        for key, payload in writes:
+            if self.failures.get(key):
+                self.failures[key] -= 1
+                raise Unavailable("database is down")
+            if payload["n"] in self.rejected:
+                raise ValueError(f"bad row {payload['n']}")
+        new = [(key, payload) for key, payload in writes if key not in self.keys]
+        self.keys.update(key for key, _ in new)
+        if new:
+            self.calls.append((user_id, op, [payload["n"] for _, payload in new]))
+        for key, _ in writes:
+            if key in self.lose_reply:
+                # Committed, but the reply never arrives.
+                self.lose_reply.discard(key)
+                raise Unavailable("connection reset")
+        return [f"record {payload['n']}" for _, payload in new if payload.get("record")]
+
+    def after_writes(self, user_id, op, payloads):
+        self.after.append((user_id, [p["n"] for p in payloads]))
+
+
+@pytest.fixture
+def database():
+    return FakeDatabase()
+
+
+@pytest.fixture
+def queue(tmp_path, database):
+    q = WriteQueue(str(tmp_path / "queue.db"), database.apply, after=database.after_writes,
+                   mergeable={"workouts"}, transient_errors=(Unavailable,), max_backoff=0.05)
+    yield q
+    q.stop()
+
+
+def test_flushes_each_users_writes_in_order(queue, database):
+    for n in range(5):
+        queue.enqueue("a", "cardio", {"n": n})
+    assert queue.drain(5)
+    assert database.calls == [("a", "cardio", [n]) for n in range(5)]
+    assert queue.stats() == {}
+
+
+def test_merges_consecutive_writes_of_a_mergeable_op(tmp_path, database):
+    path = str(tmp_path / "queue.db")
+    # Queue everything while no worker runs, so the next one sees one batch.
+    stopped = WriteQueue(path, database.apply, mergeable={"workouts"})
+    stopped.stop()
+    for n in range(3):
+        stopped.enqueue("a", "workouts", {"n": n})
+    stopped.enqueue("a", "cardio", {"n": 3})
+    stopped.enqueue("a", "workouts", {"n": 4})
+    restarted = WriteQueue(path, database.apply, mergeable={"workouts"})
+    try:
+        assert restarted.drain(5)
+    finally:
+        restarted.stop()
+    assert database.calls == [("a", "workouts", [0, 1, 2]), ("a", "cardio", [3]), ("a", "workouts", [4])]
+
+
+def test_retries_a_transient_failure_without_holding_up_other_users(queue, database):
+    first = queue.enqueue("a", "cardio", {"n": 0})
+    database.failures[first] = 2
+    queue.enqueue("a", "cardio", {"n": 1})
+    queue.enqueue("b", "cardio", {"n": 2})
+    assert queue.drain(5)
+    # b goes in while a backs off; a's writes still land in order.
+    assert database.calls == [("b", "cardio", [2]), ("a", "cardio", [0]), ("a", "cardio", [1])]
+    assert queue.stats() == {}
+    assert queue.take_notices("a") == []
+
+
+def test_parks_only_the_write_that_fails_for_good(queue, database):
+    database.rejected.add(1)
+    for n in range(3):
+        queue.enqueue("a", "workouts", {"n": n, "record": n == 2})
+    assert queue.drain(5)
+    assert [n for _, _, ns in database.calls for n in ns] == [0, 2]
+    assert queue.stats() == {"failed": 1}
+    [(_, user_id, op, error)] = queue.failed()
+    assert (user_id, op, error) == ("a", "workouts", "bad row 1")
+    notices = queue.take_notices("a")
+    assert ("error", "A workouts entry couldn't be saved: bad row 1") in notices
+    assert ("record", "record 2") in notices
+    assert queue.take_notices("a") == []
+    # Readers were shown the failed write while it was queued.
+    assert ("a", [1]) in database.after
+    assert queue.pending("a", "workouts") == []
+
+
+def test_retry_failed_puts_parked_writes_back(queue, database):
+    database.rejected.add(0)
+    queue.enqueue("a", "cardio", {"n": 0})
+    assert queue.drain(5)
+    database.rejected.clear()
+    assert queue.retry_failed() == 1
+    assert queue.drain(5)
+    assert database.calls == [("a", "cardio", [0])]
+    assert queue.stats() == {}
+
+
+def test_skips_a_write_that_committed_before_its_reply_was_lost(queue, database):
+    key = queue.enqueue("a", "cardio", {"n": 0})
+    database.lose_reply.add(key)
+    queue.enqueue("a", "cardio", {"n": 1})
+    assert queue.drain(5)
+    assert database.calls == [("a", "cardio", [0]), ("a", "cardio", [1])]
+    assert queue.stats() == {}
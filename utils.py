@@ -1,46 +1,88 @@
 import streamlit as st
-from supabase import create_client
-
-SUPABASE_URL = st.secrets["SUPABASE_URL"]
-SUPABASE_KEY = st.secrets["SUPABASE_KEY"]
-
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
-
-def ensure_session_keys():
-    """Guarantee required session keys exist."""
-    if "user" not in st.session_state:
-        st.session_state.user = None
-    if "user_id" not in st.session_state:
-        st.session_state.user_id = None
-    if "access_token" not in st.session_state:
-        st.session_state.access_token = None
-    if "refresh_token" not in st.session_state:
-        st.session_state.refresh_token = None
-
-def login_user(email, password):
-    """Log in with email/password and store tokens in session_state."""
-    res = supabase.auth.sign_in_with_password({"email": email, "password": password})
-    if res.user:
-        st.session_state.user = {"email": res.user.email, "id": res.user.id}
-        st.session_state.user_id = res.user.id
-        st.session_state.access_token = res.session.access_token
-        st.session_state.refresh_token = res.session.refresh_token
-        return True
-    return False
-
-def refresh_supabase_session():
-    """
-    Refresh the Supabase session if a refresh_token is available.
-    Call this at the top of each page to keep users logged in.
-    """
-    if st.session_state.get("refresh_token"):
-        try:
-            res = supabase.auth.refresh_session(st.session_state["refresh_token"])
-            if res and res.session:
-                st.session_state.access_token = res.session.access_token
-                st.session_state.refresh_token = res.session.refresh_token
-                if res.user:
-                    st.session_state.user = {"email": res.user.email, "id": res.user.id}
-                    st.session_state.user_id = res.user.id
-        except Exception as e:
-            st.warning(f"Session refresh failed: {e}")
\ No newline at end of file
+from config import get_setting
+from db import get_points_leaderboards, take_write_notices
+from storage import LEADERBOARD_PERIODS
+
+def is_admin():
+    """True if the signed-in user's email is listed in the ADMIN_EMAILS setting (comma-separated)."""
+    email = st.session_state.get("user_email")
+    admins = {e.strip().lower() for e in str(get_setting("ADMIN_EMAILS", "")).split(",") if e.strip()}
+    return bool(email) and email.lower() in admins
+
+@st.fragment
+def show_paged_history(key, fetch_page, empty_message):
+    """
+    Render one page of history with Newer/Older buttons, as a fragment:
+    paging reruns only this, not the page around it.
+    fetch_page(cursor=...) must return (page, next_cursor). The cursors of
+    the pages seen so far are kept in session_state under key, so pass a
+    key that changes whenever the filters change.
+    """
+    cursors = st.session_state.setdefault(key, [None])
+    page, next_cursor = fetch_page(cursor=cursors[-1])
+
+    if page.empty:
+        st.info(empty_message)
+        return
+
+    st.dataframe(page, use_container_width=True)
+
+    col_newer, col_page, col_older = st.columns([1, 2, 1])
+    with col_newer:
+        # Callbacks run before the fragment reruns, so it draws the new page.
+        st.button("⬅️ Newer", key=f"{key}_newer", disabled=len(cursors) == 1, on_click=cursors.pop)
+    with col_page:
+        st.caption(f"Page {len(cursors)}")
+    with col_older:
+        st.button("Older ➡️", key=f"{key}_older", disabled=next_cursor is None,
+                  on_click=cursors.append, args=(next_cursor,))
+
+def show_game_leaderboards(game, daily, points):
+    """
+    Render one game's daily boards and its points leaderboard, from
+    db.get_daily_leaderboards / db.get_points_leaderboards results.
+    """
+    boards = daily.get(game, {})
+    for board, df in boards.items():
+        if len(boards) > 1:
+            st.markdown(f"**{board.capitalize()}**")
+        if df.empty:
+            st.info(f"No scores yet for {board}." if len(boards) > 1 else "No scores yet today.")
+        else:
+            st.dataframe(df, use_container_width=True, hide_index=True)
+
+    st.markdown("**🏆 Points**")
+    df = points.get(game)
+    if df is None or df.empty:
+        st.info("No points yet.")
+    else:
+        st.dataframe(df, use_container_width=True, hide_index=True)
+
+@st.fragment
+def show_leaderboards(names, daily, points, period):
+    """
+    The named games' leaderboards under one points-period radio, in a tab
+    per game when there are several. daily and points are the page's
+    first read, points for period; picking another period reruns only this
+    fragment and reads only the points again.
+    """
+    chosen = st.radio("Points period", LEADERBOARD_PERIODS, horizontal=True, key="points_period")
+    if chosen != period:
+        points = get_points_leaderboards(chosen)
+    if len(names) == 1:
+        show_game_leaderboards(names[0], daily, points)
+        return
+    for tab, game in zip(st.tabs(names), names):
+        with tab:
+            show_game_leaderboards(game, daily, points)
+
+def show_write_notices():
+    """
+    Show what the user's queued writes reported once they reached the
+    database: personal records beaten, and any write that couldn't be saved.
+    """
+    for kind, message in take_write_notices():
+        if kind == "record":
+            st.success(f"🏆 New PR! {message}")
+        else:
+            st.error(message)
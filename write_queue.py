@@ -0,0 +1,301 @@
+"""
+A durable local queue in front of the database, so a submit never waits
+on the network.
+
+enqueue() appends a write to a SQLite file in WAL mode with synchronous=FULL
+and returns as soon as it is on disk; a daemon thread flushes writes to the
+database in order, oldest first. Each write carries an idempotency key the
+backend records in the same transaction as the write itself, so a write
+that committed just before a crash (or a lost reply) is skipped, not
+repeated, when it is flushed again.
+
+Errors the backend marks as transient (the database is down or slow)
+leave the write queued and back off exponentially, holding back that
+user's later writes so they land in order; other users' writes go on.
+Any other error parks the write as failed and leaves a notice for its
+user; `python manage.py write-queue --retry-failed` puts failed writes
+back in line.
+
+pending() returns a user's queued writes so reads can merge them in
+before they reach the database; take_notices() hands over what the
+flushes had to say (new personal records, failures).
+"""
+import datetime
+import decimal
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS writes (
+    id INTEGER PRIMARY KEY,
+    key TEXT NOT NULL UNIQUE,
+    user_id TEXT NOT NULL,
+    op TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt REAL NOT NULL DEFAULT 0,
+    last_error TEXT,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS writes_user_op_idx ON writes (user_id, op, id);
+
+CREATE TABLE IF NOT EXISTS notices (
+    id INTEGER PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    message TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS notices_user_idx ON notices (user_id, id);
+"""
+
+
+def _default(value):
+    if isinstance(value, datetime.datetime):
+        return {"__datetime__": value.isoformat()}
+    if isinstance(value, datetime.date):
+        return {"__date__": value.isoformat()}
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+    if hasattr(value, "item"):  # numpy scalars from DataFrame rows
+        return value.item()
+    raise TypeError(f"Can't queue a {type(value).__name__}")
+
+
+def _object_hook(obj):
+    if "__date__" in obj:
+        return datetime.date.fromisoformat(obj["__date__"])
+    if "__datetime__" in obj:
+        return datetime.datetime.fromisoformat(obj["__datetime__"])
+    return obj
+
+
+def dumps(payload):
+    return json.dumps(payload, default=_default)
+
+
+def loads(text):
+    return json.loads(text, object_hook=_object_hook)
+
+
+class WriteQueue:
+    """
+    apply(user_id, op, writes) writes a list of (key, payload) pairs for one
+    user and op to the database and returns notice messages (e.g. records
+    beaten). Consecutive writes of an op in mergeable reach it together;
+    every other op one write at a time. after(user_id, op, payloads) runs
+    once they are off the queue, written or failed, e.g. to drop cached
+    reads.
+    """
+
+    def __init__(self, path, apply, after=None, mergeable=(), transient_errors=(),
+                 batch_size=100, max_backoff=60.0):
+        self.path = path
+        self.apply = apply
+        self.after = after
+        self.mergeable = set(mergeable)
+        self.transient_errors = tuple(transient_errors)
+        self.batch_size = batch_size
+        self.max_backoff = max_backoff
+        self._local = threading.local()
+        self._wake = threading.Event()
+        self._idle = threading.Condition()
+        self._stopping = False
+        self._conn().executescript(_SCHEMA)
+        self._thread = threading.Thread(target=self._run, name="write-queue", daemon=True)
+        self._thread.start()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, isolation_level=None, timeout=30)
+            conn.execute("PRAGMA journal_mode = WAL")
+            # An acknowledged write has to survive a power cut, not just a crash.
+            conn.execute("PRAGMA synchronous = FULL")
+            self._local.conn = conn
+        return conn
+
+    # --- Producers ---
+    def enqueue(self, user_id, op, payload):
+        """Queue a write and return its idempotency key once it is durable."""
+        key = uuid.uuid4().hex
+        self._conn().execute(
+            "INSERT INTO writes (key, user_id, op, payload, created_at) VALUES (?, ?, ?, ?, ?)",
+            (key, str(user_id), op, dumps(payload), time.time()),
+        )
+        self._wake.set()
+        return key
+
+    def pending(self, user_id, op):
+        """Payloads of the user's queued (not failed) writes of op, oldest first."""
+        rows = self._conn().execute(
+            "SELECT payload FROM writes WHERE user_id = ? AND op = ? AND state = 'pending' ORDER BY id",
+            (str(user_id), op),
+        )
+        return [loads(payload) for (payload,) in rows]
+
+    def take_notices(self, user_id):
+        """[(kind, message)] left for the user by flushes since the last call, oldest first."""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            rows = conn.execute("SELECT id, kind, message FROM notices WHERE user_id = ? ORDER BY id",
+                                (str(user_id),)).fetchall()
+            if rows:
+                conn.execute(f"DELETE FROM notices WHERE id IN ({', '.join('?' * len(rows))})",
+                             [r[0] for r in rows])
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+        return [(kind, message) for _, kind, message in rows]
+
+    # --- Maintenance ---
+    def stats(self):
+        """{state: number of writes}."""
+        return dict(self._conn().execute("SELECT state, COUNT(*) FROM writes GROUP BY state"))
+
+    def failed(self):
+        """(key, user_id, op, last_error) for every parked write."""
+        return self._conn().execute(
+            "SELECT key, user_id, op, last_error FROM writes WHERE state = 'failed' ORDER BY id"
+        ).fetchall()
+
+    def retry_failed(self):
+        """Put every failed write back in line. Returns how many."""
+        rows = self._conn().execute(
+            "UPDATE writes SET state = 'pending', attempts = 0, next_attempt = 0 WHERE state = 'failed'"
+        ).rowcount
+        self._wake.set()
+        return rows
+
+    def drain(self, timeout=None):
+        """Block until every pending write is flushed (or failed); False if timeout ran out first."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        self._wake.set()
+        with self._idle:
+            while self._has_pending():
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._idle.wait(0.05 if remaining is None else min(remaining, 0.05))
+        return True
+
+    def stop(self):
+        self._stopping = True
+        self._wake.set()
+        self._thread.join()
+
+    # --- Worker ---
+    def _has_pending(self):
+        return self._conn().execute("SELECT EXISTS (SELECT 1 FROM writes WHERE state = 'pending')").fetchone()[0]
+
+    def _run(self):
+        while not self._stopping:
+            try:
+                wait = self._flush_batch()
+            except Exception:
+                logger.exception("Write queue flush failed")
+                wait = 1.0
+            with self._idle:
+                self._idle.notify_all()
+            if wait:
+                self._wake.wait(wait)
+                self._wake.clear()
+
+    def _flush_batch(self):
+        """
+        Flush up to batch_size due writes. Returns how long to sleep before
+        the next pass: 0 to go straight on, else until the next retry.
+        """
+        now = time.time()
+        # A user whose oldest write is backing off waits as a whole: nothing
+        # of theirs may overtake it. Everyone else goes on.
+        rows = self._conn().execute("""
+            SELECT id, key, user_id, op, payload, attempts, next_attempt FROM writes
+            WHERE state = 'pending'
+              AND user_id NOT IN (SELECT user_id FROM writes WHERE state = 'pending' AND next_attempt > ?)
+            ORDER BY id
+            LIMIT ?
+        """, (now, self.batch_size)).fetchall()
+        if not rows:
+            retry = self._conn().execute(
+                "SELECT MIN(next_attempt) FROM writes WHERE state = 'pending'"
+            ).fetchone()[0]
+            return 5.0 if retry is None else max(retry - now, 0.01)
+
+        waiting = set()
+        for group in self._groups(rows):
+            user_id = group[0][2]
+            if user_id not in waiting and not self._flush_group(group):
+                waiting.add(user_id)
+        return 0
+
+    def _groups(self, rows):
+        """Runs of consecutive writes by one user to one mergeable op; any other write alone."""
+        groups = []
+        for row in rows:
+            if groups and row[3] in self.mergeable and groups[-1][-1][2:4] == row[2:4]:
+                groups[-1].append(row)
+            else:
+                groups.append([row])
+        return groups
+
+    def _flush_group(self, group):
+        """Write one group; False if it has to wait for a retry."""
+        user_id, op = group[0][2], group[0][3]
+        writes = [(row[1], loads(row[4])) for row in group]
+        ids = [row[0] for row in group]
+        try:
+            notices = self.apply(user_id, op, writes)
+        except self.transient_errors as e:
+            logger.warning("Write queue: %s for %s failed, will retry: %s", op, user_id, e)
+            self._conn().execute(
+                f"UPDATE writes SET attempts = attempts + 1, next_attempt = ?, last_error = ? "
+                f"WHERE id IN ({', '.join('?' * len(ids))})",
+                (time.time() + self._backoff(group[0][5] + 1), str(e), *ids),
+            )
+            return False
+        except Exception as e:
+            if len(group) > 1:
+                # Find the write that can't go in and let the others through.
+                return all(self._flush_group([row]) for row in group)
+            logger.error("Write queue: %s for %s failed for good: %s", op, user_id, e)
+            # Readers were shown it while it was queued; drop what they cached.
+            if self.after:
+                self.after(user_id, op, [payload for _, payload in writes])
+            self._finish(ids, user_id, [("error", f"A {op} entry couldn't be saved: {e}")], state="failed",
+                         error=str(e))
+            return True
+        # Drop stale reads before the writes leave the queue, so a reader
+        # that merges queued writes into fresh reads sees them at least once.
+        if self.after:
+            self.after(user_id, op, [payload for _, payload in writes])
+        self._finish(ids, user_id, [("record", message) for message in notices or ()])
+        return True
+
+    def _finish(self, ids, user_id, notices, state=None, error=None):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            marks = ", ".join("?" * len(ids))
+            if state:
+                conn.execute(f"UPDATE writes SET state = ?, last_error = ? WHERE id IN ({marks})",
+                             (state, error, *ids))
+            else:
+                conn.execute(f"DELETE FROM writes WHERE id IN ({marks})", ids)
+            conn.executemany("INSERT INTO notices (user_id, kind, message) VALUES (?, ?, ?)",
+                             [(user_id, kind, message) for kind, message in notices])
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+
+    def _backoff(self, attempts):
+        return min(0.5 * 2 ** (attempts - 1), self.max_backoff)